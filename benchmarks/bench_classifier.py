@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark del clasificador de paquetes (controller/classifier.py).
+
+Genera políticas sintéticas de 1k, 10k y 100k reglas con prefijos de
+distintos largos, protocolos, puertos, prioridades y reglas allow, y mide
+búsquedas/segundo del clasificador contra el recorrido lineal de las
+reglas sobre los mismos paquetes (la mitad derivados de una regla, la
+otra mitad al azar). Además verifica que ambos elijan una regla de la
+misma prioridad y acción para cada paquete.
+
+El recorrido lineal se mide sobre una muestra de paquetes proporcional
+al tamaño de la política para que la corrida de 100k reglas no tarde
+minutos.
+
+No requiere POX.
+
+Uso:
+    python3 benchmarks/bench_classifier.py
+    python3 benchmarks/bench_classifier.py --sizes 1000 10000 --packets 50000
+    python3 benchmarks/bench_classifier.py --json resultados.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'controller'))
+
+from compiled_rules import (FirewallRule, IP_TYPE, IP_PROTO_ICMP, IP_PROTO_TCP, IP_PROTO_UDP,
+                            ACTION_ALLOW, ACTION_DROP, DEFAULT_PRIORITY)
+from classifier import Classifier, linear_lookup
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_PACKETS = 20000
+
+# Búsquedas lineales sobre reglas (ej: 2M -> 200 paquetes con 10k reglas)
+LINEAR_RULE_CHECKS = 2000000
+
+PREFIX_LENGTHS = (0, 8, 16, 24, 24, 32, 32, 32)
+PORTS = (22, 25, 53, 80, 123, 443, 3306, 8080)
+
+
+def random_prefix(rng):
+    """Prefijo (red, largo) al azar dentro de 10.0.0.0/8, o None (comodín)."""
+    prefix_len = rng.choice(PREFIX_LENGTHS)
+    if not prefix_len:
+        return None
+    if prefix_len == 8:
+        return (0x0a000000, 8)
+    mask = (0xffffffff << (32 - prefix_len)) & 0xffffffff
+    return ((0x0a000000 | rng.getrandbits(24)) & mask, prefix_len)
+
+
+def generate_policy(count, seed=0):
+    """
+    Genera reglas de un switch con formas variadas.
+
+    Returns:
+        list: FirewallRule
+    """
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        proto = rng.choice((None, IP_PROTO_ICMP, IP_PROTO_TCP, IP_PROTO_TCP, IP_PROTO_UDP))
+        src_port = dst_port = None
+        if proto in (IP_PROTO_TCP, IP_PROTO_UDP):
+            dst_port = rng.choice(PORTS + (None,))
+            if rng.random() < 0.1:
+                src_port = rng.randrange(1024, 65536)
+        allows = rng.random() < 0.2
+        rules.append(FirewallRule(
+            1, IP_TYPE, random_prefix(rng), random_prefix(rng), proto, src_port, dst_port,
+            DEFAULT_PRIORITY + 100 if allows else rng.choice((100, 1000, DEFAULT_PRIORITY)),
+            ACTION_ALLOW if allows else ACTION_DROP,
+            "Regla sintética %d" % i))
+    return rules
+
+
+def generate_packets(rules, count, seed=0):
+    """Paquetes (ver Classifier.lookup): la mitad dentro de alguna regla."""
+    rng = random.Random(seed)
+    packets = []
+    for i in range(count):
+        if i % 2:
+            src = 0x0a000000 | rng.getrandbits(24)
+            dst = 0x0a000000 | rng.getrandbits(24)
+            proto = rng.choice((IP_PROTO_ICMP, IP_PROTO_TCP, IP_PROTO_UDP))
+            dst_port = rng.choice(PORTS) if proto != IP_PROTO_ICMP else None
+        else:
+            rule = rng.choice(rules)
+            src = rule.src_net | rng.getrandbits(32 - rule.src_len) if rule.src_len < 32 else rule.src_net
+            dst = rule.dst_net | rng.getrandbits(32 - rule.dst_len) if rule.dst_len < 32 else rule.dst_net
+            proto = rule.nw_proto or IP_PROTO_TCP
+            dst_port = rule.dst_port or rng.choice(PORTS) if proto != IP_PROTO_ICMP else None
+        src_port = rng.randrange(1024, 65536) if dst_port is not None else None
+        packets.append((IP_TYPE, src, dst, proto, src_port, dst_port))
+    return packets
+
+
+def verdict(rule):
+    return None if rule is None else (rule.priority, rule.action)
+
+
+def bench(size, packet_count):
+    """Construye el clasificador, mide ambas búsquedas y devuelve las métricas."""
+    rules = generate_policy(size)
+    packets = generate_packets(rules, packet_count)
+
+    start = time.perf_counter()
+    classifier = Classifier(rules)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [classifier.lookup(*packet) for packet in packets]
+    classifier_seconds = time.perf_counter() - start
+
+    sample = packets[:max(20, min(len(packets), LINEAR_RULE_CHECKS // size))]
+    start = time.perf_counter()
+    expected = [linear_lookup(rules, *packet) for packet in sample]
+    linear_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for got, want in zip(results, expected) if verdict(got) != verdict(want))
+    classifier_rate = len(packets) / classifier_seconds
+    linear_rate = len(sample) / linear_seconds
+    return {
+        'rules': size,
+        'shapes': classifier.shapes,
+        'build_seconds': build_seconds,
+        'packets': len(packets),
+        'matched': sum(1 for rule in results if rule is not None),
+        'classifier_lookups_per_sec': classifier_rate,
+        'linear_packets': len(sample),
+        'linear_lookups_per_sec': linear_rate,
+        'speedup': classifier_rate / linear_rate,
+        'mismatches': mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--packets', type=int, default=DEFAULT_PACKETS)
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guarda los resultados en JSON')
+    args = parser.parse_args()
+
+    results = []
+    print("%8s %7s %9s %14s %14s %9s %8s" %
+          ('reglas', 'formas', 'build s', 'clasif. pkt/s', 'lineal pkt/s', 'speedup', 'errores'))
+    for size in args.sizes:
+        r = bench(size, args.packets)
+        results.append(r)
+        print("%8d %7d %9.3f %14.0f %14.0f %8.0fx %8d" %
+              (size, r['shapes'], r['build_seconds'], r['classifier_lookups_per_sec'],
+               r['linear_lookups_per_sec'], r['speedup'], r['mismatches']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 1 if any(r['mismatches'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
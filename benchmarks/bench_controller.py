@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Benchmark del controlador: carga de reglas, connect storms e instalación.
+
+Para cada combinación de tamaño de política y cantidad de switches:
+
+  1. genera un archivo de reglas sintético (ver synthetic_rules.py)
+     repartido entre los switches
+  2. levanta POX con el firewall en un puerto libre y mide cuánto tarda
+     en cargar las reglas y empezar a escuchar
+  3. conecta todos los switches emulados a la vez (switch_emulator.py),
+     de modo que el controlador procesa N ConnectionUp simultáneos
+  4. espera a que cada switch reciba sus reglas seguidas de un barrier
+
+y reporta, como texto y opcionalmente como JSON para comparar versiones:
+
+  - load_seconds / load_cpu_seconds: arranque de POX con las reglas
+  - install_latency_seconds: por switch, desde el FEATURES_REPLY hasta
+    el barrier que sigue a su última regla (min, p50, p95, max; el
+    detalle por switch va en el JSON)
+  - time_to_policy_seconds: desde el intento de conexión de cada switch;
+    time_to_policy_all_seconds: hasta que el último switch tiene su política
+  - flow_mods_per_sec: flow-mods recibidos por todos los switches
+  - controller_cpu_seconds: CPU (user + sys) de POX durante la instalación
+  - peak_rss_mb: pico de memoria residente de POX (VmHWM)
+
+Requiere POX instalado en ./pox (ver install_pox.sh) y Linux (/proc).
+
+Uso:
+    python3 benchmarks/bench_controller.py
+    python3 benchmarks/bench_controller.py --sizes 1000 1000000 --switches 1 500 --json resultados.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from synthetic_rules import write_rules
+from switch_emulator import emulate, summarize, switch_report, percentile, raise_file_limit
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_SWITCHES = [1, 100]
+DEFAULT_TIMEOUT = 600.0
+FORMATS = ['json', 'jsonl', 'bin']
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def free_port():
+    """Un puerto TCP libre en localhost."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def listening(port):
+    """True si algún proceso escucha en el puerto (según /proc/net/tcp*)."""
+    for path in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(path) as f:
+                next(f)
+                for line in f:
+                    local, state = line.split()[1], line.split()[3]
+                    if state == '0A' and int(local.rsplit(':', 1)[1], 16) == port:
+                        return True
+        except OSError:
+            continue
+    return False
+
+
+def cpu_seconds(pid):
+    """CPU user + sys consumida por el proceso."""
+    with open('/proc/%d/stat' % pid) as f:
+        # el nombre del proceso puede tener espacios: los campos siguen al ')'
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def peak_rss_kb(pid):
+    """Pico de memoria residente del proceso (VmHWM), en KB."""
+    with open('/proc/%d/status' % pid) as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    return None
+
+
+def rules_per_switch(count, switches):
+    """Reglas de cada dpid según el reparto de generate_rules (1 + i % switches)."""
+    return {dpid: count // switches + (1 if dpid - 1 < count % switches else 0)
+            for dpid in range(1, switches + 1)}
+
+
+def rules_file(workdir, count, switches, fmt):
+    """Genera (o reutiliza) el archivo de reglas de la corrida."""
+    path = os.path.join(workdir, 'rules_%d_%d.%s' % (count, switches, fmt))
+    if os.path.exists(path):
+        return path
+    if fmt == 'bin':
+        source = rules_file(workdir, count, switches, 'jsonl')
+        subprocess.run([sys.executable, os.path.join(ROOT, 'controller', 'compiled_rules.py'),
+                        source, path], check=True, stdout=subprocess.DEVNULL)
+        return path
+    return write_rules(path, count, switches)
+
+
+def start_controller(rules_path, port, log_path):
+    """Levanta POX con el firewall (sin l2_learning) escuchando en port."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(ROOT, 'controller'),
+                                                      env.get('PYTHONPATH')]))
+    with open(log_path, 'w') as log:
+        return subprocess.Popen([sys.executable, './pox.py', 'log.level', '--WARNING',
+                                 'openflow.of_01', '--port=%d' % port,
+                                 'firewall', '--rules=%s' % rules_path],
+                                cwd=os.path.join(ROOT, 'pox'), env=env,
+                                stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_controller(proc):
+    proc.terminate()
+    try:
+        proc.wait(10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def spread(values):
+    return {'min': min(values) if values else None, 'p50': percentile(values, 0.5),
+            'p95': percentile(values, 0.95), 'max': max(values) if values else None}
+
+
+def bench(count, switches, fmt, workdir, timeout):
+    """Corre una combinación y devuelve las métricas (ver el docstring del módulo)."""
+    path = rules_file(workdir, count, switches, fmt)
+    port = free_port()
+    log_path = os.path.join(workdir, 'pox_%d_%d.log' % (count, switches))
+
+    start = time.monotonic()
+    proc = start_controller(path, port, log_path)
+    try:
+        while not listening(port):
+            if proc.poll() is not None or time.monotonic() - start > timeout:
+                with open(log_path) as f:
+                    raise RuntimeError("POX no quedó escuchando en el puerto %d:\n%s"
+                                       % (port, f.read()[-2000:]))
+            time.sleep(0.01)
+        load_seconds = time.monotonic() - start
+        load_cpu = cpu_seconds(proc.pid)
+
+        expected = rules_per_switch(count, switches)
+        emulated = asyncio.run(emulate(switches, port=port, expected_flows=expected,
+                                       timeout=timeout))
+        install_cpu = cpu_seconds(proc.pid) - load_cpu
+        peak_kb = peak_rss_kb(proc.pid)
+    finally:
+        stop_controller(proc)
+
+    summary = summarize(emulated, expected)
+    latencies = []
+    for switch in emulated:
+        installed = switch.policy_installed(expected)
+        if installed is not None and switch.features_sent is not None:
+            latencies.append(installed - switch.features_sent)
+
+    summary.update({
+        'rules': count,
+        'format': fmt,
+        'load_seconds': load_seconds,
+        'load_cpu_seconds': load_cpu,
+        'install_latency_seconds': spread(latencies),
+        'controller_cpu_seconds': install_cpu,
+        'peak_rss_mb': peak_kb / 1024 if peak_kb is not None else None,
+        'per_switch': [switch_report(switch, expected) for switch in emulated],
+    })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--switches', type=int, nargs='+', default=DEFAULT_SWITCHES,
+                        help='Cantidades de switches conectados a la vez')
+    parser.add_argument('--format', default='jsonl', choices=FORMATS, help='Formato del archivo de reglas')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='Segundos máximos de carga y de instalación por corrida')
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guarda los resultados en JSON')
+    args = parser.parse_args()
+
+    raise_file_limit()
+
+    def p50(value):
+        return '%.3f' % value['p50'] if value['p50'] is not None else '-'
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='fw_bench_') as workdir:
+        print("%9s %8s %8s %8s %10s %10s %10s %12s %8s %8s" %
+              ('reglas', 'switches', 'carga s', 'política', 'inst. p50', 'pol. p50',
+               'pol. todos', 'flow-mods/s', 'CPU s', 'RSS MB'))
+        for count in args.sizes:
+            for switches in args.switches:
+                r = bench(count, switches, args.format, workdir, args.timeout)
+                results.append(r)
+                print("%9d %8d %8.2f %8s %10s %10s %10s %12s %8.2f %8.1f" %
+                      (count, switches, r['load_seconds'],
+                       '%d/%d' % (r['policy_installed'], switches),
+                       p50(r['install_latency_seconds']), p50(r['time_to_policy_seconds']),
+                       '%.3f' % r['time_to_policy_all_seconds']
+                       if r['time_to_policy_all_seconds'] is not None else '-',
+                       '%.0f' % r['flow_mods_per_sec'] if r['flow_mods_per_sec'] else '-',
+                       r['controller_cpu_seconds'], r['peak_rss_mb'] or 0))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 0 if all(r['policy_installed'] == r['switches'] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark del parser DNS (dns.py).
+
+Parsea respuestas grandes (una pregunta, algunos registros A y cientos
+de registros adicionales) en modo completo y en modo lazy, y mide
+mensajes/segundo según lo que lee el consumidor:
+
+    header     solo id/qr (lo que mira un filtro por transacción)
+    qname      el nombre de la primera pregunta
+    all        todas las secciones y el nombre de cada registro
+
+Además compara, en modo lazy, construir un dns(raw=...) por mensaje
+contra dns.parse_batch() sobre la misma lista de mensajes.
+
+Requiere POX instalado en ./pox (ver install_pox.sh).
+
+Uso:
+    python3 benchmarks/bench_dns.py
+    python3 benchmarks/bench_dns.py --additional 50 500 2000 --json resultados.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dns_messages import load_dns_module, build_response
+
+DEFAULT_ADDITIONAL = [0, 100, 1000]
+DEFAULT_MESSAGES = 2000
+
+
+def read_header(msg):
+    return msg.id, msg.qr
+
+
+def read_qname(msg):
+    return msg.questions[0].name
+
+
+def read_all(msg):
+    for section in (msg.questions, msg.answers, msg.authorities, msg.additional):
+        for record in section:
+            record.name
+
+
+ACCESS = [('header', read_header), ('qname', read_qname), ('all', read_all)]
+
+
+def bench(dns, raw, lazy, access, count):
+    """Parsea count veces el mensaje y devuelve mensajes/segundo."""
+    start = time.perf_counter()
+    for _ in range(count):
+        access(dns(raw=raw, lazy=lazy))
+    return count / (time.perf_counter() - start)
+
+
+def bench_batch(dns, raw, access, count):
+    """Mensajes/segundo con parse_batch sobre count copias del mensaje."""
+    payloads = [raw] * count
+    start = time.perf_counter()
+    for msg in dns.parse_batch(payloads):
+        access(msg)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--additional', type=int, nargs='+', default=DEFAULT_ADDITIONAL,
+                        help='Cantidad de registros adicionales por respuesta')
+    parser.add_argument('--answers', type=int, default=10)
+    parser.add_argument('--messages', type=int, default=DEFAULT_MESSAGES)
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guarda los resultados en JSON')
+    args = parser.parse_args()
+
+    dns = load_dns_module().dns
+
+    results = []
+    print("%10s %8s %8s %14s %14s %9s" %
+          ('adicional', 'bytes', 'acceso', 'completo msg/s', 'lazy msg/s', 'speedup'))
+    for additional in args.additional:
+        raw = build_response(args.answers, additional)
+        count = max(20, args.messages * 100 // (100 + additional))
+        for name, access in ACCESS:
+            eager = bench(dns, raw, False, access, count)
+            lazy = bench(dns, raw, True, access, count)
+            results.append({'additional': additional, 'bytes': len(raw), 'access': name,
+                            'messages': count, 'eager_per_sec': eager, 'lazy_per_sec': lazy})
+            print("%10d %8d %8s %14.0f %14.0f %8.1fx" %
+                  (additional, len(raw), name, eager, lazy, lazy / eager))
+
+    print()
+    print("%10s %8s %14s %14s %9s" % ('adicional', 'acceso', 'lazy msg/s', 'batch msg/s', 'speedup'))
+    for additional in args.additional:
+        raw = build_response(args.answers, additional)
+        count = args.messages * 10
+        for name, access in ACCESS[:2]:
+            single = bench(dns, raw, True, access, count)
+            batch = bench_batch(dns, raw, access, count)
+            results.append({'additional': additional, 'bytes': len(raw), 'access': name,
+                            'messages': count, 'lazy_per_sec': single, 'batch_per_sec': batch})
+            print("%10d %8s %14.0f %14.0f %8.1fx" % (additional, name, single, batch, batch / single))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria del parser DNS (dns.py).
+
+Parsea respuestas hasta juntar --records registros (1M por defecto) y
+mantiene todos los mensajes vivos, como la tabla de consultas recientes
+de un firewall que mira DNS. Con tracemalloc mide la memoria retenida
+por mensaje y por registro en tres situaciones:
+
+    parsed     mensajes recién parseados (modo completo)
+    names      después de leer el nombre de cada registro
+    lazy       mensajes parseados en modo lazy sin acceder a las secciones
+
+Con --compare se mide además otra versión de dns.py (por ej. la de un
+commit anterior) para ver la diferencia.
+
+Requiere POX instalado en ./pox (ver install_pox.sh).
+
+Uso:
+    python3 benchmarks/bench_dns_memory.py
+    git show HEAD~1:dns.py > /tmp/dns_old.py
+    python3 benchmarks/bench_dns_memory.py --compare /tmp/dns_old.py --json resultados.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dns_messages import load_dns_module, build_response
+
+DEFAULT_RECORDS = 1000000
+RECORDS_PER_MESSAGE = 500
+
+
+def read_names(messages):
+    for msg in messages:
+        for section in (msg.questions, msg.answers, msg.authorities, msg.additional):
+            for record in section:
+                record.name
+
+
+def measure(dns, raw, count, lazy, read):
+    """Parsea count mensajes, los retiene y devuelve (bytes retenidos, segundos)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    messages = [dns(raw=raw, lazy=lazy) for _ in range(count)]
+    if read:
+        read_names(messages)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del messages
+    return retained, elapsed
+
+
+def bench(path, label, records):
+    dns = load_dns_module(path).dns
+    # 10 respuestas + adicionales, más la pregunta
+    raw = build_response(10, RECORDS_PER_MESSAGE - 11)
+    count = max(1, records // RECORDS_PER_MESSAGE)
+    results = []
+    for case, lazy, read in (('parsed', False, False), ('names', False, True),
+                             ('lazy', True, False)):
+        retained, elapsed = measure(dns, raw, count, lazy, read)
+        results.append({'dns': label, 'case': case, 'messages': count,
+                        'records': count * RECORDS_PER_MESSAGE, 'bytes': retained,
+                        'bytes_per_message': retained / count,
+                        'bytes_per_record': retained / (count * RECORDS_PER_MESSAGE),
+                        'seconds': elapsed})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=DEFAULT_RECORDS)
+    parser.add_argument('--compare', metavar='DNS_PY', help='Otro dns.py a medir')
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guarda los resultados en JSON')
+    args = parser.parse_args()
+
+    results = []
+    for path, label in ((None, 'repo'), (args.compare, args.compare)):
+        if label is None:
+            continue
+        results += bench(path, label, args.records)
+
+    print("%-20s %8s %9s %10s %12s %10s %8s" %
+          ('dns.py', 'caso', 'mensajes', 'registros', 'MB retenidos', 'B/registro', 'seg'))
+    for r in results:
+        print("%-20s %8s %9d %10d %12.1f %10.1f %8.2f" %
+              (r['dns'][-20:], r['case'], r['messages'], r['records'],
+               r['bytes'] / 1e6, r['bytes_per_record'], r['seconds']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
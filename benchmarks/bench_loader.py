@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark del cargador de reglas (controller/utils.py).
+
+Genera archivos sintéticos de 10k, 100k y 1M reglas en formato .json,
+.jsonl y compilado (.bin, ver controller/compiled_rules.py) y mide, para
+cada uno, reglas/segundo y pico de memoria (RSS). La carga incluye
+obtener las reglas de todos los switches (for_switch): con el formato
+compilado es lo que decodifica los registros, así que sin ese paso solo
+se mediría la apertura del mmap.
+Cada carga corre en un proceso aparte para que el pico de RSS no se
+contamine con las mediciones anteriores.
+
+No requiere POX: fuera de pox.py utils usa el logging estándar.
+
+Uso:
+    python3 benchmarks/bench_loader.py
+    python3 benchmarks/bench_loader.py --sizes 10000 100000 --formats jsonl
+    python3 benchmarks/bench_loader.py --json resultados.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from synthetic_rules import write_rules
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+DEFAULT_FORMATS = ['json', 'jsonl', 'bin']
+
+
+def run_child(path):
+    """Carga las reglas en este proceso e imprime los resultados como JSON."""
+    sys.path.insert(0, os.path.join(ROOT, 'controller'))
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    from utils import load_rule_set
+    
+    start = time.perf_counter()
+    # con raise_errors un archivo roto corta el benchmark en lugar de medir 0 reglas
+    rules = load_rule_set(raise_errors=True, path=path)
+    decoded = sum(len(rules.for_switch(switch_id)) for switch_id in rules.switch_counts())
+    elapsed = time.perf_counter() - start
+    
+    # ru_maxrss está en KB en Linux
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'loaded': decoded, 'seconds': elapsed, 'peak_rss_kb': peak_rss_kb}))
+
+
+def bench(size, fmt, workdir):
+    """Genera el archivo, lo carga en un subproceso y devuelve las métricas."""
+    path = os.path.join(workdir, 'rules_%d.%s' % (size, fmt))
+    if fmt == 'bin':
+        source = os.path.join(workdir, 'rules_%d.jsonl' % size)
+        if not os.path.exists(source):
+            write_rules(source, size)
+        subprocess.run([sys.executable, os.path.join(ROOT, 'controller', 'compiled_rules.py'), 
+                        source, path], check=True, stdout=subprocess.DEVNULL)
+    elif not os.path.exists(path):
+        write_rules(path, size)
+    
+    out = subprocess.run([sys.executable, __file__, '--child', path], 
+                         check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result.update({
+        'rules': size,
+        'format': fmt,
+        'file_mb': os.path.getsize(path) / 1e6,
+        'rules_per_sec': size / result['seconds'] if result['seconds'] else 0,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, 
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--formats', nargs='+', default=DEFAULT_FORMATS, choices=DEFAULT_FORMATS)
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guarda los resultados en JSON')
+    parser.add_argument('--child', metavar='ARCHIVO', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(args.child)
+        return
+    
+    results = []
+    with tempfile.TemporaryDirectory(prefix='fw_bench_') as workdir:
+        print("%10s %6s %9s %10s %12s %12s" % 
+              ('reglas', 'fmt', 'MB', 'segundos', 'reglas/s', 'pico RSS MB'))
+        for size in args.sizes:
+            for fmt in args.formats:
+                r = bench(size, fmt, workdir)
+                results.append(r)
+                print("%10d %6s %9.1f %10.2f %12.0f %12.1f" % 
+                      (size, fmt, r['file_mb'], r['seconds'], r['rules_per_sec'], 
+                       r['peak_rss_kb'] / 1024))
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark de construcción de las topologías de topology.py.
+
+Construye fat-tree, leaf-spine, anillo y grafo aleatorio de distintos
+tamaños (sin levantar Mininet: solo el grafo de Topo) y mide cuánto
+tarda cada uno, junto con la cantidad de switches, hosts y enlaces y la
+IP del último host.
+
+Requiere Mininet instalado (mininet.topo), pero no permisos de root.
+
+Uso:
+    python3 benchmarks/bench_topology.py
+    python3 benchmarks/bench_topology.py --json resultados.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from topology import topos
+
+CASES = [
+    ('fattree', {'k': 4}),
+    ('fattree', {'k': 16}),
+    ('leafspine', {'leaves': 32, 'spines': 4, 'hosts_per_switch': 32}),
+    ('ring', {'N': 100, 'hosts_per_switch': 10}),
+    ('random', {'N': 500, 'hosts_per_switch': 4}),
+]
+
+
+def bench(name, params):
+    """Construye una topología y devuelve sus métricas."""
+    start = time.perf_counter()
+    topo = topos[name](**params)
+    elapsed = time.perf_counter() - start
+    last = topo.host_list[-1]
+    return {'topology': name, 'params': params, 'seconds': elapsed,
+            'switches': len(topo.switch_list), 'hosts': len(topo.host_list),
+            'links': len(topo.links()), 'last_host': last,
+            'last_ip': topo.nodeInfo(last)['ip']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guarda los resultados en JSON')
+    args = parser.parse_args()
+
+    results = []
+    for name, params in CASES:
+        r = bench(name, params)
+        results.append(r)
+        print(f"  {name} {params}: {r['switches']} switches, {r['hosts']} hosts, "
+              f"{r['links']} enlaces, último host {r['last_host']} ({r['last_ip']}) "
+              f"en {r['seconds']:.2f} s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Mensajes DNS sintéticos para los benchmarks de dns.py.
+
+Los mensajes se arman a mano con struct (sin pasar por el serializador
+de dns.py) para que los benchmarks del parser no dependan de él.
+
+También carga el dns.py de la raíz del repositorio como
+pox.lib.packet.dns, de modo que se mide la versión del repositorio y no
+la copia instalada por install_pox.sh. Requiere POX instalado en ./pox.
+"""
+
+import importlib.util
+import os
+import struct
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TYPE_A = 1
+TYPE_CNAME = 5
+TYPE_SOA = 6
+TYPE_MX = 15
+TYPE_TXT = 16
+TYPE_SRV = 33
+TYPE_OPT = 41
+CLASS_IN = 1
+
+
+def load_dns_module(path=None):
+    """
+    Importa el dns.py del repositorio (u otro, por ej. de una versión
+    anterior para comparar) dentro del paquete pox.lib.packet.
+    """
+    sys.path.insert(0, os.path.join(ROOT, 'pox'))
+    import pox.lib.packet  # noqa: F401 (paquete de los imports relativos)
+
+    spec = importlib.util.spec_from_file_location('pox.lib.packet.dns',
+                                                  path or os.path.join(ROOT, 'dns.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['pox.lib.packet.dns'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def encode_name(name):
+    """Codifica un nombre sin compresión ("a.b" -> b"\\x01a\\x01b\\x00")."""
+    out = bytearray()
+    for label in name.split('.'):
+        out.append(len(label))
+        out += label.encode('ascii')
+    out.append(0)
+    return bytes(out)
+
+
+def build_response(answers=10, additional=500, qname='www.example.com', txid=0x1234):
+    """
+    Arma una respuesta con una pregunta, registros A en answers y
+    registros A de nombres distintos (comprimidos contra la pregunta)
+    en additional, como la de un servidor que adjunta muchos glue records.
+
+    Args:
+        answers (int): Registros A para qname (nombre como puntero a la pregunta)
+        additional (int): Registros A de "hostN.<dominio de qname>"
+        qname (str): Nombre consultado
+        txid (int): ID de la transacción
+
+    Returns:
+        bytes: Mensaje DNS
+    """
+    msg = bytearray(struct.pack('!HBBHHHH', txid, 0x81, 0x80, 1, answers, 0, additional))
+    msg += encode_name(qname)
+    msg += struct.pack('!HH', TYPE_A, CLASS_IN)
+
+    # puntero al dominio de qname (salteando la primera etiqueta)
+    domain_offset = 12 + 1 + len(qname.split('.', 1)[0])
+
+    for i in range(answers):
+        msg += b'\xc0\x0c'
+        msg += struct.pack('!HHIH', TYPE_A, CLASS_IN, 300, 4)
+        msg += struct.pack('!I', 0x0a000000 + i)
+
+    for i in range(additional):
+        label = ('host%d' % i).encode('ascii')
+        msg += bytes([len(label)]) + label
+        msg += struct.pack('!H', 0xc000 | domain_offset)
+        msg += struct.pack('!HHIH', TYPE_A, CLASS_IN, 300, 4)
+        msg += struct.pack('!I', 0xc0a80000 + i)
+
+    return bytes(msg)
+
+
+def build_query(qname='www.example.com', txid=0x1234):
+    """Arma una consulta A de una sola pregunta."""
+    return build_response(answers=0, additional=0, qname=qname, txid=txid)
+
+
+def build_records(qname='example.com'):
+    """
+    Arma una respuesta con un registro SOA, MX, TXT y SRV en answers y un
+    OPT (EDNS0) en additional; los nombres del RDATA de SOA y MX apuntan
+    a la pregunta.
+
+    Returns:
+        bytes: Mensaje DNS
+    """
+    msg = bytearray(struct.pack('!HBBHHHH', 0x1234, 0x81, 0x80, 1, 4, 0, 1))
+    msg += encode_name(qname)
+    msg += struct.pack('!HH', TYPE_SOA, CLASS_IN)
+
+    def record(rtype, rdata, rclass=CLASS_IN, ttl=300, name=b'\xc0\x0c'):
+        msg.extend(name + struct.pack('!HHIH', rtype, rclass, ttl, len(rdata)) + rdata)
+
+    label = b'\x02ns\xc0\x0c'
+    record(TYPE_SOA, label + b'\x05admin\xc0\x0c' + struct.pack('!IIIII', 1, 3600, 600, 86400, 60))
+    record(TYPE_MX, struct.pack('!H', 10) + b'\x04mail\xc0\x0c')
+    record(TYPE_TXT, b'\x0bv=spf1 -all\x05hello')
+    record(TYPE_SRV, struct.pack('!HHH', 1, 5, 5060) + encode_name('sip.' + qname))
+    record(TYPE_OPT, struct.pack('!HH', 10, 8) + b'12345678', rclass=1232, ttl=0x8000, name=b'\x00')
+    return bytes(msg)
+
+
+def build_pointer_chain(depth, qname='www.example.com'):
+    """
+    Arma una respuesta en la que el nombre de cada registro es un puntero
+    al nombre del registro anterior: decodificar el último requiere
+    seguir depth punteros.
+
+    Returns:
+        bytes: Mensaje DNS con depth registros A
+    """
+    msg = bytearray(struct.pack('!HBBHHHH', 0x1234, 0x81, 0x80, 1, depth, 0, 0))
+    msg += encode_name(qname)
+    msg += struct.pack('!HH', TYPE_A, CLASS_IN)
+
+    previous = 12
+    for i in range(depth):
+        offset = len(msg)
+        msg += struct.pack('!H', 0xc000 | previous)
+        msg += struct.pack('!HHIH', TYPE_A, CLASS_IN, 300, 4)
+        msg += struct.pack('!I', 0x0a000000 + i)
+        previous = offset
+    return bytes(msg)
+
+
+def build_pointer_loop():
+    """Consulta cuyo nombre es un puntero a sí mismo (mensaje malicioso)."""
+    msg = struct.pack('!HBBHHHH', 0x1234, 0x01, 0x00, 1, 0, 0, 0)
+    return msg + struct.pack('!H', 0xc000 | 12) + struct.pack('!HH', TYPE_A, CLASS_IN)
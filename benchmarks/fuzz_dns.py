@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Fuzzing y benchmark de la decodificación de nombres DNS (dns.py).
+
+fuzz   Muta mensajes válidos (bits invertidos, bytes al azar, punteros de
+       compresión inyectados, truncamiento), los parsea, los convierte a
+       texto y lee todos los nombres y el RDATA (SOA, MX, TXT, SRV, OPT).
+       El parser solo puede rechazar el mensaje (parsed = False); str()
+       de un mensaje parseado nunca puede fallar (muestra lo que no se
+       puede decodificar como <malformed: ...>), y leer un nombre o un
+       campo del RDATA solo puede levantar TruncatedException o
+       DNSNameError. Cualquier otra excepción (por ej. RecursionError o
+       una excepción de str()) es un error y termina con código 1.
+       Informa además el peor tiempo por mensaje.
+
+bench  Mide nombres/segundo al decodificar cadenas de punteros de distinta
+       profundidad y mensajes/segundo con un puntero a sí mismo.
+
+Requiere POX instalado en ./pox (ver install_pox.sh).
+
+Uso:
+    python3 benchmarks/fuzz_dns.py fuzz --iterations 100000 --seed 1
+    python3 benchmarks/fuzz_dns.py bench --json resultados.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dns_messages import (load_dns_module, build_response, build_query, build_records,
+                          build_pointer_chain, build_pointer_loop)
+
+CHAIN_DEPTHS = [1, 10, 100, 127, 1000]
+
+
+def read_names(dns, msg):
+    """Lee todos los nombres del mensaje y los campos del rddata de cada registro."""
+    for section in (msg.questions, msg.answers, msg.authorities, msg.additional):
+        for record in section:
+            record.name
+            rddata = getattr(record, 'rddata', None)
+            if isinstance(rddata, dns._rdata):
+                rddata._values()
+
+
+def mutate(rng, raw):
+    """Aplica entre 1 y 4 mutaciones al mensaje."""
+    data = bytearray(raw)
+    for _ in range(rng.randint(1, 4)):
+        kind = rng.randrange(4)
+        pos = rng.randrange(len(data))
+        if kind == 0:
+            data[pos] ^= 1 << rng.randrange(8)
+        elif kind == 1:
+            data[pos] = rng.randrange(256)
+        elif kind == 2 and pos + 1 < len(data):
+            # puntero de compresión a cualquier lugar del mensaje
+            struct.pack_into('!H', data, pos, 0xc000 | rng.randrange(len(data)))
+        elif len(data) > 12:
+            del data[rng.randrange(12, len(data)):]
+    return bytes(data)
+
+
+def fuzz(dns_module, iterations, seed):
+    dns = dns_module.dns
+    expected = (dns_module.Trunc, dns_module.DNSNameError)
+    seeds = [build_query(), build_response(3, 5), build_response(20, 50), build_records(),
+             build_pointer_chain(20), build_pointer_loop()]
+
+    rng = random.Random(seed)
+    outcomes = {'parsed': 0, 'rejected': 0, 'name_errors': 0}
+    worst = 0.0
+    for i in range(iterations):
+        raw = mutate(rng, rng.choice(seeds))
+        start = time.perf_counter()
+        try:
+            msg = dns(raw=raw)
+            if not msg.parsed:
+                outcomes['rejected'] += 1
+                continue
+            str(msg)
+            try:
+                read_names(dns, msg)
+                outcomes['parsed'] += 1
+            except expected:
+                outcomes['name_errors'] += 1
+        except Exception as e:
+            print("Iteración %d: %s: %s" % (i, type(e).__name__, e))
+            print("Mensaje: %s" % raw.hex())
+            return None
+        finally:
+            worst = max(worst, time.perf_counter() - start)
+
+    outcomes['iterations'] = iterations
+    outcomes['worst_ms'] = worst * 1000
+    return outcomes
+
+
+def bench(dns_module):
+    dns = dns_module.dns
+    read = dns.read_dns_name_from_index
+    results = []
+
+    for depth in CHAIN_DEPTHS:
+        raw = memoryview(build_pointer_chain(depth))
+        # el nombre del último registro está 16 bytes antes del final
+        offset = len(raw) - 16
+        count = 20000
+        start = time.perf_counter()
+        error = None
+        for _ in range(count):
+            try:
+                read(raw, offset)
+            except dns_module.DNSNameError as e:
+                error = str(e)
+        elapsed = time.perf_counter() - start
+        results.append({'case': 'chain', 'hops': depth, 'names_per_sec': count / elapsed,
+                        'error': error})
+
+    raw = build_pointer_loop()
+    count = 20000
+    start = time.perf_counter()
+    for _ in range(count):
+        dns(raw=raw).parsed
+    elapsed = time.perf_counter() - start
+    results.append({'case': 'loop', 'messages_per_sec': count / elapsed})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', choices=['fuzz', 'bench'])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guarda los resultados en JSON')
+    args = parser.parse_args()
+
+    dns_module = load_dns_module()
+
+    if args.mode == 'fuzz':
+        # los mensajes mutados generan un log por mensaje rechazado
+        logging.disable(logging.ERROR)
+        results = fuzz(dns_module, args.iterations, args.seed)
+        if results is None:
+            return 1
+        print("%(iterations)d mensajes: %(parsed)d parseados, %(rejected)d rechazados, "
+              "%(name_errors)d con nombres inválidos; peor tiempo %(worst_ms).2f ms" % results)
+    else:
+        results = bench(dns_module)
+        for r in results:
+            if r['case'] == 'chain':
+                print("cadena de %4d punteros: %10.0f nombres/s%s" %
+                      (r['hops'], r['names_per_sec'],
+                       "  (rechazado: %s)" % r['error'] if r['error'] else ""))
+            else:
+                print("puntero a sí mismo:     %10.0f mensajes/s" % r['messages_per_sec'])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Emulador de switches OpenFlow 1.0 para pruebas de escala del controlador.
+
+Abre cientos o miles de conexiones TCP concurrentes (asyncio) contra el
+controlador POX, sin Mininet, Open vSwitch ni root. Cada switch emulado:
+
+  - completa el handshake (HELLO, FEATURES_REPLY con dpid y puertos)
+  - responde ECHO, BARRIER y GET_CONFIG
+  - registra cada flow-mod recibido y mantiene una tabla de flujos
+    (ADD/MODIFY reemplazan por match y prioridad; DELETE con el match
+    todo comodín vacía la tabla; cualquier otro DELETE borra las
+    entradas con el mismo match, y DELETE_STRICT además la prioridad)
+  - responde los stats requests: flow stats con las entradas de su tabla
+    (contadores en 0), aggregate, description, y el resto vacíos
+
+Los dpid son 1..N, como los switches s1..sN de topology.py, de modo que
+las reglas de controller/firewall_rules.json aplican a los switches
+emulados. No requiere POX (solo el controlador corriendo).
+
+Uso:
+    python3 benchmarks/switch_emulator.py --switches 1000
+    python3 benchmarks/switch_emulator.py --switches 200 --rate 50 --expected-flows 3 --json resultados.json
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import struct
+import sys
+import time
+
+OFP_VERSION = 0x01
+
+# Tipos de mensaje de OpenFlow 1.0
+OFPT_HELLO = 0
+OFPT_ERROR = 1
+OFPT_ECHO_REQUEST = 2
+OFPT_ECHO_REPLY = 3
+OFPT_FEATURES_REQUEST = 5
+OFPT_FEATURES_REPLY = 6
+OFPT_GET_CONFIG_REQUEST = 7
+OFPT_GET_CONFIG_REPLY = 8
+OFPT_SET_CONFIG = 9
+OFPT_PACKET_IN = 10
+OFPT_PACKET_OUT = 13
+OFPT_FLOW_MOD = 14
+OFPT_STATS_REQUEST = 16
+OFPT_STATS_REPLY = 17
+OFPT_BARRIER_REQUEST = 18
+OFPT_BARRIER_REPLY = 19
+
+OFPFC_ADD = 0
+OFPFC_MODIFY = 1
+OFPFC_MODIFY_STRICT = 2
+OFPFC_DELETE = 3
+OFPFC_DELETE_STRICT = 4
+
+OFPST_DESC = 0
+OFPST_FLOW = 1
+OFPST_AGGREGATE = 2
+OFPSF_REPLY_MORE = 1
+
+OFPFW_ALL = (1 << 22) - 1
+
+HEADER = struct.Struct('!BBHI')
+FEATURES = struct.Struct('!QIB3xII')
+PHY_PORT = struct.Struct('!H6s16sIIIIII')
+MATCH_SIZE = 40
+# cookie, command, idle_timeout, hard_timeout, priority, buffer_id, out_port, flags
+FLOW_MOD = struct.Struct('!QHHHHIHH')
+STATS_HEADER = struct.Struct('!HH')
+# length, table_id, match, duration s/ns, priority, idle, hard, cookie, packets, bytes
+FLOW_STATS = struct.Struct('!HBx40sIIHHH6xQQQ')
+AGGREGATE = struct.Struct('!QQI4x')
+CONFIG = struct.Struct('!HH')
+
+# Máximo de un mensaje OpenFlow (el campo length es de 16 bits)
+MAX_MESSAGE = 0xffff
+
+DEFAULT_PORT = 6633
+DEFAULT_PORTS_PER_SWITCH = 4
+DEFAULT_SETTLE = 2.0
+DEFAULT_TIMEOUT = 120.0
+
+
+def message(msg_type, xid, body=b''):
+    """Mensaje OpenFlow 1.0 con su header."""
+    return HEADER.pack(OFP_VERSION, msg_type, HEADER.size + len(body), xid) + body
+
+
+class EmulatedSwitch:
+    """
+    Un switch emulado y lo que registró de su conexión.
+
+    Los tiempos son de time.monotonic() (None si el evento no ocurrió).
+
+    Atributos:
+        dpid: Datapath ID
+        connect_started: Inicio del intento de conexión
+        connected: Conexión TCP establecida
+        features_sent: FEATURES_REPLY enviado (handshake del switch completo)
+        first_flow_mod, last_flow_mod: Primer y último flow-mod recibidos
+        flow_mods: Cantidad de flow-mods recibidos
+        installs: Cantidad de flow-mods ADD/MODIFY recibidos
+        flows: Tabla de flujos, (match, prioridad) -> (cookie, prioridad, timeouts, acciones)
+        barriers: Lista de (tiempo, installs hasta ese momento)
+        error: Error de conexión, si lo hubo
+    """
+
+    def __init__(self, dpid, ports=DEFAULT_PORTS_PER_SWITCH):
+        self.dpid = dpid
+        self.ports = ports
+        self.connect_started = None
+        self.connected = None
+        self.features_sent = None
+        self.first_flow_mod = None
+        self.last_flow_mod = None
+        self.flow_mods = 0
+        self.installs = 0
+        self.flows = {}
+        self.barriers = []
+        self.error = None
+        self.closed = False
+        self.writer = None
+
+    def policy_installed(self, expected_flows=None):
+        """
+        Momento en que quedó instalada la política: el primer barrier
+        recibido después de al menos expected_flows flow-mods ADD/MODIFY
+        (un número, o un dict dpid -> número), o si no se indica, el último
+        barrier que siguió a alguno. Los DELETE (como el que manda POX al
+        conectarse un switch) no cuentan.
+        """
+        if isinstance(expected_flows, dict):
+            expected_flows = expected_flows.get(self.dpid, 0)
+        if expected_flows is not None:
+            for at, flow_mods in self.barriers:
+                if flow_mods >= expected_flows:
+                    return at
+            return None
+        installed = None
+        for at, flow_mods in self.barriers:
+            if flow_mods:
+                installed = at
+        return installed
+
+    async def run(self, host, port):
+        """Conecta con el controlador y atiende la conexión hasta que se cierre."""
+        self.connect_started = time.monotonic()
+        try:
+            reader, self.writer = await asyncio.open_connection(host, port)
+        except OSError as e:
+            self.error = str(e)
+            return
+        self.connected = time.monotonic()
+        self.writer.write(message(OFPT_HELLO, 0))
+        try:
+            while True:
+                header = await reader.readexactly(HEADER.size)
+                version, msg_type, length, xid = HEADER.unpack(header)
+                body = await reader.readexactly(length - HEADER.size)
+                self.handle(msg_type, xid, body)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            if not self.closed:
+                self.error = str(e) or 'conexión cerrada por el controlador'
+        finally:
+            self.writer.close()
+
+    def close(self):
+        self.closed = True
+        if self.writer is not None:
+            self.writer.close()
+
+    def handle(self, msg_type, xid, body):
+        send = self.writer.write
+        if msg_type == OFPT_FLOW_MOD:
+            self.flow_mod(body)
+        elif msg_type == OFPT_BARRIER_REQUEST:
+            self.barriers.append((time.monotonic(), self.installs))
+            send(message(OFPT_BARRIER_REPLY, xid))
+        elif msg_type == OFPT_ECHO_REQUEST:
+            send(message(OFPT_ECHO_REPLY, xid, body))
+        elif msg_type == OFPT_FEATURES_REQUEST:
+            send(message(OFPT_FEATURES_REPLY, xid, self.features()))
+            self.features_sent = time.monotonic()
+        elif msg_type == OFPT_GET_CONFIG_REQUEST:
+            send(message(OFPT_GET_CONFIG_REPLY, xid, CONFIG.pack(0, 128)))
+        elif msg_type == OFPT_STATS_REQUEST:
+            for reply in self.stats(xid, body):
+                send(reply)
+        # HELLO, SET_CONFIG, PACKET_OUT, ERROR, etc.: nada que responder
+
+    def features(self):
+        ports = b''.join(
+            PHY_PORT.pack(i, struct.pack('!HI', self.dpid & 0xffff, i),
+                          ('s%d-eth%d' % (self.dpid, i)).encode('ascii'), 0, 0, 0, 0, 0, 0)
+            for i in range(1, self.ports + 1))
+        # n_buffers 0 (sin buffering), 1 tabla, sin capabilities, acciones 0..11
+        return FEATURES.pack(self.dpid, 0, 1, 0, 0xfff) + ports
+
+    def flow_mod(self, body):
+        now = time.monotonic()
+        if self.first_flow_mod is None:
+            self.first_flow_mod = now
+        self.last_flow_mod = now
+        self.flow_mods += 1
+
+        match = body[:MATCH_SIZE]
+        (cookie, command, idle_timeout, hard_timeout, priority,
+         buffer_id, out_port, flags) = FLOW_MOD.unpack_from(body, MATCH_SIZE)
+        actions = body[MATCH_SIZE + FLOW_MOD.size:]
+
+        if command in (OFPFC_ADD, OFPFC_MODIFY, OFPFC_MODIFY_STRICT):
+            self.installs += 1
+            self.flows[match, priority] = (cookie, priority, idle_timeout, hard_timeout, actions)
+        elif command == OFPFC_DELETE_STRICT:
+            self.flows.pop((match, priority), None)
+        elif command == OFPFC_DELETE:
+            if struct.unpack_from('!I', match)[0] & OFPFW_ALL == OFPFW_ALL:
+                self.flows.clear()
+            else:
+                for key in [key for key in self.flows if key[0] == match]:
+                    del self.flows[key]
+
+    def stats(self, xid, body):
+        """Respuestas (una o más, con REPLY_MORE) a un stats request."""
+        stats_type, _ = STATS_HEADER.unpack_from(body)
+        if stats_type == OFPST_FLOW:
+            entries = [FLOW_STATS.pack(FLOW_STATS.size + len(actions), 0, match, 0, 0, priority,
+                                       idle_timeout, hard_timeout, cookie, 0, 0) + actions
+                       for (match, _), (cookie, priority, idle_timeout, hard_timeout, actions)
+                       in self.flows.items()]
+        elif stats_type == OFPST_AGGREGATE:
+            entries = [AGGREGATE.pack(0, 0, len(self.flows))]
+        elif stats_type == OFPST_DESC:
+            entries = [b'emulador'.ljust(256, b'\0') + b'switch_emulator.py'.ljust(256, b'\0') +
+                       b''.ljust(256, b'\0') + str(self.dpid).encode('ascii').ljust(32, b'\0') +
+                       ('s%d' % self.dpid).encode('ascii').ljust(256, b'\0')]
+        else:
+            entries = []
+
+        # partir la respuesta para no pasar el máximo de un mensaje
+        limit = MAX_MESSAGE - HEADER.size - STATS_HEADER.size
+        chunks = [[]]
+        size = 0
+        for entry in entries:
+            if size + len(entry) > limit and chunks[-1]:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(entry)
+            size += len(entry)
+        return [message(OFPT_STATS_REPLY, xid,
+                        STATS_HEADER.pack(stats_type, OFPSF_REPLY_MORE if i < len(chunks) - 1 else 0)
+                        + b''.join(chunk))
+                for i, chunk in enumerate(chunks)]
+
+
+def raise_file_limit():
+    """Sube el límite de descriptores abiertos al máximo permitido."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def emulate(count, host='127.0.0.1', port=DEFAULT_PORT, rate=None, ports=DEFAULT_PORTS_PER_SWITCH,
+                  expected_flows=None, settle=DEFAULT_SETTLE, timeout=DEFAULT_TIMEOUT, first_dpid=1):
+    """
+    Conecta count switches emulados y espera a que reciban la política.
+
+    Args:
+        count (int): Cantidad de switches (dpid first_dpid..first_dpid+count-1)
+        host, port: Dirección del controlador
+        rate (float): Conexiones por segundo; None conecta todos a la vez
+        ports (int): Puertos por switch anunciados en FEATURES_REPLY
+        expected_flows (int): Flow-mods ADD/MODIFY que debe recibir cada
+            switch (o dict dpid -> cantidad); si es None se espera a que
+            pasen settle segundos sin flow-mods nuevos
+        settle (float): Segundos sin flow-mods para dar la carga por terminada
+        timeout (float): Tiempo máximo de espera
+
+    Returns:
+        list: EmulatedSwitch, con las conexiones ya cerradas
+    """
+    switches = [EmulatedSwitch(dpid, ports) for dpid in range(first_dpid, first_dpid + count)]
+    tasks = []
+    start = time.monotonic()
+    for i, switch in enumerate(switches):
+        if rate:
+            delay = start + i / rate - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(switch.run(host, port)))
+
+    deadline = start + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        if all(switch.error for switch in switches):
+            break
+        if expected_flows is not None:
+            if all(switch.error or switch.policy_installed(expected_flows) for switch in switches):
+                break
+        else:
+            last = max((switch.last_flow_mod or switch.connected or 0) for switch in switches)
+            if (all(switch.error or switch.features_sent for switch in switches)
+                    and time.monotonic() - last >= settle):
+                break
+
+    for switch in switches:
+        switch.close()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return switches
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(switches, expected_flows=None):
+    """
+    Métricas agregadas de una emulación (tiempos en segundos).
+
+    Returns:
+        dict: connect/handshake/policy (min, p50, p95, max), flow-mods y
+              flow-mods/segundo desde el primer intento de conexión
+    """
+    start = min(switch.connect_started for switch in switches)
+
+    def spread(values):
+        return {'min': min(values) if values else None, 'p50': percentile(values, 0.5),
+                'p95': percentile(values, 0.95), 'max': max(values) if values else None}
+
+    connect = [s.connected - s.connect_started for s in switches if s.connected]
+    handshake = [s.features_sent - s.connect_started for s in switches if s.features_sent]
+    installed = [(s, s.policy_installed(expected_flows)) for s in switches]
+    policy = [at - s.connect_started for s, at in installed if at is not None]
+    flow_mods = sum(s.flow_mods for s in switches)
+    last = max((s.last_flow_mod for s in switches if s.last_flow_mod), default=None)
+    return {
+        'switches': len(switches),
+        'connected': len(connect),
+        'errors': sum(1 for s in switches if s.error),
+        'policy_installed': len(policy),
+        'connect_seconds': spread(connect),
+        'handshake_seconds': spread(handshake),
+        'time_to_policy_seconds': spread(policy),
+        'time_to_policy_all_seconds': (max(at for _, at in installed if at is not None) - start
+                                       if policy else None),
+        'flow_mods': flow_mods,
+        'flows': sum(len(s.flows) for s in switches),
+        'flow_mods_per_sec': flow_mods / (last - start) if last and last > start else None,
+    }
+
+
+def switch_report(switch, expected_flows=None):
+    """Detalle de un switch para el JSON (tiempos relativos al inicio de su conexión)."""
+    def since(at):
+        return at - switch.connect_started if at is not None else None
+    return {
+        'dpid': switch.dpid,
+        'connect': since(switch.connected),
+        'handshake': since(switch.features_sent),
+        'first_flow_mod': since(switch.first_flow_mod),
+        'last_flow_mod': since(switch.last_flow_mod),
+        'policy_installed': since(switch.policy_installed(expected_flows)),
+        'flow_mods': switch.flow_mods,
+        'flows': len(switch.flows),
+        'barriers': len(switch.barriers),
+        'error': switch.error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--switches', type=int, default=100)
+    parser.add_argument('--controller', default='127.0.0.1:%d' % DEFAULT_PORT, metavar='HOST:PUERTO')
+    parser.add_argument('--rate', type=float, help='Conexiones por segundo (default: todas a la vez)')
+    parser.add_argument('--ports', type=int, default=DEFAULT_PORTS_PER_SWITCH, help='Puertos por switch')
+    parser.add_argument('--expected-flows', type=int, help='Flow-mods esperados por switch')
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument('--json', metavar='ARCHIVO', help='Guarda resumen y detalle por switch en JSON')
+    args = parser.parse_args()
+
+    host, port = args.controller.rsplit(':', 1)
+    raise_file_limit()
+    switches = asyncio.run(emulate(args.switches, host, int(port), args.rate, args.ports,
+                                   args.expected_flows, args.settle, args.timeout))
+    summary = summarize(switches, args.expected_flows)
+
+    def fmt(spread):
+        if spread['p50'] is None:
+            return '-'
+        return 'p50 %.3f s  p95 %.3f s  max %.3f s' % (spread['p50'], spread['p95'], spread['max'])
+
+    print("Switches:         %d (%d conectados, %d con error)" %
+          (summary['switches'], summary['connected'], summary['errors']))
+    print("Conexión:         %s" % fmt(summary['connect_seconds']))
+    print("Handshake:        %s" % fmt(summary['handshake_seconds']))
+    print("Política:         %s (%d switches)" %
+          (fmt(summary['time_to_policy_seconds']), summary['policy_installed']))
+    print("Flow-mods:        %d (%s/s), %d flujos en las tablas" %
+          (summary['flow_mods'], '%.0f' % summary['flow_mods_per_sec']
+           if summary['flow_mods_per_sec'] else '-', summary['flows']))
+    errors = [s for s in switches if s.error]
+    if errors:
+        print("Primer error:     s%d: %s" % (errors[0].dpid, errors[0].error))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'summary': summary,
+                       'switches': [switch_report(s, args.expected_flows) for s in switches]},
+                      f, indent=2)
+
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Generación de archivos de reglas sintéticos para los benchmarks.
+
+Las reglas se generan de forma determinística (semilla fija) y son todas
+distintas entre sí, para que la compactación no las reduzca y el
+benchmark mida el costo de cargar e instalar N reglas reales.
+"""
+
+import json
+import random
+
+
+def generate_rules(count, switches=1, seed=0):
+    """
+    Genera reglas de bloqueo válidas y distintas entre sí.
+    
+    Args:
+        count (int): Cantidad de reglas
+        switches (int): Las reglas se reparten entre los switches 1..switches
+        seed (int): Semilla del generador
+    
+    Yields:
+        dict: Regla en el formato de firewall_rules.json
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        src = 0x0a000000 | (i & 0xffffff)
+        rule = {
+            "description": "Regla sintética %d" % i,
+            "src_ip": "%d.%d.%d.%d" % (src >> 24, (src >> 16) & 0xff, (src >> 8) & 0xff, src & 0xff),
+            "dst_ip": "10.%d.%d.%d" % (rng.randrange(256), rng.randrange(256), rng.randrange(1, 255)),
+            "switch": 1 + i % switches,
+        }
+        if i % 3:
+            rule["protocol"] = "TCP" if i % 3 == 1 else "UDP"
+            rule["dst_port"] = rng.randrange(1, 65536)
+        yield rule
+
+
+def write_rules(path, count, switches=1, seed=0):
+    """
+    Escribe un archivo de reglas sintético.
+    
+    El formato se elige por la extensión: .jsonl escribe una regla por
+    línea y cualquier otra extensión escribe {"rules": [...]}.
+    
+    Returns:
+        str: La ruta escrita
+    """
+    rules = generate_rules(count, switches, seed)
+    with open(path, 'w') as f:
+        if path.endswith('.jsonl'):
+            for rule in rules:
+                f.write(json.dumps(rule))
+                f.write('\n')
+        else:
+            json.dump({"rules": list(rules)}, f)
+    return path
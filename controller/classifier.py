@@ -0,0 +1,191 @@
+"""
+Clasificación de paquetes contra las reglas del firewall en el controlador
+
+Permite responder "¿qué regla aplica a este paquete en este switch?" sin
+recorrer todas las reglas. Las reglas se agrupan por forma (qué campos
+definen y con qué largo de prefijo, igual que en la compactación de
+utils.py) y cada forma es una tabla hash indexada por los campos del
+paquete enmascarados con esa forma. Una búsqueda cuesta entonces una
+consulta a diccionario por forma presente, sin importar cuántas reglas
+hay, y las formas se recorren de mayor a menor prioridad para cortar
+apenas ninguna forma restante puede mejorar el resultado.
+
+No depende de OpenFlow: los paquetes se describen con sus campos en
+enteros (ver FirewallRule.matches y packet_tuple).
+"""
+
+import socket
+import struct
+
+from compiled_rules import PROTOCOL_MAP, IP_TYPE
+
+
+def _prefix_mask(prefix_len):
+    return (0xffffffff << (32 - prefix_len)) & 0xffffffff if prefix_len else 0
+
+
+def packet_tuple(src_ip, dst_ip, protocol=None, src_port=None, dst_port=None):
+    """
+    Convierte un 5-tupla en texto a los campos que recibe Classifier.lookup.
+
+    Args:
+        src_ip, dst_ip (str): IPs en formato "a.b.c.d"
+        protocol: "TCP", "UDP", "ICMP" o número de protocolo (opcional)
+        src_port, dst_port (int): Puertos TCP/UDP (opcionales)
+
+    Returns:
+        tuple: (dl_type, src, dst, nw_proto, src_port, dst_port)
+    """
+    if isinstance(protocol, str):
+        protocol = PROTOCOL_MAP[protocol.upper()]
+    src = struct.unpack('!I', socket.inet_aton(src_ip))[0]
+    dst = struct.unpack('!I', socket.inet_aton(dst_ip))[0]
+    return (IP_TYPE, src, dst, protocol, src_port, dst_port)
+
+
+class _ShapeTable(object):
+    """Reglas con una misma forma, indexadas por sus campos de matching."""
+
+    __slots__ = ('dl_type', 'src_mask', 'dst_mask', 'nw_proto', 'src_port', 'dst_port',
+                 'rules', 'max_priority')
+
+    def __init__(self, shape):
+        (self.dl_type, src_len, dst_len,
+         self.nw_proto, self.src_port, self.dst_port) = shape
+        self.src_mask = _prefix_mask(src_len)
+        self.dst_mask = _prefix_mask(dst_len)
+        # campos enmascarados -> regla de mayor prioridad con ese match
+        self.rules = {}
+        self.max_priority = -1
+
+
+class Classifier(object):
+    """
+    Tabla de reglas de un switch para clasificar paquetes.
+
+    lookup() devuelve la regla de mayor prioridad que matchea el paquete,
+    con el mismo criterio que usa el switch para elegir entre flows. Entre
+    reglas con la misma prioridad se queda con la primera (OpenFlow no
+    define cuál aplica; utils.compact_rules las informa como conflicto).
+    """
+
+    def __init__(self, rules):
+        """
+        Args:
+            rules (iterable): FirewallRule de un mismo switch
+        """
+        tables = {}
+        count = 0
+        for rule in rules:
+            count += 1
+            shape = (rule.dl_type is not None, rule.src_len, rule.dst_len,
+                     rule.nw_proto is not None, rule.src_port is not None,
+                     rule.dst_port is not None)
+            table = tables.get(shape)
+            if table is None:
+                table = tables[shape] = _ShapeTable(shape)
+
+            fields = (rule.dl_type, rule.src_net, rule.dst_net,
+                      rule.nw_proto, rule.src_port, rule.dst_port)
+            current = table.rules.get(fields)
+            if current is None or rule.priority > current.priority:
+                table.rules[fields] = rule
+            if rule.priority > table.max_priority:
+                table.max_priority = rule.priority
+
+        self._tables = sorted(tables.values(), key=lambda t: t.max_priority, reverse=True)
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def shapes(self):
+        """Cantidad de formas distintas (consultas a diccionario por búsqueda)."""
+        return len(self._tables)
+
+    def lookup(self, dl_type, src, dst, nw_proto, src_port=None, dst_port=None):
+        """
+        Busca la regla que aplica a un paquete.
+
+        Args:
+            dl_type (int): Tipo Ethernet del paquete
+            src, dst (int): IPs origen y destino como enteros (None si no es IP)
+            nw_proto (int): Protocolo IP (None si no es IP)
+            src_port, dst_port (int): Puertos TCP/UDP (None si no aplica)
+
+        Returns:
+            FirewallRule: La regla de mayor prioridad que matchea, o None
+        """
+        best = None
+        for table in self._tables:
+            if best is not None and table.max_priority <= best.priority:
+                break
+            if table.src_mask or table.dst_mask:
+                if src is None:
+                    continue
+                src_net = src & table.src_mask
+                dst_net = dst & table.dst_mask
+            else:
+                src_net = dst_net = 0
+
+            rule = table.rules.get((
+                dl_type if table.dl_type else None,
+                src_net,
+                dst_net,
+                nw_proto if table.nw_proto else None,
+                src_port if table.src_port else None,
+                dst_port if table.dst_port else None,
+            ))
+            if rule is not None and (best is None or rule.priority > best.priority):
+                best = rule
+        return best
+
+    def depends_on_ports(self, dl_type, src, dst, nw_proto, priority):
+        """
+        Indica si hay reglas con puertos que podrían cambiar el resultado
+        de un paquete cuyos puertos se desconocen.
+
+        Es el caso de un paquete TCP/UDP sin header de transporte parseado:
+        lookup() solo puede matchearlo con reglas sin puertos, pero una
+        regla con puertos de mayor prioridad sobre los mismos prefijos
+        podría aplicarle. Recorre las reglas de esas formas, así que es
+        más costosa que lookup().
+
+        Args:
+            dl_type, src, dst, nw_proto: Ver lookup
+            priority (int): Prioridad de la regla que devolvió lookup
+
+        Returns:
+            bool: True si alguna regla con puertos y mayor prioridad
+                matchea el resto de los campos del paquete
+        """
+        for table in self._tables:
+            if not (table.src_port or table.dst_port) or table.max_priority <= priority:
+                continue
+            if src is None and (table.src_mask or table.dst_mask):
+                continue
+            for (rule_dl_type, src_net, dst_net, rule_proto, _, _), rule in table.rules.items():
+                if (rule.priority > priority and
+                        (rule_dl_type is None or rule_dl_type == dl_type) and
+                        (rule_proto is None or rule_proto == nw_proto) and
+                        (not table.src_mask or src & table.src_mask == src_net) and
+                        (not table.dst_mask or dst & table.dst_mask == dst_net)):
+                    return True
+        return False
+
+
+def linear_lookup(rules, dl_type, src, dst, nw_proto, src_port=None, dst_port=None):
+    """
+    Clasificación por recorrido lineal de las reglas (referencia para
+    verificar y comparar contra Classifier).
+
+    Returns:
+        FirewallRule: La primera regla de mayor prioridad que matchea, o None
+    """
+    best = None
+    for rule in rules:
+        if (best is None or rule.priority > best.priority) and \
+                rule.matches(dl_type, src, dst, nw_proto, src_port, dst_port):
+            best = rule
+    return best
@@ -0,0 +1,429 @@
+"""
+Representación compacta de las reglas del firewall
+
+Define el tipo FirewallRule (con __slots__, sin diccionario por instancia)
+y un formato binario de registros de ancho fijo que el controlador carga
+con mmap, sin parsear JSON ni validar: la validación, expansión de rangos
+y compactación se hacen una sola vez al compilar.
+
+Formato del archivo (big-endian):
+
+    header:  magic 'FWRB' | versión (H) | tamaño de registro (H)
+             | cantidad de switches (I) | cantidad de reglas (I)
+    índice:  por switch: dpid (Q) | primer registro (I) | cantidad (I)
+    reglas:  registros de RECORD_SIZE bytes ordenados por switch
+
+Un campo de matching en 0 dentro de un registro es un comodín.
+
+Compilación:
+    python3 controller/compiled_rules.py controller/firewall_rules.json reglas.bin
+"""
+
+import hashlib
+import mmap
+import os
+import socket
+import struct
+import sys
+
+# Protocol numbers (IANA IP Protocol Numbers)
+IP_PROTO_ICMP = 1
+IP_PROTO_TCP  = 6
+IP_PROTO_UDP  = 17
+
+PROTOCOL_MAP = {
+    'ICMP': IP_PROTO_ICMP,
+    'TCP':  IP_PROTO_TCP,
+    'UDP':  IP_PROTO_UDP,
+}
+
+IP_TYPE = 0x0800
+
+# Acción de la regla: DROP es un flow sin acciones, ALLOW lo reenvía
+ACTION_DROP  = 0
+ACTION_ALLOW = 1
+
+ACTION_MAP = {
+    'DROP':  ACTION_DROP,
+    'ALLOW': ACTION_ALLOW,
+}
+
+# Mismo valor que of.OFP_DEFAULT_PRIORITY
+DEFAULT_PRIORITY = 0x8000
+
+MAGIC = b'FWRB'
+VERSION = 2
+
+_HEADER = struct.Struct('!4sHHII')
+_INDEX_ENTRY = struct.Struct('!QII')
+# switch | dl_type | src red | src largo | dst red | dst largo | proto | acción
+# | src_port | dst_port | prioridad
+_RECORD = struct.Struct('!QHIBIBBBHHH')
+
+RECORD_SIZE = _RECORD.size
+
+
+def format_ip_prefix(network, prefix_len):
+    """Formatea (red, largo) como "10.0.0.1" para /32 o "10.0.0.0/24" en otro caso."""
+    addr = socket.inet_ntoa(struct.pack('!I', network))
+    return addr if prefix_len == 32 else "%s/%d" % (addr, prefix_len)
+
+
+class FirewallRule(object):
+    """
+    Regla de firewall validada y expandida (puertos únicos).
+
+    Las IPs se guardan como (red, largo) en enteros y el protocolo como
+    número IANA. Un campo de matching en None es un comodín.
+    """
+
+    __slots__ = ('switch', 'dl_type', 'src_net', 'src_len', 'dst_net', 'dst_len',
+                 'nw_proto', 'src_port', 'dst_port', 'priority', 'action', 'description')
+
+    def __init__(self, switch, dl_type=None, src=None, dst=None, nw_proto=None,
+                 src_port=None, dst_port=None, priority=DEFAULT_PRIORITY,
+                 action=ACTION_DROP, description=None):
+        self.switch = switch
+        self.dl_type = dl_type
+        self.src_net, self.src_len = src if src is not None else (0, 0)
+        self.dst_net, self.dst_len = dst if dst is not None else (0, 0)
+        self.nw_proto = nw_proto
+        self.src_port = src_port
+        self.dst_port = dst_port
+        self.priority = priority
+        self.action = action
+        self.description = description
+
+    @property
+    def src(self):
+        """IP origen como (red, largo), o None si es comodín."""
+        return (self.src_net, self.src_len) if self.src_len else None
+
+    @property
+    def dst(self):
+        """IP destino como (red, largo), o None si es comodín."""
+        return (self.dst_net, self.dst_len) if self.dst_len else None
+
+    @property
+    def src_ip(self):
+        """IP origen en texto ("10.0.0.0/24"), o None si es comodín."""
+        return format_ip_prefix(self.src_net, self.src_len) if self.src_len else None
+
+    @property
+    def dst_ip(self):
+        """IP destino en texto ("10.0.0.0/24"), o None si es comodín."""
+        return format_ip_prefix(self.dst_net, self.dst_len) if self.dst_len else None
+
+    @property
+    def allows(self):
+        """True si la regla permite el tráfico en lugar de descartarlo."""
+        return self.action == ACTION_ALLOW
+
+    def match(self):
+        """
+        Campos de matching de la regla, incluyendo el switch.
+
+        Returns:
+            tuple: (switch, dl_type, src, dst, nw_proto, src_port, dst_port)
+        """
+        return (self.switch, self.dl_type, self.src, self.dst,
+                self.nw_proto, self.src_port, self.dst_port)
+
+    def key(self):
+        """
+        Identidad de la regla: el match, la prioridad y la acción.
+
+        Dos reglas con la misma clave generan exactamente el mismo flow.
+
+        Returns:
+            tuple: match() + (priority, action)
+        """
+        return self.match() + (self.priority, self.action)
+
+    def matches(self, dl_type, src, dst, nw_proto, src_port, dst_port):
+        """
+        Indica si un paquete matchea la regla (ignorando el switch).
+
+        Args:
+            dl_type (int): Tipo Ethernet del paquete
+            src, dst (int): IPs origen y destino como enteros (None si no es IP)
+            nw_proto (int): Protocolo IP (None si no es IP)
+            src_port, dst_port (int): Puertos TCP/UDP (None si no aplica)
+        """
+        if self.dl_type is not None and self.dl_type != dl_type:
+            return False
+        if self.src_len and (src is None or (src ^ self.src_net) >> (32 - self.src_len)):
+            return False
+        if self.dst_len and (dst is None or (dst ^ self.dst_net) >> (32 - self.dst_len)):
+            return False
+        if self.nw_proto is not None and self.nw_proto != nw_proto:
+            return False
+        if self.src_port is not None and self.src_port != src_port:
+            return False
+        if self.dst_port is not None and self.dst_port != dst_port:
+            return False
+        return True
+
+    def cookie(self):
+        """
+        Cookie OpenFlow de 64 bits derivada de la identidad de la regla.
+
+        Es estable entre reinicios del controlador (no usa hash() de
+        Python), de modo que los flows instalados por una ejecución
+        anterior siguen siendo atribuibles a su regla.
+        """
+        digest = hashlib.blake2b(repr(self.key()).encode(), digest_size=8).digest()
+        return struct.unpack('!Q', digest)[0]
+
+    @classmethod
+    def from_key(cls, key, description=None):
+        """Construye una regla a partir de su clave (inversa de key())."""
+        return cls(*key, description=description)
+
+    @classmethod
+    def from_dict(cls, rule, parse_ip_prefix, prefixes=None):
+        """
+        Construye una regla a partir de un diccionario validado y expandido.
+
+        Args:
+            rule (dict): Regla en el formato de firewall_rules.json
+            parse_ip_prefix: Función que convierte "a.b.c.d/n" a (red, largo)
+            prefixes (dict): Prefijos ya parseados al validar ('src_ip'/'dst_ip'
+                -> (red, largo)); los que falten se parsean con parse_ip_prefix
+        """
+        protocol = rule.get('protocol')
+        action = rule.get('action')
+        dl_type = rule.get('dl_type')
+        if dl_type is None and ('src_ip' in rule or 'dst_ip' in rule or protocol):
+            dl_type = IP_TYPE
+
+        if prefixes is None:
+            prefixes = {}
+        src = dst = None
+        if 'src_ip' in rule:
+            src = prefixes.get('src_ip') or parse_ip_prefix(rule['src_ip'])
+        if 'dst_ip' in rule:
+            dst = prefixes.get('dst_ip') or parse_ip_prefix(rule['dst_ip'])
+
+        return cls(
+            int(rule['switch']),
+            dl_type,
+            src if src is not None and src[1] else None,
+            dst if dst is not None and dst[1] else None,
+            PROTOCOL_MAP[protocol.upper()] if protocol else None,
+            int(rule['src_port']) if 'src_port' in rule else None,
+            int(rule['dst_port']) if 'dst_port' in rule else None,
+            int(rule.get('priority', DEFAULT_PRIORITY)),
+            ACTION_MAP[action.upper()] if action else ACTION_DROP,
+            rule.get('description'),
+        )
+
+    def pack_into(self, buffer, offset):
+        """Escribe la regla como registro de ancho fijo."""
+        _RECORD.pack_into(buffer, offset, self.switch, self.dl_type or 0,
+                          self.src_net, self.src_len, self.dst_net, self.dst_len,
+                          self.nw_proto or 0, self.action, self.src_port or 0,
+                          self.dst_port or 0, self.priority)
+
+    @classmethod
+    def unpack_from(cls, buffer, offset):
+        """Lee una regla desde un registro de ancho fijo."""
+        (switch, dl_type, src_net, src_len, dst_net, dst_len,
+         nw_proto, action, src_port, dst_port, priority) = _RECORD.unpack_from(buffer, offset)
+        rule = cls.__new__(cls)
+        rule.switch = switch
+        rule.dl_type = dl_type or None
+        rule.src_net = src_net
+        rule.src_len = src_len
+        rule.dst_net = dst_net
+        rule.dst_len = dst_len
+        rule.nw_proto = nw_proto or None
+        rule.src_port = src_port or None
+        rule.dst_port = dst_port or None
+        rule.priority = priority
+        rule.action = action
+        rule.description = None
+        return rule
+
+    def __repr__(self):
+        return "FirewallRule(%r)" % (self.description or (self.key(),))
+
+
+class RuleSet(object):
+    """
+    Conjunto de reglas en memoria agrupado por switch.
+
+    Es la interfaz que usa el firewall, común a las reglas cargadas desde
+    JSON y a las cargadas desde un archivo compilado (CompiledRuleSet).
+    """
+
+    def __init__(self, rules):
+        self._by_switch = {}
+        for rule in rules:
+            self._by_switch.setdefault(rule.switch, []).append(rule)
+        self._count = len(rules)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for switch_id in sorted(self._by_switch):
+            yield from self._by_switch[switch_id]
+
+    def for_switch(self, switch_id):
+        """Reglas de un switch (lista vacía si no tiene)."""
+        return self._by_switch.get(switch_id, [])
+
+    def switch_counts(self):
+        """Diccionario dpid -> cantidad de reglas."""
+        return {switch_id: len(rules) for switch_id, rules in self._by_switch.items()}
+
+    def close(self):
+        """No hay nada que liberar (misma interfaz que CompiledRuleSet)."""
+
+
+class CompiledRuleSet(object):
+    """
+    Conjunto de reglas respaldado por un archivo compilado mapeado en memoria.
+
+    Abrirlo solo lee el header y el índice de switches; los registros se
+    decodifican recién cuando se piden las reglas de un switch.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            # mmap no acepta archivos vacíos; se rechazan junto con los truncados
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError("%s está truncado: falta el header" % path)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_index(path)
+        except ValueError:
+            self._mm.close()
+            raise
+
+    def _read_index(self, path):
+        """Valida el header y el tamaño del archivo, y carga el índice de switches."""
+        magic, version, record_size, switch_count, rule_count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError("%s no es un archivo de reglas compilado" % path)
+        if version != VERSION or record_size != RECORD_SIZE:
+            raise ValueError("Versión de archivo compilado no soportada: %d (se espera %d)"
+                             % (version, VERSION))
+
+        expected = _HEADER.size + switch_count * _INDEX_ENTRY.size + rule_count * RECORD_SIZE
+        if len(self._mm) != expected:
+            raise ValueError("%s tiene %d bytes, el header declara %d"
+                             % (path, len(self._mm), expected))
+
+        self._count = rule_count
+        self._index = {}
+        offset = _HEADER.size
+        for _ in range(switch_count):
+            switch_id, first, count = _INDEX_ENTRY.unpack_from(self._mm, offset)
+            if first + count > rule_count:
+                raise ValueError("%s: el índice del switch %d apunta fuera de los registros"
+                                 % (path, switch_id))
+            self._index[switch_id] = (first, count)
+            offset += _INDEX_ENTRY.size
+        self._records = offset
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield FirewallRule.unpack_from(self._mm, self._records + i * RECORD_SIZE)
+
+    def for_switch(self, switch_id):
+        """Reglas de un switch (lista vacía si no tiene)."""
+        first, count = self._index.get(switch_id, (0, 0))
+        start = self._records + first * RECORD_SIZE
+        return [FirewallRule.unpack_from(self._mm, start + i * RECORD_SIZE)
+                for i in range(count)]
+
+    def switch_counts(self):
+        """Diccionario dpid -> cantidad de reglas."""
+        return {switch_id: count for switch_id, (first, count) in self._index.items()}
+
+    def close(self):
+        """Libera el mapeo; las reglas ya decodificadas siguen siendo válidas."""
+        self._mm.close()
+
+
+def is_compiled_rules_file(path):
+    """Indica si el archivo empieza con la firma del formato compilado."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def write_compiled_rules(rules, path):
+    """
+    Escribe reglas validadas en el formato binario.
+
+    El archivo se escribe en uno temporal del mismo directorio que luego
+    reemplaza al destino con os.replace: un controlador que tenga mapeado
+    el archivo anterior lo sigue leyendo intacto, en lugar de encontrarlo
+    truncado (lo que termina en SIGBUS al decodificar los registros).
+
+    Args:
+        rules (iterable): FirewallRule ya validadas, expandidas y compactadas
+        path (str): Archivo de salida
+
+    Returns:
+        int: Cantidad de reglas escritas
+    """
+    rule_set = RuleSet(list(rules))
+    counts = rule_set.switch_counts()
+    switches = sorted(counts)
+
+    header_size = _HEADER.size + len(switches) * _INDEX_ENTRY.size
+    buffer = bytearray(header_size + len(rule_set) * RECORD_SIZE)
+    _HEADER.pack_into(buffer, 0, MAGIC, VERSION, RECORD_SIZE, len(switches), len(rule_set))
+
+    offset = _HEADER.size
+    first = 0
+    for switch_id in switches:
+        _INDEX_ENTRY.pack_into(buffer, offset, switch_id, first, counts[switch_id])
+        offset += _INDEX_ENTRY.size
+        first += counts[switch_id]
+
+    for rule in rule_set:
+        rule.pack_into(buffer, offset)
+        offset += RECORD_SIZE
+
+    tmp_path = '%s.tmp.%d' % (path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return len(rule_set)
+
+
+def main(argv):
+    """Compila un archivo de reglas .json/.jsonl al formato binario."""
+    if len(argv) != 3:
+        print("Uso: %s <reglas.json|reglas.jsonl> <salida.bin>" % argv[0])
+        return 1
+
+    # utils usa el logger de POX si está disponible; se busca en ./pox del proyecto
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.path.join(root, 'pox'))
+    from utils import load_firewall_rules
+
+    rules = load_firewall_rules(raise_errors=True, path=argv[1])
+    count = write_compiled_rules(rules, argv[2])
+    print("%d regla(s) compiladas en %s (%d bytes)" % (count, argv[2], os.path.getsize(argv[2])))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
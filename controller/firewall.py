@@ -6,71 +6,290 @@ Carga reglas desde archivo JSON y las instala en switches específicos.
 
 Cada regla puede especificar a qué switch se aplica (campo 'switch').
 Si no se especifica, la regla se aplica al Switch 1 por defecto.
-Las reglas se instalan dinámicamente cuando cada switch se conecta.
+Las reglas se instalan dinámicamente cuando cada switch se conecta, y
+pueden recargarse en caliente enviando solo los flows que cambiaron.
+
+En modo reactivo no se instala nada al conectar: cada paquete que llega
+al controlador se evalúa contra las reglas y, si debe descartarse, se
+instala un flow acotado a ese tráfico con idle/hard timeouts.
 
 Basado en: Coursera - Software Defined Networking (SDN) course
            Programming Assignment: Layer-2 Firewall Application
            Professor: Nick Feamster, Teaching Assistant: Arpit Gupta
 """
 
+import os
+import time
+
 from pox.core import core
 import pox.openflow.libopenflow_01 as of
-from pox.lib.revent import EventMixin
-from pox.lib.util import dpidToStr
+from pox.lib.revent import EventMixin, EventHalt
+from pox.lib.recoco import Timer
+from pox.lib.util import dpidToStr, str_to_bool
 from pox.lib.addresses import IPAddr
-from pox.lib.packet.ethernet import ethernet
 
-from utils import load_firewall_rules
+from utils import load_rule_set, get_rules_path
+from compiled_rules import CompiledRuleSet, IP_TYPE, IP_PROTO_TCP, IP_PROTO_UDP
+from classifier import Classifier, packet_tuple
+from flow_stats import FlowStatsTracker
 
 log = core.getLogger()
 
-# Protocol numbers (IANA IP Protocol Numbers)
-IP_PROTO_ICMP = 1
-IP_PROTO_TCP  = 6
-IP_PROTO_UDP  = 17
+# Estadísticas de flows: un pedido por switch y por intervalo como máximo
+MIN_STATS_INTERVAL          = 1.0   # segundos
+MAX_STATS_REQUESTS_PER_POLL = 50    # switches consultados por tick del timer
+STATS_REQUEST_TIMEOUT       = 30.0  # segundos antes de reintentar un pedido sin respuesta
+STATS_SUMMARY_EVERY         = 6     # ticks entre resúmenes en el log
+
+# Modo reactivo: timeouts de los flows de descarte (0 = sin timeout)
+DEFAULT_IDLE_TIMEOUT = 10      # segundos sin tráfico antes de que el switch quite el flow
+DEFAULT_HARD_TIMEOUT = 0       # segundos de vida máxima del flow
+MAX_FLOW_TIMEOUT     = 65535
+# Prioridad de los flows reactivos de paquetes TCP/UDP sin header de
+# transporte parseado: el flow deja los puertos como comodín, así que no
+# debe tapar a otros flows más específicos
+MIN_REACTIVE_PRIORITY = 1
+
+def build_match(rule):
+    """
+    Construye el ofp_match correspondiente a una regla validada.
+    
+    Los campos no definidos en la regla quedan como comodines.
+    
+    Args:
+        rule (FirewallRule): Regla de firewall validada
+    
+    Returns:
+        ofp_match: Header de los paquetes a bloquear
+    """
+    packet_header_to_block = of.ofp_match()
+    
+    # Tipo de Ethernet (IPv4 si la regla usa campos de IP)
+    if rule.dl_type is not None:
+        packet_header_to_block.dl_type = rule.dl_type
+    
+    # Dirección IP origen (host o prefijo CIDR, que POX traduce a wildcard de bits)
+    if rule.src_len:
+        packet_header_to_block.nw_src = rule.src_ip
+    
+    # Dirección IP destino
+    if rule.dst_len:
+        packet_header_to_block.nw_dst = rule.dst_ip
+    
+    # Los protocolos aceptados por openflow son TCP=6, UDP=17, ICMP=1
+    # Si no se especifica, queda como comodin (matchea todos)
+    if rule.nw_proto is not None:
+        packet_header_to_block.nw_proto = rule.nw_proto
+    
+    # Puerto origen
+    if rule.src_port is not None:
+        packet_header_to_block.tp_src = rule.src_port
+    
+    # Puerto destino
+    if rule.dst_port is not None:
+        packet_header_to_block.tp_dst = rule.dst_port
+    
+    return packet_header_to_block
+
+
+def build_flow_mod(rule, command=of.OFPFC_ADD):
+    """
+    Construye el flow-mod de una regla.
+    
+    Las reglas drop no llevan acciones (el switch descarta el paquete);
+    las reglas allow reenvían por OFPP_NORMAL, el pipeline L2 del switch.
+    La cookie identifica la regla en las estadísticas de flows.
+    
+    Args:
+        rule (FirewallRule): Regla de firewall validada
+        command (int): Comando OpenFlow (OFPFC_ADD, OFPFC_DELETE_STRICT, ...)
+    
+    Returns:
+        ofp_flow_mod: Flow-mod listo para serializar
+    """
+    flow_mod = of.ofp_flow_mod(command=command, priority=rule.priority, cookie=rule.cookie())
+    flow_mod.match = build_match(rule)
+    if rule.allows:
+        flow_mod.actions.append(of.ofp_action_output(port=of.OFPP_NORMAL))
+    return flow_mod
+
+
+def packet_fields(packet):
+    """
+    Extrae de un paquete parseado los campos sobre los que matchean las reglas.
+    
+    Args:
+        packet (ethernet): Paquete recibido en un PacketIn
+    
+    Returns:
+        tuple: (dl_type, src, dst, nw_proto, src_port, dst_port) con las IPs
+            como enteros y None en los campos que no aplican
+    """
+    ip = packet.find('ipv4')
+    if ip is None:
+        return (packet.type, None, None, None, None, None)
+    
+    src_port = dst_port = None
+    if ip.protocol in (IP_PROTO_TCP, IP_PROTO_UDP):
+        transport = packet.find('tcp' if ip.protocol == IP_PROTO_TCP else 'udp')
+        if transport is not None:
+            src_port, dst_port = transport.srcport, transport.dstport
+    
+    return (IP_TYPE, ip.srcip.toUnsigned(), ip.dstip.toUnsigned(), ip.protocol, src_port, dst_port)
+
+
+def build_packet_match(fields):
+    """
+    Construye un ofp_match acotado al tráfico de un paquete (ver packet_fields).
+    
+    Solo usa los campos que pueden usar las reglas, así que todos los
+    paquetes que matchean el flow se clasifican igual que el original.
+    """
+    dl_type, src, dst, nw_proto, src_port, dst_port = fields
+    match = of.ofp_match(dl_type=dl_type)
+    if src is not None:
+        match.nw_src = IPAddr(src)
+        match.nw_dst = IPAddr(dst)
+        match.nw_proto = nw_proto
+    if src_port is not None:
+        match.tp_src = src_port
+        match.tp_dst = dst_port
+    return match
 
-PROTOCOL_MAP = {
-    'ICMP': IP_PROTO_ICMP,
-    'TCP':  IP_PROTO_TCP,
-    'UDP':  IP_PROTO_UDP,
-}
 
 class Firewall(EventMixin):
     """
-    Firewall SDN que instala reglas de bloqueo en switches OpenFlow.
+    Firewall SDN que instala reglas de bloqueo (y excepciones allow) en switches OpenFlow.
+    
+    Las reglas se cargan desde firewall_rules.json (o un archivo
+    compilado) y se serializan una única vez a flow-mods por switch,
+    que se envían cuando cada switch se conecta al controlador.
     
-    Las reglas se cargan desde firewall_rules.json y se instalan
-    cuando cada switch se conecta al controlador.
+    Las reglas pueden recargarse en caliente con reload_rules(): solo
+    se envían a cada switch los flows agregados o eliminados.
+    
+    En modo reactivo las reglas se evalúan en el controlador (ver
+    _handle_PacketIn) y solo se instalan flows para el tráfico descartado.
     """
     
-    def __init__(self):
-        """Inicializa el firewall y carga las reglas desde JSON."""
+    def __init__(self, reload_interval=None, rules_path=None, stats_interval=None,
+                 reactive=False, idle_timeout=DEFAULT_IDLE_TIMEOUT, 
+                 hard_timeout=DEFAULT_HARD_TIMEOUT):
+        """
+        Inicializa el firewall, carga las reglas y las compila.
+        
+        Args:
+            reload_interval (float): Segundos entre chequeos de cambios en
+                el archivo de reglas (None deshabilita la recarga automática)
+            rules_path (str): Archivo de reglas (.json, .jsonl o compilado
+                con compiled_rules.py). Por defecto controller/firewall_rules.json
+            stats_interval (float): Segundos entre consultas de estadísticas
+                de flows a cada switch (None deshabilita el polling)
+            reactive (bool): Instalar flows de descarte a demanda en lugar
+                de todas las reglas al conectar cada switch
+            idle_timeout (int): Timeout de inactividad de los flows reactivos
+            hard_timeout (int): Duración máxima de los flows reactivos
+        """
         self.listenTo(core.openflow)
-        self.rules = load_firewall_rules()
+        self.reactive = reactive
+        self.idle_timeout = idle_timeout
+        self.hard_timeout = hard_timeout
+        self.rules_path = rules_path or get_rules_path()
+        self.rules = load_rule_set(path=self.rules_path)
+        
+        # barriers enviados y todavía sin respuesta: dpid -> (xid, timestamp, reglas)
+        self.pending_barriers = {}
+        
+        # switches conectados y reglas que tienen instaladas (en modo
+        # reactivo, las que ya tienen algún flow de descarte): dpid -> {clave: regla}
+        self.connections = {}
+        self.installed = {}
+        
+        # contadores por regla y pedidos de estadísticas sin respuesta: dpid -> timestamp
+        self.flow_stats = FlowStatsTracker()
+        self.stats_pending = {}
+        self._stats_last_sent = {}
+        self._stats_ticks = 0
         
         log.info("=" * 70)
         log.info("Firewall SDN inicializado")
         log.info("Reglas cargadas: %d", len(self.rules))
         
         # imprimimos la distribucion de las reglas por switch
-        if self.rules:
-            switches = {}
-            for rule in self.rules:
-                switch_id = rule.get('switch', 1)
-                switches[switch_id] = switches.get(switch_id, 0) + 1
-            
+        switches = self.rules.switch_counts()
+        if switches:
             log.info("-" * 70)
             log.info("Distribución de reglas por switch:")
             for switch_id in sorted(switches.keys()):
                 log.info("  Switch %d: %d regla(s)", switch_id, switches[switch_id])
         
+        # flow-mods listos para enviar: dpid -> (bytes, {clave: regla})
+        self.compiled_rules = {}
+        
+        # tablas de reglas para el modo reactivo: dpid -> Classifier
+        self.classifiers = {}
+        
+        # Las reglas compiladas en binario se serializan recién cuando se
+        # conecta cada switch, para que el arranque no dependa del tamaño
+        # de la política; las cargadas desde JSON ya se recorrieron enteras
+        if reactive:
+            log.info("Modo reactivo: idle_timeout=%d s, hard_timeout=%d s", 
+                     idle_timeout, hard_timeout)
+        elif not isinstance(self.rules, CompiledRuleSet):
+            for switch_id in switches:
+                self._get_compiled(switch_id)
+        
+        self._rules_mtime = self._get_rules_mtime()
+        if reload_interval:
+            Timer(reload_interval, self._check_rules_file, recurring=True)
+            log.info("Recarga automática de reglas cada %.1f s", reload_interval)
+        if stats_interval:
+            stats_interval = max(stats_interval, MIN_STATS_INTERVAL)
+            Timer(stats_interval, self._poll_flow_stats, recurring=True)
+            log.info("Estadísticas de flows cada %.1f s", stats_interval)
+        
         log.info("=" * 70)
 
+    def _compile_switch(self, rule_set, switch_id):
+        """
+        Serializa los flow-mods de las reglas de un switch.
+        
+        Args:
+            rule_set: Conjunto de reglas (RuleSet o CompiledRuleSet)
+            switch_id (int): DPID del switch
+        
+        Returns:
+            tuple: (bytes con los flow-mods, {clave: regla})
+        """
+        switch_rules = {}
+        for rule in rule_set.for_switch(switch_id):
+            switch_rules.setdefault(rule.key(), rule)
+        
+        buffer = bytearray()
+        for idx, rule in enumerate(switch_rules.values(), 1):
+            buffer += build_flow_mod(rule).pack()
+            log.debug("    [%d/%d] %s", idx, len(switch_rules), rule.description or 'Sin descripción')
+        
+        return bytes(buffer), switch_rules
+
+    def _get_compiled(self, switch_id):
+        """
+        Devuelve los flow-mods serializados de un switch, compilándolos una sola vez.
+        
+        La (re)conexión de un switch cuesta entonces una búsqueda en el
+        diccionario y una única escritura en la conexión.
+        """
+        compiled = self.compiled_rules.get(switch_id)
+        if compiled is None:
+            compiled = self._compile_switch(self.rules, switch_id)
+            self.compiled_rules[switch_id] = compiled
+        return compiled
+
     def _handle_ConnectionUp(self, event):
         """
         Maneja la conexión de un nuevo switch.
         
-        Instala las reglas de firewall correspondientes al switch
+        Envía los flow-mods precompilados correspondientes al switch
         que acaba de conectarse al controlador.
         
         Args:
@@ -79,74 +298,435 @@ class Firewall(EventMixin):
         dpid_str = dpidToStr(event.dpid)
         switch_id = event.dpid
         
-        log.info("=" * 70)
         log.info("Switch %s (DPID: %d) conectado", dpid_str, switch_id)
-        log.info("-" * 70)
-
-        # me quedo con las reglas para este switch especifico
-        switch_rules = [rule for rule in self.rules if rule.get('switch', 1) == switch_id]
+        self.connections[switch_id] = event.connection
         
+        if self.reactive:
+            self.installed[switch_id] = {}
+            self.flow_stats.track_switch(switch_id, ())
+            log.info("Switch %d en modo reactivo: %d regla(s) en el clasificador", 
+                     switch_id, len(self._get_classifier(switch_id)))
+            return
+
+        payload, switch_rules = self._get_compiled(switch_id)
+        self.installed[switch_id] = switch_rules
+        self.flow_stats.track_switch(switch_id, switch_rules.values())
         if not switch_rules:
-            log.info("No hay reglas de firewall configuradas para este switch")
-            log.info("=" * 70)
+            log.info("No hay reglas de firewall configuradas para Switch %d", switch_id)
             return
         
-        log.info("Aplicando %d regla(s) de firewall para Switch %d", len(switch_rules), switch_id)
-        log.info("-" * 70)
+        self._send_with_barrier(event.connection, payload, len(switch_rules))
+        
+        log.info("Firewall enviado a Switch %d: %d regla(s) en %d bytes (esperando barrier)", 
+                 switch_id, len(switch_rules), len(payload))
+
+    def reload_rules(self):
+        """
+        Recarga el archivo de reglas y aplica solo las diferencias.
+        
+        Para cada switch conectado se calcula qué reglas se agregaron y
+        cuáles se eliminaron respecto de lo instalado, y se envían
+        únicamente los OFPFC_ADD / OFPFC_DELETE_STRICT correspondientes
+        (una regla que se vuelve a agregar con el mismo match y prioridad
+        no se borra: el ADD la reemplaza).
+        Si el archivo tiene errores se mantienen las reglas actuales.
         
-        rules_installed = 0
+        Puede invocarse desde el intérprete de POX:
+            core.Firewall.reload_rules()
         
-        for idx, rule in enumerate(switch_rules, 1):
-            # Creacion del header del paquete a bloquear (los campos no definidos se consideran comodines)
-            packet_header_to_block = of.ofp_match()
+        Returns:
+            bool: True si las reglas se recargaron
+        """
+        try:
+            rules = load_rule_set(raise_errors=True, path=self.rules_path)
+        except Exception as e:
+            log.error("No se pudieron recargar las reglas (%s); se mantienen las actuales", e)
+            return False
+        
+        compiled = {}
+        for switch_id, connection in self.connections.items():
+            if self.reactive:
+                self._flush_reactive_flows(switch_id, connection, rules)
+                continue
             
-            # Tipo de Ethernet (IPv4)
-            if 'dl_type' in rule or any(k in rule for k in ['src_ip', 'dst_ip', 'protocol']):
-                packet_header_to_block.dl_type = rule.get('dl_type', ethernet.IP_TYPE)  # IPv4 por defecto
+            compiled[switch_id] = self._compile_switch(rules, switch_id)
+            switch_rules = compiled[switch_id][1]
+            installed = self.installed.get(switch_id, {})
             
-            # Dirección IP origen
-            if 'src_ip' in rule:
-                packet_header_to_block.nw_src = IPAddr(rule['src_ip'])
+            removed = [rule for key, rule in installed.items() if key not in switch_rules]
+            added = [rule for key, rule in switch_rules.items() if key not in installed]
             
-            # Dirección IP destino
-            if 'dst_ip' in rule:
-                packet_header_to_block.nw_dst = IPAddr(rule['dst_ip'])
+            if not removed and not added:
+                continue
             
-            # Los protocolos aceptados por openflow son TCP=6, UDP=17, ICMP=1
-            # Si no se especifica, queda como comodin (matchea todos)
-            if 'protocol' in rule:
-                protocol = rule['protocol'].upper()
-                packet_header_to_block.nw_proto = PROTOCOL_MAP.get(protocol)
+            # Si solo cambió la acción, el ADD con el mismo match y prioridad
+            # reemplaza al flow anterior; un DELETE_STRICT en el mismo envío
+            # podría aplicarse después del ADD (sin barrier entre ambos no hay
+            # orden garantizado) y dejar el tráfico sin regla
+            replaced = {rule.match() + (rule.priority,) for rule in added}
             
-            # Puerto origen
-            if 'src_port' in rule:
-                packet_header_to_block.tp_src = int(rule['src_port'])
+            buffer = bytearray()
+            for rule in removed:
+                if rule.match() + (rule.priority,) not in replaced:
+                    buffer += build_flow_mod(rule, of.OFPFC_DELETE_STRICT).pack()
+            for rule in added:
+                buffer += build_flow_mod(rule).pack()
             
-            # Puerto destino
-            if 'dst_port' in rule:
-                packet_header_to_block.tp_dst = int(rule['dst_port'])
-
-            # Creacion de flow mod (sin acciones = DROP)
-            flow_mod = of.ofp_flow_mod()
-            flow_mod.match = packet_header_to_block
+            self.installed[switch_id] = switch_rules
+            self.flow_stats.track_switch(switch_id, switch_rules.values())
+            self._send_with_barrier(connection, bytes(buffer), len(switch_rules))
             
-            # Envio de regla al switch
-            event.connection.send(flow_mod)
-            rules_installed += 1
+            log.info("Switch %d: %d regla(s) agregada(s), %d eliminada(s)", 
+                     switch_id, len(added), len(removed))
+        
+        old_rules, self.rules = self.rules, rules
+        self.compiled_rules = compiled
+        self.classifiers = {}
+        # las reglas compiladas anteriores ya no se decodifican: se libera el mmap
+        old_rules.close()
+        log.info("Reglas recargadas: %d", len(rules))
+        return True
+
+    def _flush_reactive_flows(self, switch_id, connection, rules):
+        """
+        Quita de un switch los flows afectados por las reglas que cambiaron.
+        
+        Para cada regla agregada o eliminada se envía un OFPFC_DELETE (no
+        estricto) con su match, que borra tanto los flows de descarte que
+        instaló como los de reenvío de otras aplicaciones que ahora
+        deberían descartarse. El tráfico vuelve al controlador y se
+        reevalúa con las reglas nuevas.
+        
+        Si la regla tiene puertos se envía además un DELETE con su match
+        sin los puertos: los flows de paquetes TCP/UDP sin header de
+        transporte (ver _handle_PacketIn) tienen los puertos como comodín
+        y el DELETE con puertos no los alcanza.
+        
+        Args:
+            switch_id (int): DPID del switch
+            connection: Conexión OpenFlow del switch
+            rules: Conjunto de reglas nuevo
+        """
+        old = {rule.key(): rule for rule in self.rules.for_switch(switch_id)}
+        new = {rule.key(): rule for rule in rules.for_switch(switch_id)}
+        changed = [rule for key, rule in old.items() if key not in new]
+        changed += [rule for key, rule in new.items() if key not in old]
+        if not changed:
+            return
+        
+        buffer = bytearray()
+        sent = set()
+        for rule in changed:
+            matches = [build_match(rule)]
+            if rule.src_port is not None or rule.dst_port is not None:
+                portless = build_match(rule)
+                portless.tp_src = None
+                portless.tp_dst = None
+                matches.append(portless)
+            for match in matches:
+                # varias reglas que solo difieren en los puertos comparten el DELETE sin puertos
+                if match.pack() in sent:
+                    continue
+                sent.add(match.pack())
+                flow_mod = of.ofp_flow_mod(command=of.OFPFC_DELETE)
+                flow_mod.match = match
+                buffer += flow_mod.pack()
+        
+        installed = {key: rule for key, rule in self.installed.get(switch_id, {}).items()
+                     if key in new}
+        self.installed[switch_id] = installed
+        self.flow_stats.track_switch(switch_id, installed.values())
+        self._send_with_barrier(connection, bytes(buffer), len(changed))
+        
+        log.info("Switch %d: %d regla(s) cambiaron, se quitaron sus flows para reevaluar el tráfico", 
+                 switch_id, len(changed))
+
+    def _get_classifier(self, switch_id):
+        """Devuelve la tabla de reglas de un switch, construyéndola una sola vez."""
+        classifier = self.classifiers.get(switch_id)
+        if classifier is None:
+            classifier = Classifier(self.rules.for_switch(switch_id))
+            self.classifiers[switch_id] = classifier
+        return classifier
+
+    def lookup(self, switch_id, src_ip, dst_ip, protocol=None, src_port=None, dst_port=None):
+        """
+        Devuelve la regla que aplicaría a un paquete en un switch.
+
+        Usa la misma tabla que el modo reactivo, así que funciona en ambos
+        modos y sin que el switch esté conectado. Puede invocarse desde
+        el intérprete de POX:
+            core.Firewall.lookup(1, "10.0.0.1", "10.0.0.2", "TCP", 40000, 80)
+
+        Args:
+            switch_id (int): DPID del switch
+            src_ip, dst_ip (str): IPs del paquete
+            protocol: "TCP", "UDP", "ICMP" o número de protocolo (opcional)
+            src_port, dst_port (int): Puertos TCP/UDP (opcionales)
+
+        Returns:
+            FirewallRule: La regla de mayor prioridad que matchea, o None
+        """
+        fields = packet_tuple(src_ip, dst_ip, protocol, src_port, dst_port)
+        return self._get_classifier(switch_id).lookup(*fields)
+
+    def is_blocked(self, switch_id, src_ip, dst_ip, protocol=None, src_port=None, dst_port=None):
+        """
+        Indica si el firewall descartaría un paquete en un switch (ver lookup).
+
+        Returns:
+            bool: True si la regla que aplica es de descarte
+        """
+        rule = self.lookup(switch_id, src_ip, dst_ip, protocol, src_port, dst_port)
+        return rule is not None and not rule.allows
+
+    def _handle_PacketIn(self, event):
+        """
+        Evalúa en modo reactivo un paquete enviado al controlador.
+        
+        Si la regla de mayor prioridad que lo matchea es de descarte, se
+        instala un flow acotado a ese tráfico (mismos campos que pueden
+        usar las reglas) con la prioridad y la cookie de la regla, y el
+        evento se detiene para que forwarding.l2_learning no lo reenvíe.
+        Si no hay regla o es allow, el paquete sigue su curso normal.
+        
+        Si el paquete es TCP/UDP pero no se pudo parsear su header de
+        transporte, el flow tendría los puertos como comodín: si alguna
+        regla con puertos de mayor prioridad podría cambiar el resultado
+        (ver Classifier.depends_on_ports) no se instala nada y se descarta
+        solo este paquete; si no, el flow se instala con la prioridad
+        MIN_REACTIVE_PRIORITY (al recargar, _flush_reactive_flows también
+        quita estos flows).
+        
+        Args:
+            event: Evento PacketIn con el paquete parseado
+        """
+        if not self.reactive:
+            return
+        
+        packet = event.parsed
+        if not packet.parsed:
+            return
+        
+        fields = packet_fields(packet)
+        classifier = self._get_classifier(event.dpid)
+        rule = classifier.lookup(*fields)
+        if rule is None or rule.allows:
+            return
+        
+        priority = rule.priority
+        dl_type, src, dst, nw_proto, src_port, dst_port = fields
+        if src_port is None and nw_proto in (IP_PROTO_TCP, IP_PROTO_UDP):
+            if classifier.depends_on_ports(dl_type, src, dst, nw_proto, rule.priority):
+                self._drop_packet(event)
+                log.debug("Switch %d: descartando un paquete sin puertos (%s)", 
+                          event.dpid, rule.description or rule.key())
+                return EventHalt
+            priority = MIN_REACTIVE_PRIORITY
+        
+        flow_mod = of.ofp_flow_mod(priority=priority, cookie=rule.cookie(), 
+                                   idle_timeout=self.idle_timeout, 
+                                   hard_timeout=self.hard_timeout,
+                                   buffer_id=event.ofp.buffer_id)
+        flow_mod.match = build_packet_match(fields)
+        event.connection.send(flow_mod)
+        
+        installed = self.installed.setdefault(event.dpid, {})
+        if rule.key() not in installed:
+            installed[rule.key()] = rule
+            self.flow_stats.track_rule(event.dpid, rule)
+        
+        log.debug("Switch %d: descartando %s -> %s (%s)", event.dpid, 
+                  flow_mod.match.nw_src, flow_mod.match.nw_dst, 
+                  rule.description or rule.key())
+        return EventHalt
+
+    def _drop_packet(self, event):
+        """Descarta un paquete sin instalar un flow (libera su buffer en el switch)."""
+        buffer_id = event.ofp.buffer_id
+        if buffer_id is None or buffer_id == of.NO_BUFFER:
+            return
+        event.connection.send(of.ofp_packet_out(buffer_id=buffer_id, in_port=event.port))
+
+    def _get_rules_mtime(self):
+        """Devuelve la fecha de modificación del archivo de reglas (o None)."""
+        try:
+            return os.stat(self.rules_path).st_mtime
+        except OSError:
+            return None
+
+    def _check_rules_file(self):
+        """Recarga las reglas si el archivo cambió desde el último chequeo."""
+        mtime = self._get_rules_mtime()
+        if mtime is None or mtime == self._rules_mtime:
+            return
+        
+        self._rules_mtime = mtime
+        log.info("Cambios detectados en %s", self.rules_path)
+        self.reload_rules()
+
+    def _send_with_barrier(self, connection, payload, rule_count):
+        """
+        Envía los flow-mods en una sola escritura seguida de un barrier.
+        
+        Registra el xid del barrier para poder medir, al recibir la respuesta,
+        cuánto tardó el switch en tener el firewall efectivamente instalado.
+        
+        Args:
+            connection: Conexión OpenFlow del switch
+            payload (bytes): Flow-mods ya serializados
+            rule_count (int): Cantidad de reglas contenidas en el payload
+        """
+        barrier = of.ofp_barrier_request()
+        
+        self.pending_barriers[connection.dpid] = (barrier.xid, time.time(), rule_count)
+        connection.send(payload + barrier.pack())
+
+    def _handle_BarrierIn(self, event):
+        """
+        Maneja la respuesta a un barrier enviado tras instalar las reglas.
+        
+        Args:
+            event: Evento BarrierIn con el xid respondido por el switch
+        """
+        pending = self.pending_barriers.get(event.dpid)
+        if pending is None or pending[0] != event.xid:
+            return
+        
+        del self.pending_barriers[event.dpid]
+        xid, sent_at, rule_count = pending
+        elapsed_ms = (time.time() - sent_at) * 1000
+        log.info("Firewall activo en Switch %d: %d regla(s) confirmadas en %.1f ms", 
+                 event.dpid, rule_count, elapsed_ms)
+
+    def _poll_flow_stats(self):
+        """
+        Pide estadísticas de flows a los switches conectados.
+        
+        Se envía un único ofp_flow_stats_request por switch (el switch
+        responde con todos sus flows), nunca más de uno pendiente por
+        switch, y como máximo MAX_STATS_REQUESTS_PER_POLL por tick,
+        empezando por los switches consultados hace más tiempo.
+        """
+        now = time.time()
+        order = sorted(self.connections, key=lambda dpid: self._stats_last_sent.get(dpid, 0))
+        
+        requests = 0
+        for switch_id in order:
+            if requests >= MAX_STATS_REQUESTS_PER_POLL:
+                break
+            if not self.installed.get(switch_id):
+                continue
+            sent_at = self.stats_pending.get(switch_id)
+            if sent_at is not None and now - sent_at < STATS_REQUEST_TIMEOUT:
+                continue
             
-            rule_desc = rule.get('description', 'Sin descripción')
-            log.info("  [%d/%d] %s", idx, len(switch_rules), rule_desc)
+            self.connections[switch_id].send(of.ofp_stats_request(body=of.ofp_flow_stats_request()))
+            self.stats_pending[switch_id] = now
+            self._stats_last_sent[switch_id] = now
+            requests += 1
+        
+        self._stats_ticks += 1
+        if self._stats_ticks % STATS_SUMMARY_EVERY == 0:
+            self._log_stats_summary()
 
-        log.info("-" * 70)
-        log.info("Firewall configurado en Switch %d: %d regla(s) instalada(s)", 
-                 switch_id, rules_installed)
-        log.info("=" * 70)
+    def _handle_FlowStatsReceived(self, event):
+        """
+        Actualiza los contadores por regla con la respuesta de un switch.
+        
+        Args:
+            event: Evento FlowStatsReceived con los flows del switch
+        """
+        switch_id = event.connection.dpid
+        self.stats_pending.pop(switch_id, None)
+        
+        # en modo reactivo una regla puede tener varios flows con su cookie
+        totals = {}
+        for entry in event.stats:
+            packets, byte_count = totals.get(entry.cookie, (0, 0))
+            totals[entry.cookie] = (packets + entry.packet_count, byte_count + entry.byte_count)
+        
+        now = time.time()
+        for cookie, (packets, byte_count) in totals.items():
+            self.flow_stats.update(switch_id, cookie, packets, byte_count, now)
+
+    def _log_stats_summary(self):
+        """Loguea las reglas con más tráfico y la cantidad de reglas sin matches."""
+        hottest = self.flow_stats.hottest()
+        dead = self.flow_stats.dead()
+        if not hottest and not dead:
+            return
+        
+        log.info("Estadísticas del firewall: %d regla(s) sin matches", len(dead))
+        for counters in hottest:
+            log.info("  Switch %d: %.1f pkt/s, %d paquetes - %s", counters.rule.switch, 
+                     counters.packet_rate, counters.packets, 
+                     counters.rule.description or counters.rule.key())
+
+    def get_rule_stats(self, switch_id=None):
+        """
+        Devuelve los contadores de paquetes/bytes y tasas por regla.
+        
+        Puede invocarse desde el intérprete de POX:
+            core.Firewall.get_rule_stats(1)
+        
+        Args:
+            switch_id (int): Limitar a un switch (None para todos)
+        
+        Returns:
+            list: Un diccionario por regla instalada
+        """
+        return [counters.as_dict() for counters in self.flow_stats.get(switch_id)]
+
+    def _handle_ConnectionDown(self, event):
+        """
+        Olvida el estado de un switch que se desconectó.
+        
+        Args:
+            event: Evento ConnectionDown del switch
+        """
+        self.connections.pop(event.dpid, None)
+        self.installed.pop(event.dpid, None)
+        self.flow_stats.forget_switch(event.dpid)
+        self.stats_pending.pop(event.dpid, None)
+        self._stats_last_sent.pop(event.dpid, None)
+        
+        if self.pending_barriers.pop(event.dpid, None) is not None:
+            log.warning("Switch %d desconectado antes de confirmar el firewall", event.dpid)
 
 
-def launch():
+def launch(reload_interval=None, rules=None, stats_interval=None,
+           reactive=False, idle_timeout=None, hard_timeout=None):
     """
     Función de inicio del módulo POX.
     
     Registra el firewall en el core de POX.
+    
+    Args:
+        reload_interval: Segundos entre chequeos del archivo de reglas
+            para recargarlo en caliente (ej: firewall --reload_interval=2)
+        rules: Archivo de reglas alternativo, .json, .jsonl o compilado
+            (ej: firewall --rules=/ruta/reglas.jsonl)
+        stats_interval: Segundos entre consultas de estadísticas de flows
+            (ej: firewall --stats_interval=10)
+        reactive: Instalar flows de descarte a demanda (ej: firewall --reactive)
+        idle_timeout: Timeout de inactividad de los flows reactivos
+            (ej: firewall --reactive --idle_timeout=30)
+        hard_timeout: Duración máxima de los flows reactivos (0 = sin límite)
     """
-    core.registerNew(Firewall)
\ No newline at end of file
+    if reload_interval is not None:
+        reload_interval = float(reload_interval)
+    if stats_interval is not None:
+        stats_interval = float(stats_interval)
+    
+    timeouts = []
+    for name, value, default in (('idle_timeout', idle_timeout, DEFAULT_IDLE_TIMEOUT),
+                                 ('hard_timeout', hard_timeout, DEFAULT_HARD_TIMEOUT)):
+        value = default if value is None else int(value)
+        if value < 0 or value > MAX_FLOW_TIMEOUT:
+            raise ValueError("%s inválido: %d (debe estar entre 0 y %d)" 
+                             % (name, value, MAX_FLOW_TIMEOUT))
+        timeouts.append(value)
+    
+    core.registerNew(Firewall, reload_interval, rules, stats_interval,
+                     str_to_bool(reactive), *timeouts)
\ No newline at end of file
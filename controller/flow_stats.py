@@ -0,0 +1,135 @@
+"""
+Contadores por regla a partir de las estadísticas de flows de los switches
+
+Mantiene, para cada regla instalada, los paquetes y bytes que matchearon
+según el último reporte del switch y la tasa calculada entre dos reportes.
+No depende de OpenFlow: el firewall traduce cada respuesta de
+estadísticas a llamadas a update().
+"""
+
+import time
+
+
+class RuleCounters(object):
+    """Contadores acumulados y tasas de una regla en un switch."""
+
+    __slots__ = ('rule', 'packets', 'bytes', 'packet_rate', 'byte_rate', 'updated_at')
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.packets = 0
+        self.bytes = 0
+        self.packet_rate = 0.0
+        self.byte_rate = 0.0
+        self.updated_at = None
+
+    def as_dict(self):
+        """Representación para la API de consulta."""
+        return {
+            'switch': self.rule.switch,
+            'description': self.rule.description,
+            'key': self.rule.key(),
+            'cookie': self.rule.cookie(),
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'packet_rate': self.packet_rate,
+            'byte_rate': self.byte_rate,
+            'updated_at': self.updated_at,
+        }
+
+
+class FlowStatsTracker(object):
+    """
+    Registro de contadores por regla, indexado por switch y cookie de regla.
+
+    Las reglas se registran al instalarse (track_switch) y se actualizan con
+    cada reporte de estadísticas del switch (update).
+    """
+
+    def __init__(self):
+        # dpid -> {cookie de regla: RuleCounters}
+        self._switches = {}
+
+    def track_switch(self, switch_id, rules):
+        """
+        Comienza (o reinicia) el seguimiento de las reglas instaladas en un switch.
+
+        Se conservan los contadores de las reglas que siguen instaladas.
+        Cada regla se identifica por su cookie, que el switch devuelve en
+        las estadísticas de cada flow.
+
+        Args:
+            switch_id (int): DPID del switch
+            rules (iterable): FirewallRule instaladas
+        """
+        previous = self._switches.get(switch_id, {})
+        current = {}
+        for rule in rules:
+            cookie = rule.cookie()
+            current[cookie] = previous.get(cookie) or RuleCounters(rule)
+        self._switches[switch_id] = current
+
+    def track_rule(self, switch_id, rule):
+        """Agrega una regla al seguimiento de un switch (si no estaba)."""
+        rules = self._switches.setdefault(switch_id, {})
+        cookie = rule.cookie()
+        if cookie not in rules:
+            rules[cookie] = RuleCounters(rule)
+
+    def forget_switch(self, switch_id):
+        """Deja de seguir un switch desconectado."""
+        self._switches.pop(switch_id, None)
+
+    def update(self, switch_id, cookie, packets, byte_count, now=None):
+        """
+        Actualiza los contadores de una regla con un reporte del switch.
+
+        Si el contador bajó (el flow se reinstaló) la tasa se calcula
+        desde cero en lugar de dar un valor negativo.
+
+        Returns:
+            bool: True si la cookie corresponde a una regla seguida
+        """
+        counters = self._switches.get(switch_id, {}).get(cookie)
+        if counters is None:
+            return False
+
+        if now is None:
+            now = time.time()
+
+        if counters.updated_at is not None and now > counters.updated_at:
+            elapsed = now - counters.updated_at
+            delta_packets = packets - counters.packets if packets >= counters.packets else packets
+            delta_bytes = byte_count - counters.bytes if byte_count >= counters.bytes else byte_count
+            counters.packet_rate = delta_packets / elapsed
+            counters.byte_rate = delta_bytes / elapsed
+
+        counters.packets = packets
+        counters.bytes = byte_count
+        counters.updated_at = now
+        return True
+
+    def get(self, switch_id=None):
+        """
+        Devuelve los contadores de las reglas seguidas.
+
+        Args:
+            switch_id (int): Limitar a un switch (None para todos)
+
+        Returns:
+            list: RuleCounters ordenados por switch
+        """
+        if switch_id is not None:
+            return list(self._switches.get(switch_id, {}).values())
+        return [counters for dpid in sorted(self._switches)
+                for counters in self._switches[dpid].values()]
+
+    def hottest(self, limit=5):
+        """Reglas con mayor tasa de paquetes."""
+        ranked = [c for c in self.get() if c.packet_rate > 0]
+        ranked.sort(key=lambda c: c.packet_rate, reverse=True)
+        return ranked[:limit]
+
+    def dead(self):
+        """Reglas ya reportadas por su switch que nunca matchearon un paquete."""
+        return [c for c in self.get() if c.updated_at is not None and c.packets == 0]
@@ -6,11 +6,24 @@ Módulo para cargar y parsear reglas de firewall desde archivo JSON.
 
 import os
 import json
-from pox.core import core
+import socket
+import struct
+import re
+import logging
+from collections import Counter
+from itertools import product
 
-from pox.lib.addresses import IPAddr
+try:
+    from pox.core import core
+except ImportError:
+    core = None
 
-log = core.getLogger()
+from compiled_rules import (FirewallRule, RuleSet, CompiledRuleSet, 
+                            is_compiled_rules_file, format_ip_prefix)
+
+# Fuera de pox.py (compilador de reglas, benchmarks, suite de tests) el core
+# de POX no está inicializado y core es None: se usa el logging estándar
+log = core.getLogger() if core is not None else logging.getLogger(__name__)
 
 firewall_rules_json = "firewall_rules.json"
 
@@ -19,6 +32,23 @@ MAX_PORT = 65535
 MIN_SWITCH = 1
 DEFAULT_SWITCH = 1
 
+MATCH_FIELDS = ('src_ip', 'dst_ip', 'protocol', 'src_port', 'dst_port', 'dl_type')
+VALID_PROTOCOLS = ('TCP', 'UDP', 'ICMP')
+VALID_ACTIONS = ('ALLOW', 'DROP')
+
+MIN_PRIORITY = 0
+MAX_PRIORITY = 65535
+
+# Cantidad máxima de flows en que se puede expandir una regla con rangos
+# de puertos (el producto de los rangos de src_port y dst_port)
+MAX_EXPANDED_FLOWS = 65536
+
+# Cantidad máxima de errores de validación que se loguean individualmente
+MAX_LOGGED_ERRORS = 10
+
+_IP_PREFIX_RE = re.compile(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})(?:/(\d{1,2}))?')
+_unpack_ip = struct.Struct('!I').unpack
+
 
 def validate_rule(rule, rule_idx):
     """
@@ -26,10 +56,14 @@ def validate_rule(rule, rule_idx):
     
     Campos soportados:
     - switch (int, opcional): Número del switch donde aplicar la regla (default: 1)
-    - src_ip, dst_ip (str): Direcciones IPv4
+    - src_ip, dst_ip (str): Direcciones IPv4 o prefijos CIDR ("10.0.0.0/24")
     - protocol (str): TCP, UDP o ICMP
-    - src_port, dst_port (int): Puertos (1-65535)
+    - src_port, dst_port (int, str o lista): Puertos (1-65535) o rangos
+      ("1024-65535" o [1024, 65535])
     - dl_type (int): Tipo de Ethernet (opcional)
+    - priority (int, opcional): Prioridad OpenFlow 0-65535 (default: 32768)
+    - action (str, opcional): "drop" (default) o "allow"; una regla allow
+      con mayor prioridad abre una excepción dentro de una regla drop
     
     Args:
         rule (dict): Regla a validar
@@ -38,139 +72,601 @@ def validate_rule(rule, rule_idx):
     Returns:
         bool: True si la regla es válida, False en caso contrario
     """
-    if not isinstance(rule, dict):
-        log.warning("Regla %d: No es un diccionario válido", rule_idx)
+    error = check_rule(rule)
+    if error is not None:
+        log.warning("Regla %d: %s", rule_idx, error[1])
         return False
+    return True
+
+
+def check_rule(rule, prefixes=None):
+    """
+    Versión sin logging de validate_rule, usada al cargar archivos grandes.
+    
+    Devuelve el motivo del error en dos partes: una categoría fija (para
+    poder contar errores por tipo) y un detalle con los valores de la regla.
+    
+    Args:
+        rule (dict): Regla a validar
+        prefixes (dict): Si se pasa, se completa con los prefijos ya
+            parseados ('src_ip'/'dst_ip' -> (red, largo)) para no volver
+            a parsearlos al construir la regla
+    
+    Returns:
+        tuple: (categoría, detalle) si la regla es inválida, None si es válida
+    """
+    if not isinstance(rule, dict):
+        return ("Formato inválido", "No es un diccionario válido")
     
     # Al menos un campo de matching
-    valid_fields = ['src_ip', 'dst_ip', 'protocol', 'src_port', 'dst_port', 'dl_type']
-    if not any(field in rule for field in valid_fields):
-        log.warning("Regla %d: No tiene campos de matching válidos", rule_idx)
-        return False
+    if not any(field in rule for field in MATCH_FIELDS):
+        return ("Sin campos de matching", "No tiene campos de matching válidos")
     
     # Protocolo existe
-    if 'protocol' in rule:
-        protocol = rule['protocol'].upper()
-        if protocol not in ['TCP', 'UDP', 'ICMP']:
-            log.warning("Regla %d: Protocolo '%s' inválido (debe ser TCP, UDP o ICMP)", 
-                       rule_idx, rule['protocol'])
-            return False
+    protocol = rule.get('protocol')
+    if protocol is not None:
+        if not isinstance(protocol, str) or protocol.upper() not in VALID_PROTOCOLS:
+            return ("Protocolo inválido", 
+                    "Protocolo '%s' inválido (debe ser TCP, UDP o ICMP)" % (protocol,))
         
         # ICMP no tiene puertos
-        if protocol == 'ICMP' and ('src_port' in rule or 'dst_port' in rule):
-            log.warning("Regla %d: ICMP no puede tener puertos TCP/UDP", rule_idx)
-            return False
+        if protocol.upper() == 'ICMP' and ('src_port' in rule or 'dst_port' in rule):
+            return ("ICMP con puertos", "ICMP no puede tener puertos TCP/UDP")
     
     # Si hay puertos, hay protocolo
-    if ('src_port' in rule or 'dst_port' in rule) and 'protocol' not in rule:
-        log.warning("Regla %d: Puertos requieren especificar 'protocol' (TCP o UDP)", rule_idx)
-        return False
+    elif 'src_port' in rule or 'dst_port' in rule:
+        return ("Puertos sin protocolo", 
+                "Puertos requieren especificar 'protocol' (TCP o UDP)")
     
     # Formato de IPs
-    for ip_field in ['src_ip', 'dst_ip']:
+    for ip_field in ('src_ip', 'dst_ip'):
         if ip_field in rule:
-            ip = rule[ip_field]
-            if not isinstance(ip, str) or not is_valid_ip(ip):
-                log.warning("Regla %d: IP inválida en '%s': %s", rule_idx, ip_field, ip)
-                return False
+            prefix = _parse_ip_prefix(rule[ip_field])
+            if prefix is None:
+                return ("IP inválida", 
+                        "IP inválida en '%s': %s" % (ip_field, rule[ip_field]))
+            if prefixes is not None:
+                prefixes[ip_field] = prefix
     
-    # Puertos (rango 1-65535)
-    for port_field in ['src_port', 'dst_port']:
+    # Puertos o rangos de puertos (1-65535)
+    flows = 1
+    for port_field in ('src_port', 'dst_port'):
         if port_field in rule:
             try:
-                port = int(rule[port_field])
-                if port < MIN_PORT or port > MAX_PORT:
-                    log.warning("Regla %d: Puerto fuera de rango en '%s': %d", 
-                               rule_idx, port_field, port)
-                    return False
+                low, high = parse_port_range(rule[port_field])
             except (ValueError, TypeError):
-                log.warning("Regla %d: Puerto inválido en '%s': %s", 
-                           rule_idx, port_field, rule[port_field])
-                return False
+                return ("Puerto inválido", 
+                        "Puerto inválido en '%s': %s" % (port_field, rule[port_field]))
+            if low < MIN_PORT or high > MAX_PORT or low > high:
+                return ("Puerto fuera de rango", 
+                        "Puerto fuera de rango en '%s': %s" % (port_field, rule[port_field]))
+            # un rango que cubre todos los puertos es un comodín (ver expand_rule)
+            if low > MIN_PORT or high < MAX_PORT:
+                flows *= high - low + 1
+    
+    if flows > MAX_EXPANDED_FLOWS:
+        return ("Expansión de puertos excesiva", 
+                "Los rangos de puertos se expanden a %d flows (máximo %d)" 
+                % (flows, MAX_EXPANDED_FLOWS))
+    
+    # Prioridad OpenFlow (opcional, 0-65535)
+    if 'priority' in rule:
+        priority = rule['priority']
+        # bool es subclase de int: "priority": true no es una prioridad válida
+        if (not isinstance(priority, int) or isinstance(priority, bool) or 
+                priority < MIN_PRIORITY or priority > MAX_PRIORITY):
+            return ("Prioridad inválida", 
+                    "Prioridad inválida: %s (debe estar entre %d y %d)" 
+                    % (priority, MIN_PRIORITY, MAX_PRIORITY))
+    
+    # Acción (opcional, por defecto drop)
+    if 'action' in rule:
+        action = rule['action']
+        if not isinstance(action, str) or action.upper() not in VALID_ACTIONS:
+            return ("Acción inválida", 
+                    "Acción '%s' inválida (debe ser allow o drop)" % (action,))
     
     # numero de switch sobre el que se aplica la regla (opcional, por defecto lo vamos a settear en 1)
     if 'switch' in rule:
         try:
             switch_id = int(rule['switch'])
-            if switch_id < MIN_SWITCH:
-                log.warning("Regla %d: Número de switch inválido: %d (debe ser >= %d)", 
-                           rule_idx, switch_id, MIN_SWITCH)
-                return False
         except (ValueError, TypeError):
-            log.warning("Regla %d: Número de switch no es un entero válido: %s", 
-                       rule_idx, rule['switch'])
-            return False
+            return ("Switch inválido", 
+                    "Número de switch no es un entero válido: %s" % (rule['switch'],))
+        if switch_id < MIN_SWITCH:
+            return ("Switch inválido", 
+                    "Número de switch inválido: %d (debe ser >= %d)" % (switch_id, MIN_SWITCH))
     
-    return True
+    return None
 
 
 def is_valid_ip(ip_str):
     """
-    Valida formato de dirección IPv4.
+    Valida formato de dirección IPv4 o prefijo CIDR.
     
     Args:
-        ip_str (str): String con dirección IP
+        ip_str (str): String con dirección IP ("10.0.0.1") o prefijo ("10.0.0.0/24")
     
     Returns:
         bool: True si es una IP válida, False en caso contrario
     """
+    return _parse_ip_prefix(ip_str) is not None
+
+
+def parse_ip_prefix(ip_str):
+    """
+    Convierte una dirección IPv4 o prefijo CIDR a (red, longitud).
+    
+    Los bits de host del prefijo deben estar en cero ("10.0.0.1/24" es inválido).
+    
+    Args:
+        ip_str (str): Dirección ("10.0.0.1") o prefijo ("10.0.0.0/24")
+    
+    Returns:
+        tuple: (red como entero de 32 bits, longitud del prefijo)
+    
+    Raises:
+        ValueError: Si el formato es inválido
+    """
+    parsed = _parse_ip_prefix(ip_str)
+    if parsed is None:
+        raise ValueError("Dirección IPv4 o prefijo inválido: %s" % (ip_str,))
+    return parsed
 
-    if not isinstance(ip_str, str):
-        return False
 
+def _parse_ip_prefix(ip_str):
+    """
+    Parseo rápido de IPv4/CIDR con una expresión regular precompilada.
+    
+    Evita construir un IPAddr por cada dirección, que domina el tiempo
+    de carga con archivos de cientos de miles de reglas.
+    
+    Returns:
+        tuple: (red, longitud) o None si el formato es inválido
+    """
+    if not isinstance(ip_str, str):
+        return None
+    
+    m = _IP_PREFIX_RE.fullmatch(ip_str)
+    if m is None:
+        return None
+    
+    addr, length = m.groups()
     try:
-        IPAddr(ip_str)  # acepta solo IPv4
-        return True
-    except:
-        return False
+        # inet_pton rechaza octetos > 255; el formato ya lo validó la regex
+        network = _unpack_ip(socket.inet_pton(socket.AF_INET, addr))[0]
+    except OSError:
+        return None
+    
+    prefix_len = int(length) if length is not None else 32
+    if prefix_len > 32:
+        return None
+    
+    if network & ~_prefix_mask(prefix_len) & 0xffffffff:
+        return None
+    
+    return network, prefix_len
 
 
+def _prefix_mask(prefix_len):
+    """Máscara de red de 32 bits para una longitud de prefijo."""
+    return (0xffffffff << (32 - prefix_len)) & 0xffffffff
 
-def load_firewall_rules():
+
+def parse_port_range(value):
     """
-    Carga y valida las reglas de firewall desde el archivo JSON.
+    Convierte un puerto o rango de puertos a (desde, hasta).
+    
+    Formatos aceptados: 80, "80", "1024-65535", [1024, 65535].
+    
+    Raises:
+        ValueError, TypeError: Si el formato es inválido
+    """
+    if isinstance(value, (list, tuple)):
+        if len(value) != 2:
+            raise ValueError("El rango debe tener dos extremos")
+        return int(value[0]), int(value[1])
+    if isinstance(value, str) and '-' in value:
+        low, high = value.split('-', 1)
+        return int(low), int(high)
+    port = int(value)
+    return port, port
+
+
+def expand_rule(rule):
+    """
+    Expande una regla con rangos de puertos a reglas de puerto único.
+    
+    OpenFlow 1.0 no admite máscaras en tp_src/tp_dst: un rango que cubre
+    todos los puertos válidos se traduce en un comodín (una sola entrada)
+    y cualquier otro rango se expande a una entrada por puerto. Los
+    prefijos CIDR no necesitan expansión porque nw_src/nw_dst sí admiten
+    wildcards por bits.
+    
+    Las reglas se generan de a una, sin armar el producto de los rangos
+    en memoria; check_rule ya limita su cantidad a MAX_EXPANDED_FLOWS.
+    
+    Args:
+        rule (dict): Regla validada
+    
+    Yields:
+        dict: Reglas equivalentes con puertos únicos
+    """
+    fields = []
+    ranges = []
+    for port_field in ['src_port', 'dst_port']:
+        if port_field not in rule:
+            continue
+        
+        low, high = parse_port_range(rule[port_field])
+        if low <= MIN_PORT and high >= MAX_PORT:
+            del rule[port_field]
+        elif low == high:
+            rule[port_field] = low
+        else:
+            fields.append(port_field)
+            ranges.append(range(low, high + 1))
+    
+    if not fields:
+        yield rule
+        return
+    
+    for ports in product(*ranges):
+        yield dict(rule, **dict(zip(fields, ports)))
+
+
+# Posiciones de las IPs dentro de la clave (y del match) de una regla
+IP_KEY_FIELDS = (2, 3)
+
+
+def _key_pattern(match):
+    """
+    Forma de un match: qué campos son comodines y qué largo tiene cada prefijo.
+    
+    Las reglas de un archivo suelen compartir unas pocas formas, así que
+    buscar coberturas por forma evita probar todas las combinaciones de
+    comodines de cada regla.
+    """
+    pattern = []
+    for i in range(1, len(match)):
+        value = match[i]
+        if value is None:
+            pattern.append(None)
+        elif i in IP_KEY_FIELDS:
+            pattern.append(value[1])
+        else:
+            pattern.append(True)
+    return tuple(pattern)
+
+
+def _pattern_covers(general, specific):
+    """Indica si toda clave con forma `specific` puede estar cubierta por una con forma `general`."""
+    for g, s in zip(general, specific):
+        if g is None:
+            continue
+        if s is None or (g is True) != (s is True) or (g is not True and g > s):
+            return False
+    return True
+
+
+def _generalizations(match, patterns):
+    """
+    Genera los matches iguales o más generales que cubren a uno dado.
+    
+    Cada campo definido puede convertirse en comodín y cada IP puede
+    además reemplazarse por un prefijo más corto que la contenga. Solo
+    se generan los matches cuya forma (ver _key_pattern) existe en el
+    conjunto de reglas. El switch nunca se generaliza.
+    
+    Args:
+        match (tuple): Match de la regla (ver FirewallRule.match)
+        patterns (list): Formas presentes que cubren a la del match
+    """
+    for pattern in patterns:
+        general = [match[0]]
+        for i, p in enumerate(pattern, 1):
+            if p is None:
+                general.append(None)
+            elif p is True:
+                general.append(match[i])
+            else:
+                general.append((match[i][0] & _prefix_mask(p), p))
+        yield tuple(general)
+
+
+def _merge_sibling_prefixes(by_key):
+    """
+    Une pares de reglas que solo difieren en una IP con prefijos hermanos.
+    
+    Por ejemplo 10.0.0.0/25 y 10.0.0.128/25 se reemplazan por 10.0.0.0/24.
+    El proceso se repite hasta que no queden pares para unir.
+    
+    Args:
+        by_key (dict): clave -> regla (se modifica in-place)
     
     Returns:
-        list: Lista de reglas válidas (diccionarios) o lista vacía si hay error
+        int: Cantidad de uniones realizadas
     """
-    try:
-        # Buscamos el archivo en el directorio actual 
-        path = os.path.join(os.path.dirname(__file__), firewall_rules_json)
+    merges = 0
+    pending = list(by_key)
+    while pending:
+        key = pending.pop()
+        if key not in by_key:
+            continue
         
-        with open(path, 'r') as rules:
-            data = json.load(rules)
-            rules_list = data.get('rules', [])
+        for i in IP_KEY_FIELDS:
+            if key[i] is None or key[i][1] == 0:
+                continue
             
-            if not rules_list:
-                log.warning("El archivo JSON no contiene reglas")
-                return []
+            network, length = key[i]
+            sibling = list(key)
+            sibling[i] = (network ^ (1 << (32 - length)), length)
+            sibling = tuple(sibling)
+            if sibling not in by_key:
+                continue
             
-            # Validación de cada regla
-            valid_rules = []
-            for idx, rule in enumerate(rules_list, 1):
-                if validate_rule(rule, idx):
-                    # asignamos un switch por defecto si no esta especificado en la regla
-                    if 'switch' not in rule:
-                        rule['switch'] = DEFAULT_SWITCH
-                        log.debug("Regla %d: Asignando switch por defecto (%d)", idx, DEFAULT_SWITCH)
-                    valid_rules.append(rule)
-                else:
-                    log.error("Regla %d ignorada por errores de validación", idx)
+            parent = list(key)
+            parent[i] = (network & _prefix_mask(length - 1), length - 1)
+            parent = tuple(parent)
             
-            log.info("Reglas cargadas desde %s: %d válidas de %d totales", 
-                    path, len(valid_rules), len(rules_list))
+            rule = by_key.pop(key)
+            del by_key[sibling]
+            merges += 1
+            if parent not in by_key:
+                by_key[parent] = FirewallRule.from_key(parent, rule.description)
+                pending.append(parent)
+            log.debug("Prefijos hermanos unidos en %s", format_ip_prefix(*parent[i]))
+            break
+    
+    return merges
+
+
+def _find_cover(rule, generalizations, by_match):
+    """
+    Busca una regla que haga innecesaria a `rule` (ver compact_rules).
+    
+    Args:
+        rule (FirewallRule): Regla a evaluar
+        generalizations (list): Matches iguales o más generales que el de la regla
+        by_match (dict): match -> reglas con ese match
+    
+    Returns:
+        FirewallRule: La regla que la cubre, o None
+    """
+    for general in generalizations:
+        for other in by_match.get(general, ()):
+            if other is rule:
+                continue
+            if other.priority > rule.priority or \
+                    (other.priority == rule.priority and other.action == rule.action):
+                return other
+    return None
+
+
+def compact_rules(rules):
+    """
+    Elimina reglas duplicadas o sombreadas antes de instalarlas.
+    
+    - Duplicada: otra regla genera exactamente el mismo match en el
+      mismo switch. Se conserva la primera y se combinan descripciones.
+    - Prefijos hermanos: dos reglas idénticas (incluyendo prioridad y
+      acción) salvo por una IP cuyos prefijos juntos forman uno más corto
+      se unen en una sola regla.
+    - Sombreada: otra regla del mismo switch, con todos sus campos iguales,
+      comodines o prefijos que la contienen, tiene mayor prioridad (y
+      entonces esta regla nunca matchea) o la misma prioridad y la misma
+      acción (y entonces esta regla no cambia el resultado).
+    
+    Quitar estas reglas no cambia la política pero reduce las entradas
+    ocupadas en la tabla del switch. Dos reglas con el mismo match y la
+    misma prioridad pero acciones distintas se informan como conflicto
+    (OpenFlow no define cuál se aplica).
+    
+    Args:
+        rules (list): FirewallRule validadas y expandidas
+    
+    Returns:
+        list: Reglas necesarias
+    """
+    by_key = {}
+    duplicates = 0
+    for rule in rules:
+        key = rule.key()
+        kept = by_key.get(key)
+        if kept is None:
+            by_key[key] = rule
+            continue
+        
+        duplicates += 1
+        desc = rule.description
+        if desc and desc != kept.description:
+            kept.description = "%s | %s" % (kept.description or 'Sin descripción', desc)
+        log.debug("Regla duplicada combinada: %s", desc or key)
+    
+    merged = _merge_sibling_prefixes(by_key)
+    
+    by_match = {}
+    for rule in by_key.values():
+        by_match.setdefault(rule.match(), []).append(rule)
+    
+    # formas presentes -> formas que las cubren
+    covering = dict.fromkeys(_key_pattern(match) for match in by_match)
+    for pattern in covering:
+        covering[pattern] = [p for p in covering if _pattern_covers(p, pattern)]
+    
+    compacted = []
+    shadowed = 0
+    for match, rules_with_match in by_match.items():
+        if len(set((r.priority, r.action) for r in rules_with_match)) > \
+                len(set(r.priority for r in rules_with_match)):
+            log.warning("Conflicto: reglas con el mismo match y prioridad pero distinta acción (%s)", 
+                        rules_with_match[0].description or match)
+        
+        generalizations = list(_generalizations(match, covering[_key_pattern(match)]))
+        for rule in rules_with_match:
+            cover = _find_cover(rule, generalizations, by_match)
+            if cover is not None:
+                shadowed += 1
+                log.debug("Regla '%s' sombreada por '%s'", 
+                          rule.description or rule.key(), cover.description or cover.key())
+                continue
+            compacted.append(rule)
+    
+    if duplicates or merged or shadowed:
+        log.info("Compactación de reglas: %d duplicada(s), %d unión(es) de prefijos "
+                 "y %d sombreada(s) (%d -> %d)", 
+                 duplicates, merged, shadowed, len(rules), len(compacted))
+    
+    return compacted
+
+
+def get_rules_path():
+    """
+    Devuelve la ruta absoluta del archivo de reglas.
+    
+    Returns:
+        str: Ruta de firewall_rules.json dentro de controller/
+    """
+    return os.path.join(os.path.dirname(__file__), firewall_rules_json)
+
+
+def iter_rules_file(path):
+    """
+    Itera las reglas de un archivo sin validarlas.
+    
+    Formatos soportados:
+    - .json: objeto con la lista "rules" (se carga completo)
+    - .jsonl: una regla JSON por línea, leída de a una para no tener el
+      archivo completo en memoria. Las líneas vacías o que empiezan con
+      '#' se ignoran; una línea con JSON inválido se devuelve como None
+      para que cuente como regla inválida sin abortar la carga.
+    
+    Args:
+        path (str): Ruta del archivo de reglas
+    
+    Yields:
+        dict: Cada regla tal como figura en el archivo
+    """
+    with open(path, 'r') as rules:
+        if not path.endswith('.jsonl'):
+            data = json.load(rules)
+            yield from data.get('rules', [])
+            return
+        
+        for line in rules:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+def load_firewall_rules(raise_errors=False, path=None):
+    """
+    Carga y valida las reglas de firewall desde el archivo JSON.
+    
+    Los errores de validación se agregan por categoría: solo se loguean
+    los primeros MAX_LOGGED_ERRORS en detalle y luego un resumen.
+    
+    Args:
+        raise_errors (bool): Si es True, los errores de lectura o parseo
+            se propagan en lugar de devolver una lista vacía (útil al
+            recargar, para no confundir un archivo roto con "sin reglas")
+        path (str): Archivo de reglas (.json o .jsonl). Por defecto
+            controller/firewall_rules.json
+    
+    Returns:
+        list: Lista de reglas válidas (FirewallRule) o lista vacía si hay error
+    """
+    if path is None:
+        # Buscamos el archivo en el directorio actual 
+        path = get_rules_path()
+    
+    try:
+        valid_rules = []
+        errors = Counter()
+        total = 0
+        
+        for total, rule in enumerate(iter_rules_file(path), 1):
+            prefixes = {}
+            error = check_rule(rule, prefixes)
+            if error is not None:
+                errors[error[0]] += 1
+                if sum(errors.values()) <= MAX_LOGGED_ERRORS:
+                    log.warning("Regla %d ignorada: %s", total, error[1])
+                continue
             
-            return valid_rules
+            # asignamos un switch por defecto si no esta especificado en la regla
+            if 'switch' not in rule:
+                rule['switch'] = DEFAULT_SWITCH
+            
+            if 'src_port' in rule or 'dst_port' in rule:
+                for expanded in expand_rule(rule):
+                    valid_rules.append(FirewallRule.from_dict(expanded, parse_ip_prefix, prefixes))
+            else:
+                valid_rules.append(FirewallRule.from_dict(rule, parse_ip_prefix, prefixes))
+        
+        if total == 0:
+            log.warning("El archivo JSON no contiene reglas")
+            return []
+        
+        if errors:
+            log.error("%d regla(s) ignorada(s) por errores de validación:", sum(errors.values()))
+            for reason, count in errors.most_common():
+                log.error("  %s: %d", reason, count)
+        
+        log.info("Reglas cargadas desde %s: %d flow(s) a partir de %d reglas", 
+                path, len(valid_rules), total)
+        
+        return compact_rules(valid_rules)
             
     except FileNotFoundError:
-        log.error("Archivo de configuración '%s' no encontrado en %s", 
-                 firewall_rules_json, os.path.dirname(__file__))
+        log.error("Archivo de configuración '%s' no encontrado", path)
         log.error("Asegurate de que el archivo exista en el directorio 'controller/'")
+        if raise_errors:
+            raise
         return []
     except json.JSONDecodeError as e:
         log.error("Error al parsear JSON: %s", e)
         log.error("Verificá que el archivo JSON tenga sintaxis válida")
+        if raise_errors:
+            raise
         return []
     except Exception as e:
         log.error("Error inesperado al cargar reglas: %s", e)
-        return []
\ No newline at end of file
+        if raise_errors:
+            raise
+        return []
+
+
+def load_rule_set(raise_errors=False, path=None):
+    """
+    Carga las reglas como un conjunto agrupado por switch.
+    
+    Si el archivo es un compilado (ver compiled_rules.py) se mapea en
+    memoria sin parsear ni validar; si no, se carga con load_firewall_rules.
+    
+    Args:
+        raise_errors (bool): Ver load_firewall_rules
+        path (str): Archivo de reglas (.json, .jsonl o compilado)
+    
+    Returns:
+        RuleSet o CompiledRuleSet
+    """
+    if path is None:
+        path = get_rules_path()
+    
+    if is_compiled_rules_file(path):
+        try:
+            rule_set = CompiledRuleSet(path)
+        except (OSError, ValueError) as e:
+            log.error("Error al abrir reglas compiladas: %s", e)
+            if raise_errors:
+                raise
+            return RuleSet([])
+        log.info("Reglas compiladas cargadas desde %s: %d", path, len(rule_set))
+        return rule_set
+    
+    return RuleSet(load_firewall_rules(raise_errors, path))
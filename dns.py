@@ -85,7 +85,6 @@
 #======================================================================
 
 # TODO:
-#   SOA data
 #   General cleaup/rewrite (code is/has gotten pretty bad)
 
 import struct
@@ -113,7 +112,9 @@ rrtype_to_str = {
    14: "MINFO",    # mailbox or mail list information
    15: "MX"   ,    # mail exchange
    16: "TXT",      # text strings
-   28: "AAAA" # IPV6 address request
+   28: "AAAA", # IPV6 address request
+   33: "SRV",      # service locator (RFC 2782)
+   41: "OPT",      # EDNS0 pseudo-RR (RFC 6891)
 }
 
 rrclass_to_str = {
@@ -124,6 +125,188 @@ rrclass_to_str = {
   255 :"* "  #  255 any class
 }
 
+# Fixed-size parts of the message, read in place with unpack_from
+_HEADER   = struct.Struct("!HBBHHHH")
+_QUESTION = struct.Struct("!HH")    # qtype, qclass
+_RR       = struct.Struct("!HHIH")  # type, class, ttl, rdlength
+_UINT16   = struct.Struct("!H")     # compression pointers, RDLENGTH
+_SOA      = struct.Struct("!IIIII") # serial, refresh, retry, expire, minimum
+_SRV      = struct.Struct("!HHH")   # priority, weight, port
+_OPTION   = struct.Struct("!HH")    # EDNS0 option code, length
+
+_MAX_LABEL   = 63      # RFC 1035 2.3.4
+_MAX_NAME    = 255     # RFC 1035 3.1, in wire form
+_MAX_POINTER = 0x3fff  # compression offsets are 14 bits
+
+# A 255-byte name has at most 127 labels, so a legitimate name never
+# needs more compression pointers than that
+_MAX_POINTER_HOPS = 127
+
+_EMPTY = b''
+
+
+class _name_table (object):
+  """
+  Names of one parsed message, each decoded at most once
+
+  Every name read through it is memoized by offset, together with the
+  suffixes that compression pointers led to, so the many records whose
+  names point back to the question name only decode it once.  Lives as
+  long as the message and the records that have not read their name yet.
+  """
+  __slots__ = ('buf', 'cache')
+
+  def __init__ (self, buf):
+    self.buf = buf
+    self.cache = {}
+
+  def read (self, index):
+    """Name at index, as bytes"""
+    return self.read_at(index)[1]
+
+  def read_at (self, index):
+    """(index just past the name, name) for the name at index"""
+    hit = self.cache.get(index)
+    if hit is not None:
+      return hit
+    return dns.read_dns_name_from_index(self.buf, index, self.cache)
+
+
+class DNSNameError (ValueError):
+  """
+  Malformed name: pointer loop, too many pointers, too long or bad label
+
+  Logged like truncation (not as an error), since crafted packets can
+  trigger it at line rate.
+  """
+  pass
+
+
+def _name_bytes (name):
+  """
+  Names may be given as str (ASCII) or bytes (as the parser returns them)
+  """
+  if isinstance(name, str):
+    return name.encode('ascii')
+  return bytes(name)
+
+
+# How each part of an RDATA is written (see _rdata_parts)
+_RAW               = 0
+_NAME              = 1  # compressed against earlier names
+_NAME_UNCOMPRESSED = 2  # SRV targets (RFC 2782)
+
+
+def _rdata_parts (r):
+  """
+  Wire form of the RDATA of a record to serialize
+
+  Returns a list of (data, kind) written in order, where kind is _RAW for
+  bytes or _NAME/_NAME_UNCOMPRESSED for names.
+  """
+  if isinstance(r.rddata, dns._rdata):
+    return r.rddata._parts()
+  if r.qtype in (2,12,5): # NS, PTR, CNAME
+    return [(_name_bytes(r.rddata), _NAME)]
+  elif r.qtype == 15: # MX given as just the exchange name
+    return [(_UINT16.pack(0), _RAW), (_name_bytes(r.rddata), _NAME)]
+  elif r.qtype == 1: # A
+    addr = r._rddata
+    if not isinstance(addr, bytes):
+      addr = (addr if isinstance(addr, IPAddr) else IPAddr(addr)).raw
+    return [(addr, _RAW)]
+  elif r.qtype == 28: # AAAA
+    addr = r._rddata
+    if not isinstance(addr, bytes):
+      addr = (addr if isinstance(addr, IPAddr6) else IPAddr6(addr)).raw
+    return [(addr, _RAW)]
+  elif isinstance(r.rddata, str):
+    return [(r.rddata.encode('latin-1'), _RAW)]
+  else:
+    return [(bytes(r.rddata), _RAW)]
+
+
+def _rdata_field (slot):
+  """
+  Read-only property for a field of a structured RDATA, which decodes
+  the RDATA on first access if it was parsed lazily
+
+  If decoding failed, the fields it did not reach raise the same error
+  again instead of decoding the RDATA once more.
+  """
+  def get (self):
+    if self._names is not None:
+      self._decode()
+    try:
+      return getattr(self, slot)
+    except AttributeError:
+      raise self._error
+  return property(get)
+
+
+def _malformed (e):
+  """How a name or RDATA that fails to decode is shown"""
+  return "<malformed: %s>" % (e,)
+
+
+def _text (name):
+  """Names and strings are bytes; show them as text"""
+  if isinstance(name, (bytes, bytearray)):
+    return name.decode('ascii', 'backslashreplace')
+  return str(name)
+
+
+def _flag_table (flags):
+  """
+  For each value of a header flags byte, the dict of fields it sets
+
+  flags is a sequence of (attribute, mask, shift); single-bit masks
+  give booleans.
+  """
+  table = []
+  for value in range(256):
+    fields = {}
+    for attr, mask, shift in flags:
+      v = (value & mask) >> shift
+      fields[attr] = bool(v) if mask >> shift == 1 else v
+    table.append(fields)
+  return table
+
+# Header fields set by the two flag bytes (see RFC 1035 4.1.1, RFC 4035)
+_FLAGS0 = _flag_table((('qr', 0x80, 7), ('opcode', 0x70, 4), ('aa', 0x04, 2),
+                       ('tc', 0x02, 1), ('rd', 0x01, 0)))
+_FLAGS1 = _flag_table((('ra', 0x80, 7), ('z', 0x40, 6), ('ad', 0x20, 5),
+                       ('cd', 0x10, 4), ('rcode', 0x0f, 0)))
+
+
+_SECTION_NAMES = ('questions', 'answers', 'authoritative name servers',
+                  'additional resource records')
+_SECTION_ATTRS = ('_questions', '_answers', '_authorities', '_additional')
+
+# Shared by every empty section until a list is needed for it
+_NO_RECORDS = ()
+
+
+def _section (number, attr):
+  """
+  Property for a message section, decoding it on first access if the
+  message was parsed lazily
+
+  Empty sections share _NO_RECORDS and get their own list only when
+  accessed, so they can be appended to.
+  """
+  def get (self):
+    records = self._records(number)
+    if records is _NO_RECORDS:
+      records = []
+      setattr(self, attr, records)
+    return records
+  def set (self, value):
+    if self._pending is not None:
+      self._decode_sections(len(_SECTION_NAMES) - 1)
+    setattr(self, attr, value)
+  return property(get, set)
+
 
 class dns(packet_base):
     "DNS Packet struct"
@@ -137,15 +320,31 @@ class dns(packet_base):
     MDNS_PORT   = 5353
     MIN_LEN     = 12
 
-    def __init__(self, raw=None, prev=None, **kw):
+    # When true, parse() only decodes the header and each section is
+    # decoded the first time it is accessed.  Can be set on the class to
+    # affect the messages POX parses from PacketIns.
+    lazy = False
+
+    questions   = _section(0, '_questions')
+    answers     = _section(1, '_answers')
+    authorities = _section(2, '_authorities')
+    additional  = _section(3, '_additional')
+
+    def __init__(self, raw=None, prev=None, lazy=None, **kw):
         packet_base.__init__(self)
 
         self.prev = prev
+        if lazy is not None:
+            self.lazy = lazy
 
-        self.questions   = []
-        self.answers     = []
-        self.authorities = []
-        self.additional  = []
+        # (buffer, offset, next section, counts) while sections remain
+        # to be decoded
+        self._pending = None
+
+        self._questions   = _NO_RECORDS
+        self._answers     = _NO_RECORDS
+        self._authorities = _NO_RECORDS
+        self._additional  = _NO_RECORDS
 
         self.id = 0
         self.qr = False # Is Query
@@ -165,6 +364,52 @@ class dns(packet_base):
 
         self._init(kw)
 
+    @classmethod
+    def parse_batch (cls, payloads, lazy=True):
+      """
+      Parses each raw message in payloads (e.g., from a capture or a queue
+      of PacketIns), yielding one dns object per message in order
+
+      Equivalent to dns(raw=payload, lazy=lazy) for each payload, but the
+      constructor runs only once.  Each message's attributes start as a
+      copy of a template dict holding the defaults of a freshly built
+      instance plus the header flags, with one template per combination
+      of flag bytes seen.  Messages are lazy by default, so sections are
+      only decoded for the messages that use them.  Messages that fail to
+      parse are yielded with parsed False.
+      """
+      defaults = cls(lazy=lazy).__dict__
+      templates = {}
+      new = object.__new__
+      unpack = _HEADER.unpack_from
+      for raw in payloads:
+        o = new(cls)
+        view = raw if isinstance(raw, memoryview) else memoryview(raw)
+        if len(view) < dns.MIN_LEN:
+          o.__dict__.update(defaults)
+          o.parse(raw) # logs the problem
+          yield o
+          continue
+        (id, bits0, bits1, total_questions, total_answers, total_auth_rr,
+         total_add_rr) = unpack(view, 0)
+        template = templates.get((bits0, bits1))
+        if template is None:
+          template = dict(defaults)
+          template.update(_FLAGS0[bits0])
+          template.update(_FLAGS1[bits1])
+          templates[bits0, bits1] = template
+        fields = template.copy()
+        fields['raw'] = raw
+        fields['id'] = id
+        fields['_names'] = _name_table(view)
+        fields['_pending'] = (view, _HEADER.size, 0,
+                              (total_questions, total_answers,
+                               total_auth_rr, total_add_rr))
+        o.__dict__ = fields
+        if lazy or o._decode_sections(len(_SECTION_NAMES) - 1):
+          fields['parsed'] = True
+        yield o
+
     def _exc (self, e, part = None):
       """
       Turn exception into log message
@@ -174,12 +419,20 @@ class dns(packet_base):
         msg += " " + part
       msg += ": "
       msg += str(e)
-      if isinstance(e, Trunc):
+      if isinstance(e, (Trunc, DNSNameError)):
         self.msg(msg)
       else:
         self.err(msg)
 
     def hdr (self, payload):
+        """
+        Serializes the message
+
+        The whole message is written into a single bytearray sized for the
+        worst case (no compression), every field is packed in place and
+        the result is trimmed at the end.  RDLENGTH is patched in place
+        once each RDATA has been written.
+        """
         bits0 = 0
         if self.qr: bits0 |= 0x80
         bits0 |= (self.opcode & 0x7) << 4
@@ -193,141 +446,166 @@ class dns(packet_base):
         if self.cd: bits1 |= 0x10
         bits1 |= (self.rcode & 0xf)
 
-        s = struct.pack("!HBBHHHH", self.id, bits0, bits1,
-                        len(self.questions), len(self.answers),
-                        len(self.authorities), len(self.additional))
-
-        def makeName (labels, term):
-          o = '' #TODO: unicode
-          for l in labels.split('.'):
-            o += chr(len(l))
-            o += l
-          if term: o += '\x00'
-          return o
-
-        name_map = {}
-
-        def putName (s, name):
-          pre = ''
-          post = name
-          while True:
-            at = s.find(makeName(post, True))
-            if at == -1:
-              if post in name_map:
-                at = name_map[post]
-            if at == -1:
-              post = post.split('.', 1)
-              if pre: pre += '.'
-              pre += post[0]
-              if len(post) == 1:
-                if len(pre) == 0:
-                  s += '\x00'
-                else:
-                  name_map[name] = len(s)
-                  s += makeName(pre, True)
-                break
-              post = post[1]
-            else:
-              if len(pre) > 0:
-                name_map[name] = len(s)
-                s += makeName(pre, False)
-              s += struct.pack("!H", at | 0xc000)
-              break
-          return s
-
-        def putData (s, r):
-          if r.qtype in (2,12,5,15): # NS, PTR, CNAME, MX
-            return putName(s, r.rddata)
-          elif r.qtype == 1: # A
-            assert isinstance(r.rddata, IPAddr)
-            return s + r.rddata.raw
-          elif r.qtype == 28: # AAAA
-            assert isinstance(r.rddata, IPAddr6)
-            return s + r.rddata.raw
+        questions = [(_name_bytes(r.name), r) for r in self._records(0)]
+        rest = [(_name_bytes(r.name), r, _rdata_parts(r))
+                for n in (1, 2, 3) for r in self._records(n)]
+
+        # names take at most len + 2 bytes (first length byte, root label)
+        size = _HEADER.size
+        for name, r in questions:
+          size += len(name) + 2 + _QUESTION.size
+        for name, r, parts in rest:
+          size += len(name) + 2 + _RR.size
+          for data, kind in parts:
+            size += len(data) + 2
+
+        s = bytearray(size)
+        _HEADER.pack_into(s, 0, self.id, bits0, bits1,
+                          len(questions), len(self._records(1)),
+                          len(self._records(2)), len(self._records(3)))
+
+        # name suffix already written -> its offset in s
+        suffixes = {}
+
+        def putName (offset, name, compress=True):
+          """
+          Writes name at offset, compressed against the suffixes already
+          written (unless compress is false), and returns the offset just
+          past it
+
+          Each suffix is looked up once in the dict, so writing a name costs
+          time proportional to its length, not to the size of the message.
+          """
+          name = name.rstrip(b'.')
+          pos = 0
+          while pos < len(name):
+            suffix = name[pos:]
+            at = suffixes.get(suffix) if compress else None
+            if at is not None:
+              _UINT16.pack_into(s, offset, 0xc000 | at)
+              return offset + 2
+            if offset <= _MAX_POINTER:
+              suffixes[suffix] = offset
+            dot = name.find(b'.', pos)
+            if dot == -1:
+              dot = len(name)
+            label_len = dot - pos
+            if not 0 < label_len <= _MAX_LABEL:
+              raise ValueError("(dns) invalid label in name %r" % (name,))
+            s[offset] = label_len
+            s[offset+1:offset+1+label_len] = name[pos:dot]
+            offset += 1 + label_len
+            pos = dot + 1
+          s[offset] = 0
+          return offset + 1
+
+        offset = _HEADER.size
+        for name, r in questions:
+          offset = putName(offset, name)
+          _QUESTION.pack_into(s, offset, r.qtype, r.qclass)
+          offset += _QUESTION.size
+
+        for name, r, parts in rest:
+          offset = putName(offset, name)
+          if isinstance(r.rddata, dns.opt):
+            qclass, ttl = r.rddata._class_ttl()
           else:
-            return s + r.rddata
-
-        for r in self.questions:
-          s = putName(s, r.name)
-          s += struct.pack("!HH", r.qtype, r.qclass)
-
-        rest = self.answers + self.authorities + self.additional
-        for r in rest:
-          s = putName(s, r.name)
-          s += struct.pack("!HHIH", r.qtype, r.qclass, r.ttl, 0)
-          fixup = len(s) - 2
-          s = putData(s, r)
-          fixlen = len(s) - fixup - 2
-          s = s[:fixup] + struct.pack('!H', fixlen) + s[fixup+2:]
+            qclass, ttl = r.qclass, r.ttl
+          _RR.pack_into(s, offset, r.qtype, qclass, ttl, 0)
+          offset += _RR.size
+          start = offset
+          for data, kind in parts:
+            if kind == _RAW:
+              s[offset:offset+len(data)] = data
+              offset += len(data)
+            else:
+              offset = putName(offset, data, kind == _NAME)
+          _UINT16.pack_into(s, start - 2, offset - start)
 
-        return s
+        del s[offset:]
+        return bytes(s)
 
     def parse(self, raw):
-        assert isinstance(raw, bytes)
+        """
+        Parses a DNS message without copying it
+
+        raw may be bytes, a bytearray or a memoryview.  Everything is read
+        in place through a memoryview; owner names are only materialized
+        (as bytes) when the name attribute of a question or RR is first
+        read, so raw must not be modified while the records are in use.
+        A name whose compression pointers lead outside the message raises
+        TruncatedException when it is read.
+
+        In lazy mode only the header is decoded here; see _decode_sections.
+        """
+        assert isinstance(raw, (bytes, bytearray, memoryview))
         self.raw = raw
+        if not isinstance(raw, memoryview):
+            raw = memoryview(raw)
         dlen = len(raw)
         if dlen < dns.MIN_LEN:
             self.msg('(dns) packet data too short to '
                      + 'parse header: data len %u' % (dlen,))
             return None
 
-        bits0 = 0
-        bits1 = 0
-        total_questions = 0
-        total_answers = 0
-        total_auth_rr = 0
-        total_add_rr = 0
         (self.id, bits0,bits1, total_questions, total_answers,
          total_auth_rr, total_add_rr)\
-             = struct.unpack('!HBBHHHH', raw[:12])
-
-        self.qr = True if (bits0 & 0x80) else False
-        self.opcode = (bits0 >> 4) & (0x07)
-        self.aa     = True if (bits0 & (0x04)) else False
-        self.tc     = True if (bits0 & (0x02)) else False
-        self.rd     = True if (bits0 & (0x01)) else False
-        self.ra     = True if (bits1 & 0x80) else False
-        self.z      = True if (bits1 & 0x40) else False
-        self.ad     = True if (bits1 & 0x20) else False
-        self.cd     = True if (bits1 & 0x10) else False
-        self.rcode  = bits1 & 0x0f
-
-        query_head = 12
-
-        # questions
-        for i in range(0,total_questions):
-            try:
-                query_head = self.next_question(raw, query_head)
-            except Exception as e:
-                self._exc(e, 'parsing questions')
-                return None
-
-        # answers
-        for i in range(0,total_answers):
-            try:
-                query_head = self.next_rr(raw, query_head, self.answers)
-            except Exception as e:
-                self._exc(e, 'parsing answers')
-                return None
+             = _HEADER.unpack_from(raw, 0)
 
-        # authoritative name servers
-        for i in range(0,total_auth_rr):
-            try:
-                query_head = self.next_rr(raw, query_head, self.authorities)
-            except Exception as e:
-                self._exc(e, 'parsing authoritative name servers')
-                return None
+        self.__dict__.update(_FLAGS0[bits0])
+        self.__dict__.update(_FLAGS1[bits1])
 
-        # additional resource records
-        for i in range(0,total_add_rr):
-            try:
-                query_head = self.next_rr(raw, query_head, self.additional)
-            except Exception as e:
-                self._exc(e, 'parsing additional resource records')
+        self._names = _name_table(raw)
+        self._pending = (raw, _HEADER.size, 0, (total_questions, total_answers,
+                                                total_auth_rr, total_add_rr))
+        if not self.lazy:
+            if not self._decode_sections(len(_SECTION_NAMES) - 1):
                 return None
 
         self.parsed = True
 
+    def _decode_sections (self, last):
+        """
+        Decodes the pending sections up to section number last (0-3)
+
+        Sections are stored in message order, so the earlier ones are
+        decoded too.  On error the problem is logged, the remaining
+        sections are left empty and False is returned.
+        """
+        raw, query_head, section, counts = self._pending
+        try:
+            while section <= last:
+                if counts[section]:
+                    records = []
+                    setattr(self, _SECTION_ATTRS[section], records)
+                    for i in range(counts[section]):
+                        if section == 0:
+                            query_head = self.next_question(raw, query_head,
+                                                            records)
+                        else:
+                            query_head = self.next_rr(raw, query_head,
+                                                      records)
+                section += 1
+        except Exception as e:
+            self._pending = None
+            self._exc(e, 'parsing ' + _SECTION_NAMES[section])
+            return False
+
+        if section < len(_SECTION_NAMES):
+            self._pending = (raw, query_head, section, counts)
+        else:
+            self._pending = None
+        return True
+
+    def _records (self, number):
+        """
+        Records of section number (0-3), decoding it if needed, without
+        giving an empty section its own list
+        """
+        if self._pending is not None and self._pending[2] <= number:
+            self._decode_sections(number)
+        return getattr(self, _SECTION_ATTRS[number])
+
     def _to_str(self):
         flags = "|"
 
@@ -372,32 +650,99 @@ class dns(packet_base):
     # them in the DNS class
 
     @classmethod
-    def _read_dns_name_from_index(cls, l, index, retlist):
+    def read_dns_name_from_index(cls, l, index, cache=None):
+      """
+      Decodes the (possibly compressed) name at index
+
+      Returns (index just past the name, name as bytes).  Compression
+      pointers are followed iteratively; each one must point before the
+      position it was found at (so loops are impossible) and at most
+      _MAX_POINTER_HOPS are followed.  The name may not exceed 255 bytes
+      in wire form (RFC 1035 3.1).
+
+      If cache (a dict) is given, decoding stops at the first offset
+      already in it, and the name starting at the original index and at
+      every pointer target is stored in it as (index past it, name).
+      """
+      labels = []
+      runs = []       # [start, labels before it, index past it] per run
+      suffix = None   # cached name decoding stopped at
+      end = None      # index past the name, if it started on a cache hit
+      wire_len = 1    # the root label
+      hops = 0
+      try:
+        done = False
+        while not done:
+            if cache is not None and index in cache:
+                hit_end, suffix = cache[index]
+                if not runs:
+                    end = hit_end
+                if suffix:
+                    wire_len += len(suffix) + 1
+                    if wire_len > _MAX_NAME:
+                        raise DNSNameError("name too long")
+                break
+
+            run = [index, len(labels), None]
+            runs.append(run)
+            while True:
+                chunk_size = l[index]
+                if chunk_size >= 0xc0:
+                    # compression pointer: offset in the last 14 bits
+                    offset = ((chunk_size & 0x3f) << 8) | l[index+1]
+                    run[2] = index + 2
+                    if offset >= index:
+                        raise DNSNameError("forward compression pointer")
+                    hops += 1
+                    if hops > _MAX_POINTER_HOPS:
+                        raise DNSNameError("too many compression pointers")
+                    index = offset
+                    break
+                if chunk_size == 0:
+                    run[2] = index + 1
+                    done = True
+                    break
+                if chunk_size > _MAX_LABEL:
+                    raise DNSNameError("unsupported label type")
+                wire_len += chunk_size + 1
+                if wire_len > _MAX_NAME:
+                    raise DNSNameError("name too long")
+                index += 1
+                if index + chunk_size > len(l):
+                    raise Trunc("incomplete name")
+                labels.append(l[index : index + chunk_size])
+                index += chunk_size
+      except IndexError:
+        raise Trunc("incomplete name")
+
+      if suffix:
+        labels.append(suffix)
+      name = b".".join(labels)
+      if cache is not None:
+        for start, before, run_end in runs:
+          cache[start] = (run_end, name if not before
+                                   else b".".join(labels[before:]))
+      return (runs[0][2] if runs else end, name)
+
+    @staticmethod
+    def _skip_dns_name(l, index):
+      """
+      Returns the index just past the name at index, without decoding it
+      """
       try:
         while True:
             chunk_size = l[index]
-            # check whether we have an internal pointer
-            if (chunk_size & 0xc0) == 0xc0:
-                # pull out offset from last 14 bits
-                offset = ((l[index] & 0x3) << 8 ) | l[index+1]
-                cls._read_dns_name_from_index(l, offset, retlist)
-                index += 1
-                break
+            if chunk_size >= 0xc0:
+                l[index + 1] # the pointer must be complete
+                return index + 2
             if chunk_size == 0:
-                break
-            index += 1
-            retlist.append(l[index : index + chunk_size])
-            index += chunk_size
-        return index
+                return index + 1
+            if chunk_size > _MAX_LABEL:
+                raise DNSNameError("unsupported label type")
+            index += chunk_size + 1
       except IndexError:
         raise Trunc("incomplete name")
 
-    @classmethod
-    def read_dns_name_from_index(cls, l, index):
-        retlist = []
-        next = cls._read_dns_name_from_index(l, index, retlist)
-        return (next + 1, b".".join(retlist))
-
     def next_rr(self, l, index, rr_list):
         array_len = len(l)
 
@@ -405,72 +750,139 @@ class dns(packet_base):
         if index > array_len:
             raise Trunc("next_rr: name truncated")
 
-        index,name = self.read_dns_name_from_index(l, index)
+        name_index = index
+        index = self._skip_dns_name(l, index)
 
-        if index + 10 > array_len:
+        if index + _RR.size > array_len:
             raise Trunc("next_rr: truncated")
 
-        (qtype,qclass,ttl,rdlen) = struct.unpack('!HHIH', l[index:index+10])
-        if index+10+rdlen > array_len:
+        (qtype,qclass,ttl,rdlen) = _RR.unpack_from(l, index)
+        index += _RR.size
+        if index+rdlen > array_len:
             raise Trunc("next_rr: data truncated")
 
-        rddata = self.get_rddata(l, qtype, rdlen, index + 10)
-        rr_list.append(dns.rr(name, qtype, qclass,ttl,rdlen,rddata))
+        rddata = self.get_rddata(l, qtype, rdlen, index, qclass, ttl)
+        rr_list.append(dns.rr.from_buffer(self._names, name_index, qtype,
+                                          qclass, ttl, rdlen, rddata))
 
-        return index + 10 + rdlen
+        return index + rdlen
 
-    def get_rddata(self, l, type, dlen, beg_index):
+    def get_rddata(self, l, type, dlen, beg_index, qclass=0, ttl=0):
+        """
+        Decodes RDATA: single names right away, SOA, MX, TXT, SRV and OPT
+        as structured objects decoded on first access, and addresses and
+        any other type as raw bytes (rr.rddata turns A and AAAA into
+        addresses when read).  OPT uses the RR's class and TTL.
+        """
         if beg_index + dlen > len(l):
             raise Trunc('(dns) truncated rdata')
         # A
         if type == 1:
             if dlen != 4:
-                raise Exception('(dns) invalid a data size',system='packet')
-            return IPAddr(l[beg_index : beg_index + 4])
+                raise Exception('(dns) invalid a data size')
+            return bytes(l[beg_index : beg_index + 4])
         # AAAA
         elif type == 28:
             if dlen != 16:
-                raise Exception('(dns) invalid a data size',system='packet')
-            return IPAddr6.from_raw(l[beg_index : beg_index + dlen])
+                raise Exception('(dns) invalid a data size')
+            return bytes(l[beg_index : beg_index + dlen])
         # NS
         elif type == 2:
-            return self.read_dns_name_from_index(l, beg_index)[1]
+            return self._names.read(beg_index)
         # PTR
         elif type == 12:
-            return  self.read_dns_name_from_index(l, beg_index)[1]
+            return self._names.read(beg_index)
         # CNAME
         elif type == 5:
-            return self.read_dns_name_from_index(l, beg_index)[1]
+            return self._names.read(beg_index)
         # MX
         elif type == 15:
-            #TODO: Save priority (don't just jump past it)
-            return self.read_dns_name_from_index(l, beg_index + 2)[1]
+            return dns.mx.from_buffer(self._names, beg_index, dlen)
+        # SOA
+        elif type == 6:
+            return dns.soa.from_buffer(self._names, beg_index, dlen)
+        # TXT
+        elif type == 16:
+            return dns.txt.from_buffer(self._names, beg_index, dlen)
+        # SRV
+        elif type == 33:
+            return dns.srv.from_buffer(self._names, beg_index, dlen)
+        # OPT
+        elif type == 41:
+            return dns.opt.from_buffer(self._names, beg_index, dlen,
+                                       qclass, ttl)
         else:
-            return l[beg_index : beg_index + dlen]
+            return bytes(l[beg_index : beg_index + dlen])
 
-    def next_question(self, l, index):
+    def next_question(self, l, index, questions=None):
+        if questions is None:
+            questions = self.questions
         array_len = len(l)
 
-        index,name = self.read_dns_name_from_index(l, index)
+        name_index = index
+        index = self._skip_dns_name(l, index)
 
-        if index + 4 > array_len:
+        if index + _QUESTION.size > array_len:
             raise Trunc("next_question: truncated")
 
-        (qtype,qclass) = struct.unpack('!HH', l[index:index+4])
-        self.questions.append(dns.question(name, qtype, qclass))
-        return index + 4
+        (qtype,qclass) = _QUESTION.unpack_from(l, index)
+        questions.append(dns.question.from_buffer(self._names, name_index,
+                                                  qtype, qclass))
+        return index + _QUESTION.size
 
     # Utility classes for questions and RRs
 
-    class question (object):
+    class _named (object):
+        """
+        Base for records whose owner name may still be in the raw message
+
+        Records built by the parser keep the message's _name_table and the
+        offset of their name, and decode it the first time name is read.
+        Records use __slots__ so that holding many parsed messages is cheap.
+        """
+        __slots__ = ('_name', '_names', '_name_index')
+
+        @classmethod
+        def from_buffer (cls, names, name_index, *args):
+            o = cls.__new__(cls)
+            o._set_fields(None, *args)
+            o._names = names
+            o._name_index = name_index
+            return o
+
+        @property
+        def name (self):
+            if self._name is None and self._names is not None:
+                self._name = self._names.read(self._name_index)
+                self._names = self._name_index = None
+            return self._name
+
+        @name.setter
+        def name (self, value):
+            self._name = value
+            self._names = None
+
+        def _name_text (self):
+            """The name as text for __str__, even if it cannot be decoded"""
+            try:
+                return _text(self.name)
+            except Exception as e:
+                return _malformed(e)
+
+    class question (_named):
+        __slots__ = ('qtype', 'qclass')
 
         def __init__(self, name, qtype, qclass):
-            self.name   = name
+            self._names = None
+            self._set_fields(name, qtype, qclass)
+
+        def _set_fields (self, name, qtype, qclass):
+            self._name  = name
             self.qtype  = qtype
             self.qclass = qclass
 
         def __str__(self):
-            s = self.name
+            s = self._name_text()
             if self.qtype in rrtype_to_str:
                 s += " " + rrtype_to_str[self.qtype]
             else:
@@ -482,7 +894,7 @@ class dns(packet_base):
 
             return s
 
-    class rr (object):
+    class rr (_named):
         A_TYPE     = 1
         NS_TYPE    = 2
         MD_TYPE    = 3
@@ -500,30 +912,334 @@ class dns(packet_base):
         MX_TYPE    = 15
         TXT_TYPE   = 16
         AAAA_TYPE  = 28
+        SRV_TYPE   = 33
+        OPT_TYPE   = 41
+
+        __slots__ = ('qtype', 'qclass', 'ttl', 'rdlen', '_rddata')
 
         def __init__ (self, _name, _qtype, _qclass, _ttl, _rdlen, _rddata):
-            self.name   = _name
+            self._names = None
+            self._set_fields(_name, _qtype, _qclass, _ttl, _rdlen, _rddata)
+
+        def _set_fields (self, _name, _qtype, _qclass, _ttl, _rdlen, _rddata):
+            self._name  = _name
             self.qtype  = _qtype
             self.qclass = _qclass
             self.ttl    = _ttl
             self.rdlen  = _rdlen
-            self.rddata = _rddata
+            self._rddata = _rddata
+
+        @property
+        def rddata (self):
+            """
+            The RDATA; A and AAAA addresses given as raw bytes (as the
+            parser leaves them) become IPAddr/IPAddr6 on first access
+            """
+            data = self._rddata
+            if isinstance(data, bytes):
+                if self.qtype == self.A_TYPE:
+                    data = self._rddata = IPAddr(data)
+                elif self.qtype == self.AAAA_TYPE:
+                    data = self._rddata = IPAddr6.from_raw(data)
+            return data
+
+        @rddata.setter
+        def rddata (self, value):
+            self._rddata = value
 
         def __str__ (self):
-            s = self.name
+            s = self._name_text()
             if self.qtype in rrtype_to_str:
                 s += " " + rrtype_to_str[self.qtype]
             else:
                 s += " #" + str(self.qtype)
-            if self.qclass in rrclass_to_str:
+            if self.qtype == self.OPT_TYPE:
+                pass # class and TTL carry EDNS0 fields, shown in data
+            elif self.qclass in rrclass_to_str:
                 s += " " + rrclass_to_str[self.qclass]
             else:
                 s += " #" + str(self.qclass)
-            s += " ttl:"+str(self.ttl)
+            if self.qtype != self.OPT_TYPE:
+                s += " ttl:"+str(self.ttl)
             s += " rdlen:"+str(self.rdlen)
-            s += " datalen:" + str(len(self.rddata))
-            if len(self.rddata) == 4:
-              #FIXME: can be smarter about whether this is an IP
-              s+= " data:" + str(IPAddr(self.rddata))
+            if isinstance(self.rddata, (bytes, bytearray)) and \
+               self.qtype not in (self.NS_TYPE, self.PTR_TYPE, self.CNAME_TYPE):
+                s += " datalen:" + str(len(self.rddata))
+            else:
+                try:
+                    s += " data:" + _text(self.rddata)
+                except Exception as e:
+                    s += " data:" + _malformed(e)
 
             return s
+
+    # Structured RDATA
+
+    class _rdata (object):
+        """
+        Base for structured RDATA
+
+        Parsed instances keep the message's _name_table and the offset and
+        length of the RDATA, and decode every field the first time one is
+        read.  Instances built to be serialized get their fields directly.
+        """
+        __slots__ = ('_names', '_offset', '_length', '_error')
+
+        # Shortest valid RDATA (fixed fields plus the root name for each
+        # name); shorter ones are rejected while parsing the message
+        _MIN_LENGTH = 0
+
+        @classmethod
+        def from_buffer (cls, names, offset, length):
+            if length < cls._MIN_LENGTH:
+                raise Trunc("(dns) truncated %s rdata" % (cls.__name__.upper(),))
+            o = cls.__new__(cls)
+            o._names = names
+            o._offset = offset
+            o._length = length
+            return o
+
+        def _decode (self):
+            names, self._names = self._names, None
+            try:
+                self._unpack(names, self._offset, self._offset + self._length)
+            except Exception as e:
+                self._error = e
+                raise
+
+        def _read_name (self, names, index, end):
+            next, name = names.read_at(index)
+            if next > end:
+                raise Trunc("(dns) name runs past rdata")
+            return next, name
+
+        def __eq__ (self, other):
+            return type(self) is type(other) and \
+                   self._values() == other._values()
+
+        def __ne__ (self, other):
+            return not self.__eq__(other)
+
+        def __hash__ (self):
+            return hash(self._values())
+
+    class mx (_rdata):
+        """MX: preference and exchange (RFC 1035 3.3.9)"""
+        __slots__ = ('_preference', '_exchange')
+        _MIN_LENGTH = _UINT16.size + 1
+
+        preference = _rdata_field('_preference')
+        exchange   = _rdata_field('_exchange')
+
+        def __init__ (self, preference, exchange):
+            self._names = None
+            self._preference = preference
+            self._exchange = _name_bytes(exchange)
+
+        def _unpack (self, names, index, end):
+            if index + _UINT16.size > end:
+                raise Trunc("(dns) truncated MX rdata")
+            self._preference, = _UINT16.unpack_from(names.buf, index)
+            self._exchange = self._read_name(names, index + _UINT16.size,
+                                             end)[1]
+
+        def _values (self):
+            return (self.preference, self.exchange)
+
+        def _parts (self):
+            return [(_UINT16.pack(self.preference), _RAW),
+                    (self.exchange, _NAME)]
+
+        def __str__ (self):
+            return "%d %s" % (self.preference, _text(self.exchange))
+
+    class soa (_rdata):
+        """SOA: zone authority (RFC 1035 3.3.13)"""
+        __slots__ = ('_mname', '_rname', '_serial', '_refresh', '_retry',
+                     '_expire', '_minimum')
+        _MIN_LENGTH = 1 + 1 + _SOA.size
+
+        mname   = _rdata_field('_mname')
+        rname   = _rdata_field('_rname')
+        serial  = _rdata_field('_serial')
+        refresh = _rdata_field('_refresh')
+        retry   = _rdata_field('_retry')
+        expire  = _rdata_field('_expire')
+        minimum = _rdata_field('_minimum')
+
+        def __init__ (self, mname, rname, serial, refresh, retry, expire,
+                      minimum):
+            self._names = None
+            self._mname = _name_bytes(mname)
+            self._rname = _name_bytes(rname)
+            self._serial = serial
+            self._refresh = refresh
+            self._retry = retry
+            self._expire = expire
+            self._minimum = minimum
+
+        def _unpack (self, names, index, end):
+            index, self._mname = self._read_name(names, index, end)
+            index, self._rname = self._read_name(names, index, end)
+            if index + _SOA.size > end:
+                raise Trunc("(dns) truncated SOA rdata")
+            (self._serial, self._refresh, self._retry, self._expire,
+             self._minimum) = _SOA.unpack_from(names.buf, index)
+
+        def _values (self):
+            return (self.mname, self.rname, self.serial, self.refresh,
+                    self.retry, self.expire, self.minimum)
+
+        def _parts (self):
+            return [(self.mname, _NAME),
+                    (self.rname, _NAME),
+                    (_SOA.pack(self.serial, self.refresh, self.retry,
+                               self.expire, self.minimum), _RAW)]
+
+        def __str__ (self):
+            return "%s %s %d %d %d %d %d" % ((_text(self.mname),
+                                             _text(self.rname))
+                                            + self._values()[2:])
+
+    class txt (_rdata):
+        """TXT: one or more character-strings (RFC 1035 3.3.14)"""
+        __slots__ = ('_strings',)
+
+        strings = _rdata_field('_strings')
+
+        def __init__ (self, strings):
+            self._names = None
+            self._strings = [_name_bytes(t) for t in strings]
+
+        def _unpack (self, names, index, end):
+            buf = names.buf
+            strings = []
+            while index < end:
+                length = buf[index]
+                index += 1
+                if index + length > end:
+                    raise Trunc("(dns) truncated TXT rdata")
+                strings.append(bytes(buf[index : index + length]))
+                index += length
+            self._strings = strings
+
+        def _values (self):
+            return tuple(self.strings)
+
+        def _parts (self):
+            out = bytearray()
+            for t in self.strings:
+                if len(t) > 255:
+                    raise ValueError("(dns) TXT string longer than 255 bytes")
+                out.append(len(t))
+                out += t
+            return [(bytes(out), _RAW)]
+
+        def __str__ (self):
+            return " ".join('"%s"' % _text(t) for t in self.strings)
+
+    class srv (_rdata):
+        """SRV: service location (RFC 2782)"""
+        __slots__ = ('_priority', '_weight', '_port', '_target')
+        _MIN_LENGTH = _SRV.size + 1
+
+        priority = _rdata_field('_priority')
+        weight   = _rdata_field('_weight')
+        port     = _rdata_field('_port')
+        target   = _rdata_field('_target')
+
+        def __init__ (self, priority, weight, port, target):
+            self._names = None
+            self._priority = priority
+            self._weight = weight
+            self._port = port
+            self._target = _name_bytes(target)
+
+        def _unpack (self, names, index, end):
+            if index + _SRV.size > end:
+                raise Trunc("(dns) truncated SRV rdata")
+            (self._priority, self._weight,
+             self._port) = _SRV.unpack_from(names.buf, index)
+            self._target = self._read_name(names, index + _SRV.size, end)[1]
+
+        def _values (self):
+            return (self.priority, self.weight, self.port, self.target)
+
+        def _parts (self):
+            # RFC 2782: the target is not compressed
+            return [(_SRV.pack(self.priority, self.weight, self.port), _RAW),
+                    (self.target, _NAME_UNCOMPRESSED)]
+
+        def __str__ (self):
+            return "%d %d %d %s" % (self.priority, self.weight, self.port,
+                                    _text(self.target))
+
+    class opt (_rdata):
+        """
+        OPT: EDNS0 pseudo-RR (RFC 6891)
+
+        The RR's class is the requestor's UDP payload size and its TTL
+        holds the extended RCODE, the version and the DO flag; they are
+        decoded here along with the options, a list of (code, data).
+        When serializing, they replace the class and TTL of the rr.
+        """
+        __slots__ = ('_udp_size', '_extended_rcode', '_version', '_dnssec_ok',
+                     '_options')
+
+        udp_size       = _rdata_field('_udp_size')
+        extended_rcode = _rdata_field('_extended_rcode')
+        version        = _rdata_field('_version')
+        dnssec_ok      = _rdata_field('_dnssec_ok')
+        options        = _rdata_field('_options')
+
+        def __init__ (self, udp_size=4096, extended_rcode=0, version=0,
+                      dnssec_ok=False, options=()):
+            self._names = None
+            self._set_header(udp_size, (extended_rcode << 24) |
+                             (version << 16) | (0x8000 if dnssec_ok else 0))
+            self._options = list(options)
+
+        @classmethod
+        def from_buffer (cls, names, offset, length, qclass, ttl):
+            o = super(dns.opt, cls).from_buffer(names, offset, length)
+            o._set_header(qclass, ttl)
+            return o
+
+        def _set_header (self, qclass, ttl):
+            self._udp_size = qclass
+            self._extended_rcode = ttl >> 24
+            self._version = (ttl >> 16) & 0xff
+            self._dnssec_ok = bool(ttl & 0x8000)
+
+        def _class_ttl (self):
+            return (self.udp_size, (self.extended_rcode << 24) |
+                    (self.version << 16) | (0x8000 if self.dnssec_ok else 0))
+
+        def _unpack (self, names, index, end):
+            buf = names.buf
+            options = []
+            while index < end:
+                if index + _OPTION.size > end:
+                    raise Trunc("(dns) truncated OPT rdata")
+                code, length = _OPTION.unpack_from(buf, index)
+                index += _OPTION.size
+                if index + length > end:
+                    raise Trunc("(dns) truncated OPT rdata")
+                options.append((code, bytes(buf[index : index + length])))
+                index += length
+            self._options = options
+
+        def _values (self):
+            return self._class_ttl() + (tuple(self.options),)
+
+        def _parts (self):
+            out = bytearray()
+            for code, data in self.options:
+                out += _OPTION.pack(code, len(data))
+                out += data
+            return [(bytes(out), _RAW)]
+
+        def __str__ (self):
+            return "udp:%d version:%d do:%d options:%d" % (
+                self.udp_size, self.version, self.dnssec_ok,
+                len(self.options))
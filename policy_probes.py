@@ -0,0 +1,201 @@
+"""
+Sondas del test policy de test_suite.py
+
+Arma la matriz de permitido/bloqueado a partir de las reglas del firewall
+y de la topología, con el mismo código de carga y el mismo Classifier que
+usa el controlador. No depende de Mininet: de la red solo usa net.hosts
+(name, IP()), net.switches (name, dpid) y net.links (intf1/intf2.node).
+"""
+
+import os
+import socket
+import struct
+import sys
+from collections import deque, namedtuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_PROBE_PORT = 8000  # puerto de las sondas de tráfico no cubierto por reglas
+PROBE_SRC_PORT = 20000     # primer puerto origen de las sondas
+
+# Una sonda: tráfico de src a dst; sport/dport en None para ICMP.
+# expected_rule es la regla que debería descartarla (None si pasa)
+Probe = namedtuple('Probe', 'src dst proto sport dport expected_rule')
+
+
+def _controller_path():
+    """Agrega controller/ a sys.path para usar sus módulos."""
+    directory = os.path.join(ROOT, 'controller')
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+
+def ip_to_int(ip):
+    return struct.unpack('!I', socket.inet_aton(ip))[0]
+
+
+def prefix_matches(ip, network, prefix_len):
+    mask = (0xffffffff << (32 - prefix_len)) & 0xffffffff if prefix_len else 0
+    return ip & mask == network
+
+
+def rule_label(rule):
+    """Descripción de la regla, o sus campos si no tiene."""
+    if rule.description:
+        return rule.description
+    fields = [f"switch {rule.switch}", f"{rule.src_ip or '*'} -> {rule.dst_ip or '*'}"]
+    if rule.nw_proto is not None:
+        fields.append(f"protocolo {rule.nw_proto}")
+    if rule.src_port is not None:
+        fields.append(f"puerto origen {rule.src_port}")
+    if rule.dst_port is not None:
+        fields.append(f"puerto destino {rule.dst_port}")
+    return ', '.join(fields)
+
+
+def load_policy(path):
+    """
+    Carga las reglas con el mismo código que el firewall (controller/utils.py).
+
+    Args:
+        path (str): Archivo de reglas (None: controller/firewall_rules.json)
+
+    Returns:
+        RuleSet o CompiledRuleSet
+    """
+    _controller_path()
+    from utils import load_rule_set
+    return load_rule_set(raise_errors=True, path=path)
+
+
+def switch_paths(net):
+    """
+    Camino de switches entre cada par de hosts (BFS sobre los links).
+
+    Con topologías con ciclos el tráfico sigue el árbol que arma
+    spanning_tree, que puede no ser el camino más corto: las reglas de
+    la política deberían ser las mismas en los caminos alternativos.
+
+    Returns:
+        dict: (host origen, host destino) -> lista de dpids en orden
+    """
+    neighbors = {}
+    for link in net.links:
+        a, b = link.intf1.node.name, link.intf2.node.name
+        neighbors.setdefault(a, []).append(b)
+        neighbors.setdefault(b, []).append(a)
+    dpids = {switch.name: int(switch.dpid, 16) for switch in net.switches}
+
+    paths = {}
+    for src in net.hosts:
+        parent = {src.name: None}
+        queue = deque([src.name])
+        while queue:
+            node = queue.popleft()
+            # los hosts no reenvían tráfico: solo se expanden switches
+            if node != src.name and node not in dpids:
+                continue
+            for neighbor in neighbors.get(node, ()):
+                if neighbor not in parent:
+                    parent[neighbor] = node
+                    queue.append(neighbor)
+        for dst in net.hosts:
+            if dst is src or dst.name not in parent:
+                continue
+            path, node = [], parent[dst.name]
+            while node is not None:
+                if node in dpids:
+                    path.append(dpids[node])
+                node = parent[node]
+            paths[(src, dst)] = path[::-1]
+    return paths
+
+
+def generate_probes(net, rule_set, batch_size, default_port=DEFAULT_PROBE_PORT,
+                    source_port=PROBE_SRC_PORT):
+    """
+    Arma las sondas y el resultado esperado de cada una.
+
+    Por cada par ordenado de hosts conectados se prueba ICMP, TCP y UDP
+    a default_port (tráfico que solo alcanzan las reglas sin puertos) y,
+    por cada regla con puertos de un switch del camino que puede aplicar
+    al par en algún sentido, TCP o UDP con esos puertos.
+
+    El tráfico se considera bloqueado si algún switch del camino descarta
+    la ida o, en sentido inverso, la respuesta (el handshake TCP, el eco
+    UDP o el echo reply), con el mismo Classifier que usa el firewall.
+    Las sondas sin puerto origen fijado por una regla usan puertos que
+    ninguna regla menciona (desde source_port), distintos dentro de cada
+    tanda.
+
+    Args:
+        net: Red de Mininet (o cualquier objeto con hosts, switches y links)
+        rule_set: RuleSet o CompiledRuleSet
+        batch_size (int): Sondas simultáneas
+        default_port (int): Puerto destino de las sondas sin puerto de regla
+            (se corre al siguiente libre si alguna regla lo usa)
+        source_port (int): Primer puerto origen de las sondas
+
+    Returns:
+        list: Probe, con los puertos origen repartidos para correrlas
+            en tandas consecutivas de batch_size
+    """
+    _controller_path()
+    from classifier import Classifier, packet_tuple
+    from compiled_rules import PROTOCOL_MAP
+
+    proto_names = {number: name.lower() for name, number in PROTOCOL_MAP.items()}
+    paths = switch_paths(net)
+    dpids = {dpid for path in paths.values() for dpid in path}
+
+    classifiers, port_rules, used_ports = {}, {}, set()
+    for dpid in dpids:
+        switch_rules = list(rule_set.for_switch(dpid))
+        classifiers[dpid] = Classifier(switch_rules)
+        # reglas con puertos, sin repetir las que solo cambian acción o prioridad
+        port_rules[dpid] = {(rule.src_net, rule.src_len, rule.dst_net, rule.dst_len,
+                             proto_names[rule.nw_proto], rule.src_port, rule.dst_port)
+                            for rule in switch_rules
+                            if rule.src_port is not None or rule.dst_port is not None}
+        for rule in port_rules[dpid]:
+            used_ports.update(port for port in rule[5:] if port is not None)
+
+    while default_port in used_ports:
+        default_port += 1
+    source_ports = []
+    port = source_port
+    while len(source_ports) < max(1, batch_size):
+        if port not in used_ports and port != default_port:
+            source_ports.append(port)
+        port += 1
+
+    def blocking_rule(path, fields):
+        for dpid in path:
+            rule = classifiers[dpid].lookup(*fields)
+            if rule is not None and not rule.allows:
+                return rule
+        return None
+
+    probes = []
+    for (src, dst), path in sorted(paths.items(), key=lambda p: (p[0][0].name, p[0][1].name)):
+        src_ip, dst_ip = src.IP(), dst.IP()
+        src_int, dst_int = ip_to_int(src_ip), ip_to_int(dst_ip)
+
+        wanted = {('icmp', None, None), ('tcp', None, default_port), ('udp', None, default_port)}
+        for dpid in path:
+            for (src_net, src_len, dst_net, dst_len, proto, sport, dport) in port_rules[dpid]:
+                if (prefix_matches(src_int, src_net, src_len) and
+                        prefix_matches(dst_int, dst_net, dst_len)):
+                    wanted.add((proto, sport, dport or default_port))
+                if (prefix_matches(dst_int, src_net, src_len) and
+                        prefix_matches(src_int, dst_net, dst_len)):
+                    # regla sobre la respuesta: sus puertos van invertidos en la ida
+                    wanted.add((proto, dport, sport or default_port))
+
+        for proto, sport, dport in sorted(wanted, key=lambda w: (w[0], w[1] or 0, w[2] or 0)):
+            if proto != 'icmp' and sport is None:
+                sport = source_ports[len(probes) % len(source_ports)]
+            rule = (blocking_rule(path, packet_tuple(src_ip, dst_ip, proto, sport, dport)) or
+                    blocking_rule(path[::-1], packet_tuple(dst_ip, src_ip, proto, dport, sport)))
+            probes.append(Probe(src, dst, proto, sport, dport, rule))
+    return probes
@@ -3,11 +3,15 @@
 # Script para iniciar el controlador POX con módulos custom
 #
 # Uso:
-#   ./run_controller.sh
+#   ./run_controller.sh [--stp]
 #
 # Este script inicia POX con:
 #   - L2 Learning (forwarding de paquetes)
 #   - Firewall (reglas de bloqueo)
+#
+# Con --stp además carga openflow.discovery y openflow.spanning_tree,
+# necesarios para topologías con ciclos (fattree, leafspine, ring, random):
+# sin ellos el tráfico broadcast circula indefinidamente por los ciclos.
 ################################################################################
 
 # Colores
@@ -25,6 +29,21 @@ echo "║     Introducción a Sistemas Distribuidos (75.43) - FIUBA  ║"
 echo "╚════════════════════════════════════════════════════════════╝"
 echo -e "${NC}"
 
+# Spanning tree opcional para topologías con ciclos
+STP_MODULES=""
+case "$1" in
+    "")
+        ;;
+    --stp)
+        STP_MODULES="openflow.discovery openflow.spanning_tree --no-flood --hold-down"
+        ;;
+    *)
+        echo -e "${RED}Error: opción inválida: $1${NC}"
+        echo "Uso: $0 [--stp]"
+        exit 1
+        ;;
+esac
+
 # Verificar que POX esté instalado
 if [ ! -f "pox/pox.py" ]; then
     echo -e "${RED}Error: POX no está instalado${NC}"
@@ -43,6 +62,9 @@ echo "  • Puerto del controlador: 6633"
 echo "  • Módulos cargados:"
 echo "    - forwarding.l2_learning (aprendizaje de MACs)"
 echo "    - firewall (reglas de bloqueo)"
+if [ -n "$STP_MODULES" ]; then
+    echo "    - openflow.discovery + openflow.spanning_tree (topologías con ciclos)"
+fi
 echo "  • Módulos custom desde: ./controller/"
 echo ""
 
@@ -56,6 +78,7 @@ PYTHONPATH=../controller:$PYTHONPATH \
 python3.9 ./pox.py \
   log.level --WARNING \
   forwarding.l2_learning \
+  $STP_MODULES \
   firewall
 
 echo -e "\n${GREEN}✓ Controlador detenido${NC}"
\ No newline at end of file
@@ -3,15 +3,20 @@
 # Script para iniciar la topología SDN en Mininet
 #
 # Uso:
-#   ./run_topology.sh [N]
+#   ./run_topology.sh [N | TOPO]
 #
 # Donde:
-#   N = Número de switches (por defecto: 2)
+#   N    = Número de switches de la cadena (por defecto: 2)
+#   TOPO = Otra topología de topology.py con sus parámetros (ver topos)
 #
 # Ejemplos:
 #   ./run_topology.sh       # Inicia con 2 switches
 #   ./run_topology.sh 3     # Inicia con 3 switches
 #   ./run_topology.sh 1     # Inicia con 1 switch
+#   ./run_topology.sh fattree,k=4
+#   ./run_topology.sh leafspine,leaves=16,spines=4,hosts_per_switch=8
+#   ./run_topology.sh ring,N=50
+#   ./run_topology.sh random,N=200,extra_links=100,seed=1
 ################################################################################
 
 # Configuración por defecto
@@ -34,18 +39,31 @@ echo "║     Introducción a Sistemas Distribuidos (75.43) - FIUBA  ║"
 echo "╚════════════════════════════════════════════════════════════╝"
 echo -e "${NC}"
 
-# Nro de switches desde argumentos o default
-N=${1:-$DEFAULT_N}
+# Nro de switches (cadena) o topología desde argumentos o default
+ARG=${1:-$DEFAULT_N}
 
-# N > 0
-if ! [[ "$N" =~ ^[0-9]+$ ]] || [ "$N" -lt 1 ]; then
-    echo -e "${RED}Error: N debe ser un número entero positivo${NC}"
-    echo "Uso: $0 [N]"
+if [[ "$ARG" =~ ^[0-9]+$ ]]; then
+    # N > 0
+    if [ "$ARG" -lt 1 ]; then
+        echo -e "${RED}Error: N debe ser un número entero positivo${NC}"
+        echo "Uso: $0 [N | TOPO]"
+        exit 1
+    fi
+    TOPO="chain,N=$ARG"
+    DESCRIPTION="cadena de $ARG switch(es)"
+elif [[ "$ARG" =~ ^(chain|fattree|leafspine|ring|random)(,[a-z_]+=[0-9a-z./]+)*$ ]]; then
+    TOPO="$ARG"
+    DESCRIPTION="$ARG"
+    # fattree, leafspine, ring y random pueden tener ciclos
+    [[ "$ARG" =~ ^chain ]] || LOOPED=1
+else
+    echo -e "${RED}Error: topología inválida: $ARG${NC}"
+    echo "Uso: $0 [N | TOPO]"
     exit 1
 fi
 
 echo -e "${GREEN}Configuración:${NC}"
-echo "  • Número de switches: $N"
+echo "  • Topología: $DESCRIPTION"
 echo "  • Controlador remoto: $CONTROLLER_IP:$CONTROLLER_PORT"
 echo "  • Archivo de topología: topology.py"
 echo ""
@@ -66,7 +84,13 @@ fi
 # warning sobre el controlador
 echo -e "${YELLOW}⚠ IMPORTANTE:${NC}"
 echo "  Asegurate de tener el controlador POX ejecutándose antes de iniciar Mininet"
-echo "  Ejecuta en otra terminal: ./run_controller.sh"
+if [ -n "$LOOPED" ]; then
+    echo -e "  Ejecuta en otra terminal: ${GREEN}./run_controller.sh --stp${NC}"
+    echo -e "  ${RED}La topología $DESCRIPTION puede tener ciclos: sin --stp (spanning tree)"
+    echo -e "  el controlador no corta los ciclos y el tráfico broadcast inunda la red.${NC}"
+else
+    echo "  Ejecuta en otra terminal: ./run_controller.sh"
+fi
 echo ""
 echo -e "Presiona ${GREEN}Enter${NC} para continuar o ${RED}Ctrl+C${NC} para cancelar..."
 read
@@ -74,11 +98,11 @@ read
 echo -e "\n${BLUE}► Limpiando instancias previas de Mininet...${NC}"
 sudo mn -c &> /dev/null
 
-echo -e "\n${BLUE}► Iniciando Mininet con topología de $N switch(es)...${NC}\n"
+echo -e "\n${BLUE}► Iniciando Mininet con topología $DESCRIPTION...${NC}\n"
 
 sudo mn \
     --custom topology.py \
-    --topo chain,N=$N \
+    --topo $TOPO \
     --mac \
     --arp \
     --switch ovsk \
@@ -1,10 +1,40 @@
 # ==========================================
 # MAIN EXECUTION WRAPPER
 # ==========================================
-def main():
+#
+# Uso interactivo (menú), dentro de la CLI de Mininet:
+#     mininet> py exec(open('test_suite.py').read())
+#
+# Modo headless: corre los tests sin preguntar, en paralelo, y deja un
+# reporte JSON (o JUnit si el archivo termina en .xml). Se configura con
+# variables de entorno al correrlo desde la CLI de Mininet:
+#     FW_TEST_HEADLESS=1          activa el modo headless
+#     FW_TEST_TESTS=port80,udp    tests a correr (default: todos)
+#     FW_TEST_REPORT=reporte.xml  archivo del reporte
+#     FW_TEST_WORKERS=8           tests simultáneos
+#     FW_TEST_RULES=reglas.json   política del test policy (default:
+#                                 controller/firewall_rules.json)
+#     FW_TEST_BATCH=64            sondas simultáneas del test policy
+#
+# o por separado, levantando la topología por su cuenta (sale con código
+# 0 si pasan todos los tests y 1 si no):
+#     sudo python3 test_suite.py --tests port80,udp --report reporte.xml
+#
+# El test policy no tiene casos escritos a mano: arma la matriz de
+# permitido/bloqueado a partir de las reglas y de la topología, y la
+# verifica con sondas TCP/UDP/ICMP entre cada par de hosts.
+#
+def main(net=None, headless=None, selection=None, report=None, workers=None,
+         rules=None, batch=None):
+    import os
+    import re
     import sys
     import time
     import gc
+    import json
+    import subprocess
+    from concurrent.futures import ThreadPoolExecutor
+    from xml.etree import ElementTree
     # ==========================================
     # COLORES Y ESTILOS
     # ==========================================
@@ -17,6 +47,32 @@ def main():
     C_BOLD    = '\033[1m'
     C_RESET   = '\033[0m'
 
+    # ==========================================
+    # CONFIGURACIÓN (argumentos o variables de entorno)
+    # ==========================================
+    if headless is None:
+        headless = os.environ.get('FW_TEST_HEADLESS', '') not in ('', '0')
+    if selection is None and os.environ.get('FW_TEST_TESTS'):
+        selection = os.environ['FW_TEST_TESTS'].split(',')
+    if report is None:
+        report = os.environ.get('FW_TEST_REPORT')
+    if workers is None:
+        workers = int(os.environ.get('FW_TEST_WORKERS', '8'))
+    if rules is None:
+        rules = os.environ.get('FW_TEST_RULES')
+    if batch is None:
+        batch = int(os.environ.get('FW_TEST_BATCH', '64'))
+
+    PING_COUNT = 3           # pings por prueba (cada 0.2 s)
+    PING_WAIT = 1            # segundos de espera por respuesta
+    CONNECT_TIMEOUT = 2      # curl: segundos para considerar bloqueada la conexión
+    IPERF_SECONDS = 1
+    READY_TIMEOUT = 5        # segundos máximos esperando que un servidor escuche
+    READY_POLL = 0.05
+    PROBE_TIMEOUT = 2        # segundos de espera de una sonda TCP/UDP
+    DEFAULT_PROBE_PORT = 8000  # puerto de las sondas de tráfico no cubierto por reglas
+    PROBE_SRC_PORT = 20000   # primer puerto origen de las sondas
+
     def print_header(text):
         print(f"\n{C_MAGENTA}{C_BOLD}{'='*70}{C_RESET}")
         print(f"{C_MAGENTA}{C_BOLD}  {text}{C_RESET}")
@@ -50,8 +106,8 @@ def main():
         # intenta obtener el objeto net de mininet de forma directa
         # Nota: Al estar dentro de main(), globals() sigue refiriéndose al scope global del módulo/exec
         if 'net' in globals(): return globals()['net']
-        
-        # En algunos entornos exec, net podría estar en el scope local del caller, 
+
+        # En algunos entornos exec, net podría estar en el scope local del caller,
         # pero no podemos acceder fácilmente al frame anterior sin inspect.
         # Intentamos buscar en __main__
         try:
@@ -69,31 +125,179 @@ def main():
                     return obj
         except Exception as e:
             print(f"{C_RED}Error en búsqueda profunda: {e}{C_RESET}")
-        
+
         return None
 
     # recupera el objeto net
-    net = get_mininet_obj()
+    if net is None:
+        net = get_mininet_obj()
 
     if not net:
         print(f"\n{C_RED}❌ ERROR FATAL: No se pudo encontrar la red Mininet.{C_RESET}")
-        return
+        return None
+
+    # ==========================================
+    # EJECUCIÓN DE COMANDOS EN LOS HOSTS
+    # ==========================================
+    # Se usa host.popen() en lugar de host.cmd(): cada comando es un proceso
+    # propio, así que varios pueden correr a la vez en el mismo host.
+    def start(host, cmd):
+        return host.popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          universal_newlines=True)
+
+    def finish(proc):
+        """Espera el proceso y devuelve (código de salida, output)."""
+        output, _ = proc.communicate()
+        return proc.returncode, output
+
+    def stop(proc):
+        proc.terminate()
+        try:
+            proc.communicate(timeout=2)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+
+    def wait_listening(host, ports, proto='tcp'):
+        """
+        Espera a que algún proceso de host escuche en ports (un puerto o
+        varios) según ss, en vez de un sleep fijo.
+        """
+        ports = {str(ports)} if isinstance(ports, int) else {str(port) for port in ports}
+        flags = '-ltn' if proto == 'tcp' else '-lun'
+        deadline = time.time() + READY_TIMEOUT
+        while time.time() < deadline:
+            code, output = finish(start(host, ['ss', flags]))
+            # columna "Local Address:Port" de cada socket
+            listening = {line.split()[3].rsplit(':', 1)[-1]
+                         for line in output.splitlines()[1:] if len(line.split()) > 3}
+            if ports <= listening:
+                return True
+            time.sleep(READY_POLL)
+        return False
+
+    def ping_received(output):
+        """Respuestas recibidas según el resumen de ping (0 si no hay resumen)."""
+        match = re.search(r'(\d+) received', output)
+        return int(match.group(1)) if match else 0
+
+    # ==========================================
+    # PRUEBAS GENERADAS DESDE LA POLÍTICA
+    # ==========================================
+    # Servidor de las sondas: escucha en todos los "proto/puerto" que recibe
+    # como argumentos; por TCP responde y cierra (el TIME_WAIT queda de su
+    # lado, no del puerto origen fijo del cliente) y por UDP hace eco.
+    PROBE_SERVER = r"""
+import selectors, socket, sys
+sel = selectors.DefaultSelector()
+for spec in sys.argv[1:]:
+    proto, port = spec.split('/')
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM if proto == 'tcp' else socket.SOCK_DGRAM)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    s.bind(('', int(port)))
+    if proto == 'tcp':
+        s.listen(128)
+    sel.register(s, selectors.EVENT_READ, proto)
+while True:
+    for key, _ in sel.select():
+        s = key.fileobj
+        if key.data == 'tcp':
+            conn, _ = s.accept()
+            conn.sendall(b'ok')
+            conn.close()
+        else:
+            data, addr = s.recvfrom(64)
+            s.sendto(data, addr)
+"""
+
+    # Cliente de las sondas: sale con 0 si el servidor respondió, 1 si no
+    # hubo respuesta (bloqueado) y 2 ante cualquier otro error
+    PROBE_CLIENT = r"""
+import socket, sys
+proto, ip, port, sport, timeout = sys.argv[1:]
+s = socket.socket(socket.AF_INET, socket.SOCK_STREAM if proto == 'tcp' else socket.SOCK_DGRAM)
+s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+s.bind(('', int(sport)))
+try:
+    if proto == 'tcp':
+        s.settimeout(float(timeout))
+        s.connect((ip, int(port)))
+        s.recv(2)
+    else:
+        s.settimeout(float(timeout) / 3)
+        s.connect((ip, int(port)))
+        for attempt in range(3):
+            s.send(b'probe')
+            try:
+                s.recv(64)
+                break
+            except socket.timeout:
+                if attempt == 2:
+                    raise
+except socket.timeout:
+    sys.exit(1)
+except OSError as e:
+    print(e)
+    sys.exit(2)
+"""
+
+    def policy_probes():
+        """Módulo de las sondas del test policy (policy_probes.py, junto a este archivo)."""
+        root = os.path.dirname(os.path.abspath(globals().get('__file__', 'test_suite.py')))
+        if root not in sys.path:
+            sys.path.insert(0, root)
+        import policy_probes
+        return policy_probes
+
+    def rule_label(rule):
+        return policy_probes().rule_label(rule)
+
+    def load_policy(path):
+        """Carga las reglas con el mismo código que el firewall (controller/utils.py)."""
+        return policy_probes().load_policy(path)
+
+    def generate_probes(net, rule_set, batch_size):
+        """Sondas del test policy y el resultado esperado de cada una."""
+        return policy_probes().generate_probes(net, rule_set, batch_size,
+                                               DEFAULT_PROBE_PORT, PROBE_SRC_PORT)
 
     # ==========================================
     # TESTS
     # ==========================================
     class FirewallTestSuite:
-        def __init__(self, net):
+        # Nombre de cada test (para FW_TEST_TESTS / --tests) y su método
+        TESTS = [
+            ('pingall', 'test_pingall'),
+            ('port80', 'test_port80'),
+            ('port8000', 'test_port8000'),
+            ('udp', 'test_udp'),
+            ('h2_h3', 'test_h2_h3'),
+            ('permitted', 'test_permitted'),
+            ('policy', 'test_policy'),
+        ]
+        # Tests escritos para firewall_rules.json de ejemplo y hosts h1..h4
+        SAMPLE_TESTS = ['port80', 'port8000', 'udp', 'h2_h3', 'permitted']
+        # Tests que levantan servidores en los mismos puertos que los demás:
+        # en modo headless corren solos, después del resto
+        EXCLUSIVE = ['policy']
+
+        def __init__(self, net, interactive=True, rules=None, batch=64):
             self.net = net
+            self.interactive = interactive
+            self.rules = rules
+            self.batch = batch
+            self.results = []
+            self.sample_hosts = True
             try:
                 self.h1 = net.get('h1')
                 self.h2 = net.get('h2')
                 self.h3 = net.get('h3')
                 self.h4 = net.get('h4')
             except KeyError as e:
-                print(f"{C_RED}❌ Error: No se encuentra el host {e}. Verifica tu topología.{C_RESET}")
-                return
-            
+                print(f"{C_YELLOW}⚠️  No se encuentra el host {e}: solo se pueden correr "
+                      f"los tests pingall y policy.{C_RESET}")
+                self.sample_hosts = False
+
         def banner(self):
             print(f"\n{C_BLUE}{'='*70}{C_RESET}")
             print(f"{C_BLUE}{C_BOLD}       🛡️  FIREWALL SDN TEST SUITE  🛡️{C_RESET}")
@@ -108,165 +312,329 @@ def main():
             print(f" {C_GREEN}4){C_RESET} Test UDP h1->h4:5001 {C_CYAN}(Debe bloquearse){C_RESET}")
             print(f" {C_GREEN}5){C_RESET} Test Bloqueo h2<->h3 {C_CYAN}(Bidireccional){C_RESET}")
             print(f" {C_GREEN}6){C_RESET} Test Tráfico Permitido {C_CYAN}(Reglas por defecto){C_RESET}")
-            print(f" {C_GREEN}7){C_RESET} {C_BOLD}EJECUTAR TODOS LOS TESTS{C_RESET}")
+            print(f" {C_GREEN}7){C_RESET} Matriz de la Política {C_CYAN}(Generada desde las reglas){C_RESET}")
+            print(f" {C_GREEN}8){C_RESET} {C_BOLD}EJECUTAR TODOS LOS TESTS{C_RESET}")
             print(f" {C_RED}0) Salir{C_RESET}")
-            
+
         def wait_key(self):
-            input(f"\n{C_YELLOW}Presione Enter para continuar...{C_RESET}")
+            if self.interactive:
+                input(f"\n{C_YELLOW}Presione Enter para continuar...{C_RESET}")
+
+        # En modo headless los tests corren en paralelo: solo se imprime
+        # el resultado de cada verificación, no los pasos ni los outputs
+        def header(self, text):
+            if self.interactive: print_header(text)
+
+        def step(self, text):
+            if self.interactive: print_step(text)
+
+        def show_cmd(self, host_name, cmd):
+            if self.interactive: print_cmd(host_name, ' '.join(cmd) if isinstance(cmd, list) else cmd)
+
+        def show_output(self, output):
+            if self.interactive: print_output(output)
+
+        def record(self, test, name, passed, detail, started):
+            """Registra el resultado de una verificación y lo imprime."""
+            self.results.append({'test': test, 'name': name, 'passed': passed,
+                                 'detail': detail, 'seconds': time.time() - started})
+            text = detail if self.interactive else f"[{test}] {detail}"
+            if passed:
+                print_pass(text)
+            else:
+                print_fail(text)
+
+        def serve(self, host, cmd, port, proto='tcp'):
+            """Levanta un servidor en host y espera a que escuche en port."""
+            self.show_cmd(host.name, cmd)
+            server = start(host, cmd)
+            if not wait_listening(host, port, proto):
+                print_info(f"{host.name} no quedó escuchando en {proto}/{port} tras {READY_TIMEOUT} s")
+            return server
+
+        def ping(self, host, ip):
+            cmd = ['ping', '-c', str(PING_COUNT), '-i', '0.2', '-W', str(PING_WAIT), ip]
+            self.show_cmd(host.name, cmd)
+            return start(host, cmd)
 
         def test_pingall(self):
-            print_header("TEST 1: CONECTIVIDAD GENERAL (PingAll)")
-            print_step("Ejecutando pingall en la red...")
-            print_cmd("mininet", "pingall")
-            self.net.pingAll()
+            self.header("TEST 1: CONECTIVIDAD GENERAL (PingAll)")
+            started = time.time()
+            self.step("Ejecutando pingall en la red...")
+            self.show_cmd("mininet", "pingall")
+            loss = self.net.pingAll(timeout=str(PING_WAIT))
+            # informativo: con el firewall activo parte de los pares está bloqueada
+            self.results.append({'test': 'pingall', 'name': 'pingall', 'passed': True,
+                                 'detail': f"{loss}% de pérdida", 'seconds': time.time() - started})
             self.wait_key()
 
-        def test_port80(self):
-            print_header("TEST 2: BLOQUEO PUERTO 80 (TCP)")
-            
-            print_step("Iniciando servidor HTTP en h1:80...")
-            cmd_srv = 'python3 -m http.server 80 > /dev/null 2>&1 &'
-            print_cmd("h1", cmd_srv)
-            self.h1.cmd(cmd_srv)
-            time.sleep(2)
-            
-            print_step("Intentando conectar desde h4 (curl)...")
-            cmd_client = 'curl -m 5 http://10.0.0.1:80'
-            print_cmd("h4", cmd_client)
-            res = self.h4.cmd(cmd_client)
-            print_output(res)
-            
-            if not res.strip() or "Connection timed out" in res or "curl: (28)" in res:
-                print_pass("Conexión bloqueada correctamente (Timeout)")
+        def http_check(self, test, port, expect_blocked):
+            started = time.time()
+            self.step(f"Iniciando servidor HTTP en h1:{port}...")
+            server = self.serve(self.h1, ['python3', '-m', 'http.server', str(port)], port)
+            try:
+                self.step("Intentando conectar desde h4 (curl)...")
+                cmd = ['curl', '-s', '-m', str(CONNECT_TIMEOUT), f'http://{self.h1.IP()}:{port}']
+                self.show_cmd("h4", cmd)
+                code, res = finish(start(self.h4, cmd))
+                self.show_output(res)
+            finally:
+                self.step("Limpiando procesos...")
+                stop(server)
+
+            # curl sale con 28 por timeout y con 0 si recibió la página
+            if expect_blocked:
+                self.record(test, f"h4 -> h1:{port}", code == 28,
+                            "Conexión bloqueada correctamente (Timeout)" if code == 28
+                            else f"Se recibió respuesta (NO DEBERÍA), curl salió con {code}", started)
             else:
-                print_fail(f"Se recibió respuesta (NO DEBERÍA)")
-                
-            print_step("Limpiando procesos...")
-            print_cmd("h1", "killall python3")
-            self.h1.cmd('killall python3')
+                ok = code == 0 and ("<html" in res.lower() or "Directory listing" in res)
+                self.record(test, f"h4 -> h1:{port}", ok,
+                            "Conexión exitosa (Contenido recibido)" if ok
+                            else f"No se pudo conectar, curl salió con {code}", started)
+
+        def test_port80(self):
+            self.header("TEST 2: BLOQUEO PUERTO 80 (TCP)")
+            self.http_check('port80', 80, expect_blocked=True)
             self.wait_key()
 
         def test_port8000(self):
-            print_header("TEST 3: PUERTO PERMITIDO 8000 (TCP)")
-            
-            print_step("Iniciando servidor HTTP en h1:8000...")
-            cmd_srv = 'python3 -m http.server 8000 > /dev/null 2>&1 &'
-            print_cmd("h1", cmd_srv)
-            self.h1.cmd(cmd_srv)
-            time.sleep(2)
-            
-            print_step("Intentando conectar desde h4...")
-            cmd_client = 'curl -m 5 http://10.0.0.1:8000'
-            print_cmd("h4", cmd_client)
-            res = self.h4.cmd(cmd_client)
-            print_output(res)
-            
-            if "HTTP/1.0 200" in res or "HTTP/1.1 200" in res or "<html" in res.lower() or "Directory listing" in res:
-                print_pass("Conexión exitosa (Contenido recibido)")
-            else:
-                print_fail(f"No se pudo conectar.")
-                
-            print_step("Limpiando procesos...")
-            print_cmd("h1", "killall python3")
-            self.h1.cmd('killall python3')
+            self.header("TEST 3: PUERTO PERMITIDO 8000 (TCP)")
+            self.http_check('port8000', 8000, expect_blocked=False)
             self.wait_key()
 
         def test_udp(self):
-            print_header("TEST 4: BLOQUEO UDP ESPECÍFICO")
-            
-            print_step("Iniciando servidor iperf UDP en h4:5001...")
-            cmd_srv = 'iperf -s -u -p 5001 > /dev/null 2>&1 &'
-            print_cmd("h4", cmd_srv)
-            self.h4.cmd(cmd_srv)
-            time.sleep(1)
-            
-            # h1 -> h4 (Bloqueado)
-            print_step("Probando h1 -> h4 (Debe ser BLOQUEADO)...")
-            cmd_client1 = 'iperf -c 10.0.0.4 -u -p 5001 -t 5'
-            print_cmd("h1", cmd_client1)
-            res1 = self.h1.cmd(cmd_client1)
-            print_output(res1)
-            if "Server Report" not in res1:
-                print_pass("h1 bloqueado correctamente")
-            else:
-                print_fail("h1 logró conectar (NO DEBERÍA)")
-
-            # h2 -> h4 (Permitido)
-            print_step("Probando h2 -> h4 (Debe ser PERMITIDO)...")
-            cmd_client2 = 'iperf -c 10.0.0.4 -u -p 5001 -t 5'
-            print_cmd("h2", cmd_client2)
-            res2 = self.h2.cmd(cmd_client2)
-            print_output(res2)
-            if "Server Report" in res2:
-                print_pass("h2 conectó correctamente")
-            else:
-                print_fail("h2 no pudo conectar")
-                
-            print_step("Limpiando procesos...")
-            print_cmd("h4", "killall iperf")
-            self.h4.cmd('killall iperf')
+            self.header("TEST 4: BLOQUEO UDP ESPECÍFICO")
+
+            self.step("Iniciando servidor iperf UDP en h4:5001...")
+            server = self.serve(self.h4, ['iperf', '-s', '-u', '-p', '5001'], 5001, 'udp')
+            try:
+                # los clientes van de a uno: el servidor iperf UDP atiende un cliente por vez
+                for host, expect_blocked in ((self.h1, True), (self.h2, False)):
+                    started = time.time()
+                    self.step(f"Probando {host.name} -> h4 (Debe ser {'BLOQUEADO' if expect_blocked else 'PERMITIDO'})...")
+                    cmd = ['iperf', '-c', self.h4.IP(), '-u', '-p', '5001', '-t', str(IPERF_SECONDS)]
+                    self.show_cmd(host.name, cmd)
+                    code, res = finish(start(host, cmd))
+                    self.show_output(res)
+                    reached = "Server Report" in res
+                    if expect_blocked:
+                        self.record('udp', f"{host.name} -> h4:5001/udp", not reached,
+                                    f"{host.name} bloqueado correctamente" if not reached
+                                    else f"{host.name} logró conectar (NO DEBERÍA)", started)
+                    else:
+                        self.record('udp', f"{host.name} -> h4:5001/udp", reached,
+                                    f"{host.name} conectó correctamente" if reached
+                                    else f"{host.name} no pudo conectar", started)
+            finally:
+                self.step("Limpiando procesos...")
+                stop(server)
             self.wait_key()
 
+        def ping_pairs(self, test, pairs, expect_blocked):
+            """Pinguea todos los pares a la vez y registra cada uno."""
+            started = time.time()
+            procs = []
+            for host, ip, label in pairs:
+                self.step(f"Probando Ping {label}...")
+                procs.append(self.ping(host, ip))
+            passed = 0
+            for (host, ip, label), proc in zip(pairs, procs):
+                code, res = finish(proc)
+                self.show_output(res)
+                received = ping_received(res)
+                if expect_blocked:
+                    ok = received == 0
+                    detail = f"Tráfico {label} bloqueado" if ok else f"Tráfico {label} pasó (NO DEBERÍA)"
+                else:
+                    ok = received > 0
+                    detail = f"{label} OK" if ok else f"{label} FALLÓ"
+                self.record(test, label, ok, detail, started)
+                passed += ok
+            return passed
+
         def test_h2_h3(self):
-            print_header("TEST 5: BLOQUEO BIDIRECCIONAL h2 <-> h3")
-            
-            print_step("Probando Ping h2 -> h3...")
-            cmd1 = 'ping -c 4 10.0.0.3'
-            print_cmd("h2", cmd1)
-            r1 = self.h2.cmd(cmd1)
-            print_output(r1)
-            if "100% packet loss" in r1:
-                print_pass("Tráfico h2->h3 bloqueado")
-            else:
-                print_fail("Tráfico h2->h3 pasó (NO DEBERÍA)")
-
-            print_step("Probando Ping h3 -> h2...")
-            cmd2 = 'ping -c 4 10.0.0.2'
-            print_cmd("h3", cmd2)
-            r2 = self.h3.cmd(cmd2)
-            print_output(r2)
-            if "100% packet loss" in r2:
-                print_pass("Tráfico h3->h2 bloqueado")
-            else:
-                print_fail("Tráfico h3->h2 pasó (NO DEBERÍA)")
+            self.header("TEST 5: BLOQUEO BIDIRECCIONAL h2 <-> h3")
+            self.ping_pairs('h2_h3', [(self.h2, self.h3.IP(), 'h2 -> h3'),
+                                      (self.h3, self.h2.IP(), 'h3 -> h2')], expect_blocked=True)
             self.wait_key()
 
         def test_permitted(self):
-            print_header("TEST 6: TRÁFICO PERMITIDO")
-            
+            self.header("TEST 6: TRÁFICO PERMITIDO")
+
             pairs = [
-                (self.h1, '10.0.0.4', 'h1 -> h4'), 
-                (self.h1, '10.0.0.2', 'h1 -> h2'),
-                (self.h3, '10.0.0.4', 'h3 -> h4'),
-                (self.h2, '10.0.0.4', 'h2 -> h4')
+                (self.h1, self.h4.IP(), 'h1 -> h4'),
+                (self.h1, self.h2.IP(), 'h1 -> h2'),
+                (self.h3, self.h4.IP(), 'h3 -> h4'),
+                (self.h2, self.h4.IP(), 'h2 -> h4')
             ]
-            
-            passed_count = 0
-            for host, ip, label in pairs:
-                print_step(f"Probando {label}...")
-                cmd = f'ping -c 4 {ip}'
-                print_cmd(host.name, cmd)
-                res = host.cmd(cmd)
-                print_output(res)
-                if "0% packet loss" in res:
-                    print_pass(f"{label} OK")
-                    passed_count += 1
-                else:
-                    print_fail(f"{label} FALLÓ")
-            
-            print(f"\n{C_BOLD}Resumen: {passed_count}/{len(pairs)} sub-tests pasaron.{C_RESET}")
+            passed_count = self.ping_pairs('permitted', pairs, expect_blocked=False)
+
+            if self.interactive:
+                print(f"\n{C_BOLD}Resumen: {passed_count}/{len(pairs)} sub-tests pasaron.{C_RESET}")
             self.wait_key()
 
+        def run_probes(self, probes):
+            """
+            Corre las sondas en tandas de self.batch a la vez y registra
+            cada una contra su resultado esperado.
+
+            Por tanda se levanta un solo servidor por host destino con todos
+            los puertos que necesita, y se espera a que escuche en todos.
+            """
+            for first in range(0, len(probes), max(1, self.batch)):
+                chunk = probes[first:first + max(1, self.batch)]
+                started = time.time()
+
+                specs = {}
+                for probe in chunk:
+                    if probe.proto != 'icmp':
+                        specs.setdefault(probe.dst, set()).add((probe.proto, probe.dport))
+                servers = []
+                try:
+                    for host, ports in specs.items():
+                        cmd = ['python3', '-c', PROBE_SERVER] + [f'{proto}/{port}' for proto, port in sorted(ports)]
+                        servers.append(start(host, cmd))
+                        for proto in ('tcp', 'udp'):
+                            wanted = {port for p, port in ports if p == proto}
+                            if wanted and not wait_listening(host, wanted, proto):
+                                print_info(f"{host.name} no quedó escuchando en {proto} "
+                                           f"{sorted(wanted)} tras {READY_TIMEOUT} s")
+
+                    procs = []
+                    for probe in chunk:
+                        if probe.proto == 'icmp':
+                            procs.append(self.ping(probe.src, probe.dst.IP()))
+                        else:
+                            cmd = ['python3', '-c', PROBE_CLIENT, probe.proto, probe.dst.IP(),
+                                   str(probe.dport), str(probe.sport), str(PROBE_TIMEOUT)]
+                            procs.append(start(probe.src, cmd))
+                    outcomes = [finish(proc) for proc in procs]
+                finally:
+                    for server in servers:
+                        stop(server)
+
+                for probe, (code, output) in zip(chunk, outcomes):
+                    if probe.proto == 'icmp':
+                        label = f"{probe.src.name} -> {probe.dst.name} icmp"
+                        reached, error = ping_received(output) > 0, None
+                    else:
+                        label = (f"{probe.src.name}:{probe.sport} -> "
+                                 f"{probe.dst.name}:{probe.dport}/{probe.proto}")
+                        reached, error = code == 0, output.strip() if code not in (0, 1) else None
+
+                    if error:
+                        self.record('policy', label, False, f"{label}: error en la sonda ({error})", started)
+                    elif probe.expected_rule is not None:
+                        reason = rule_label(probe.expected_rule)
+                        self.record('policy', label, not reached,
+                                    f"{label} bloqueado ({reason})" if not reached
+                                    else f"{label} pasó (NO DEBERÍA: {reason})", started)
+                    else:
+                        self.record('policy', label, reached,
+                                    f"{label} permitido" if reached
+                                    else f"{label} bloqueado (NO DEBERÍA, ninguna regla lo descarta)",
+                                    started)
+
+        def test_policy(self):
+            self.header("TEST 7: MATRIZ DE LA POLÍTICA (GENERADA DESDE LAS REGLAS)")
+            started = time.time()
+            self.step(f"Cargando reglas desde {self.rules or 'controller/firewall_rules.json'}...")
+            try:
+                rule_set = load_policy(self.rules)
+            except Exception as e:
+                self.record('policy', 'reglas', False, f"No se pudieron cargar las reglas: {e}", started)
+                self.wait_key()
+                return
+
+            probes = generate_probes(self.net, rule_set, self.batch)
+            blocked = sum(1 for probe in probes if probe.expected_rule is not None)
+            self.step(f"{len(rule_set)} reglas, {len(self.net.hosts)} hosts: {len(probes)} sondas "
+                      f"({blocked} deberían bloquearse), de a {self.batch} a la vez...")
+            self.run_probes(probes)
+
+            if self.interactive:
+                results = [r for r in self.results if r['test'] == 'policy']
+                passed_count = sum(1 for r in results if r['passed'])
+                print(f"\n{C_BOLD}Resumen: {passed_count}/{len(results)} sondas con el resultado esperado.{C_RESET}")
+            self.wait_key()
+
+        def available(self):
+            """Tests que se pueden correr con los hosts de la topología."""
+            return [name for name, _ in self.TESTS
+                    if self.sample_hosts or name not in self.SAMPLE_TESTS]
+
         def run_all(self):
             print_header("EJECUTANDO TODOS LOS TESTS")
-            self.test_pingall()
-            self.test_port80()
-            self.test_port8000()
-            self.test_udp()
-            self.test_h2_h3()
-            self.test_permitted()
+            methods = dict(self.TESTS)
+            for name in self.available():
+                getattr(self, methods[name])()
             print(f"\n{C_GREEN}{C_BOLD}★ TODOS LOS TESTS COMPLETADOS ★{C_RESET}")
 
+        def run_headless(self, selection=None, workers=8):
+            """
+            Corre los tests elegidos (todos si selection es None) sin
+            preguntar, varios a la vez. Los tests usan puertos y procesos
+            distintos, así que son independientes entre sí.
+
+            Returns:
+                bool: True si pasaron todas las verificaciones
+            """
+            names = self.available()
+            selection = names if not selection else [name.strip() for name in selection]
+            unknown = [name for name in selection if name not in names]
+            if unknown:
+                print(f"{C_RED}Tests desconocidos: {', '.join(unknown)} (disponibles: {', '.join(names)}){C_RESET}")
+                return False
+
+            started = time.time()
+            methods = dict(self.TESTS)
+            parallel = [name for name in selection if name not in self.EXCLUSIVE]
+            exclusive = [name for name in selection if name in self.EXCLUSIVE]
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = [(name, pool.submit(getattr(self, methods[name]))) for name in parallel]
+                for name, future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.results.append({'test': name, 'name': name, 'passed': False,
+                                             'detail': f"Error inesperado: {e}", 'seconds': 0.0})
+            for name in exclusive:
+                try:
+                    getattr(self, methods[name])()
+                except Exception as e:
+                    self.results.append({'test': name, 'name': name, 'passed': False,
+                                         'detail': f"Error inesperado: {e}", 'seconds': 0.0})
+            self.seconds = time.time() - started
+
+            failed = [r for r in self.results if not r['passed']]
+            color = C_RED if failed else C_GREEN
+            print(f"\n{color}{C_BOLD}{len(self.results) - len(failed)}/{len(self.results)} "
+                  f"verificaciones pasaron en {self.seconds:.1f} s{C_RESET}")
+            return not failed
+
+        def write_report(self, path):
+            """Reporte JSON, o JUnit XML si path termina en .xml."""
+            failures = sum(1 for r in self.results if not r['passed'])
+            if path.endswith('.xml'):
+                suite = ElementTree.Element('testsuite', name='firewall', tests=str(len(self.results)),
+                                            failures=str(failures), errors='0',
+                                            time='%.3f' % getattr(self, 'seconds', 0.0))
+                for r in self.results:
+                    case = ElementTree.SubElement(suite, 'testcase', classname=f"firewall.{r['test']}",
+                                                  name=r['name'], time='%.3f' % r['seconds'])
+                    if not r['passed']:
+                        ElementTree.SubElement(case, 'failure', message=r['detail'])
+                    else:
+                        ElementTree.SubElement(case, 'system-out').text = r['detail']
+                ElementTree.ElementTree(suite).write(path, encoding='utf-8', xml_declaration=True)
+            else:
+                with open(path, 'w') as f:
+                    json.dump({'passed': len(self.results) - failures, 'failed': failures,
+                               'seconds': getattr(self, 'seconds', None), 'results': self.results},
+                              f, indent=2, ensure_ascii=False)
+            print_info(f"Reporte guardado en {path}")
+
         def run(self):
             self.banner()
             while True:
@@ -279,8 +647,9 @@ def main():
                     elif opt == '4': self.test_udp()
                     elif opt == '5': self.test_h2_h3()
                     elif opt == '6': self.test_permitted()
-                    elif opt == '7': self.run_all()
-                    elif opt == '0': 
+                    elif opt == '7': self.test_policy()
+                    elif opt == '8': self.run_all()
+                    elif opt == '0':
                         print(f"\n{C_GREEN}Saliendo...{C_RESET}")
                         break
                     else: print(f"{C_RED}Opción inválida{C_RESET}")
@@ -291,6 +660,62 @@ def main():
                     print(f"{C_RED}Error inesperado: {e}{C_RESET}")
                     break
 
-    FirewallTestSuite(net).run()
+    suite = FirewallTestSuite(net, interactive=not headless, rules=rules, batch=batch)
+    if not headless:
+        suite.run()
+        return None
+
+    success = suite.run_headless(selection, workers)
+    if report:
+        suite.write_report(report)
+    return success
+
+
+def run_standalone():
+    """
+    Levanta la topología de cadena contra el controlador remoto (como
+    run_topology.sh), corre los tests en modo headless y devuelve el
+    código de salida.
+    """
+    import argparse
+    import os
+    import sys
+    from mininet.net import Mininet
+    from mininet.node import RemoteController, OVSKernelSwitch
+    from mininet.log import setLogLevel
 
-main()
\ No newline at end of file
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from topology import ChainTopology
+
+    parser = argparse.ArgumentParser(description="Suite de tests del firewall en modo headless")
+    parser.add_argument('--switches', type=int, default=2, help='Switches de la cadena')
+    parser.add_argument('--controller', default='127.0.0.1:6633', metavar='IP:PUERTO')
+    parser.add_argument('--tests', help='Tests separados por coma (default: todos)')
+    parser.add_argument('--report', metavar='ARCHIVO', help='Reporte JSON, o JUnit si termina en .xml')
+    parser.add_argument('--workers', type=int, default=8, help='Tests simultáneos')
+    parser.add_argument('--rules', metavar='ARCHIVO',
+                        help='Política del test policy; debe ser la misma que cargó el controlador '
+                             '(default: controller/firewall_rules.json)')
+    parser.add_argument('--batch', type=int, default=64, help='Sondas simultáneas del test policy')
+    args = parser.parse_args()
+
+    setLogLevel('warning')
+    ip, port = args.controller.rsplit(':', 1)
+    net = Mininet(topo=ChainTopology(N=args.switches), switch=OVSKernelSwitch,
+                  controller=RemoteController('c0', ip=ip, port=int(port)),
+                  autoSetMacs=True, autoStaticArp=True)
+    net.start()
+    try:
+        net.waitConnected()
+        success = main(net, headless=True, selection=args.tests.split(',') if args.tests else None,
+                       report=args.report, workers=args.workers, rules=args.rules, batch=args.batch)
+    finally:
+        net.stop()
+    return 0 if success else 1
+
+
+if globals().get('__name__') == '__main__':
+    import sys
+    sys.exit(run_standalone())
+else:
+    main()
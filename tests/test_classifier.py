@@ -0,0 +1,172 @@
+"""
+Tests del clasificador de paquetes (controller/classifier.py).
+
+Uso:
+    python3 -m unittest discover tests
+"""
+
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'controller'))
+
+from classifier import Classifier, linear_lookup, packet_tuple
+from compiled_rules import (FirewallRule, IP_TYPE, IP_PROTO_ICMP, IP_PROTO_TCP, IP_PROTO_UDP,
+                            ACTION_ALLOW, ACTION_DROP)
+
+ARP_TYPE = 0x0806
+SOURCES = [0x0a000001, 0x0a000002, 0x0a000081, 0x0a000101, 0x0b000001]
+DESTINATIONS = [0x0a000003, 0x0a000004, 0x0a000104]
+
+
+def rule(src=None, dst=None, proto=None, sport=None, dport=None, priority=100,
+         action=ACTION_DROP, dl_type=IP_TYPE):
+    return FirewallRule(1, dl_type, src, dst, proto, sport, dport, priority, action)
+
+
+def prefix(address, length):
+    return (address & ((0xffffffff << (32 - length)) & 0xffffffff), length)
+
+
+class ClassifierTest(unittest.TestCase):
+
+    def test_packet_tuple(self):
+        self.assertEqual(packet_tuple('10.0.0.1', '10.0.0.2', 'tcp', 1234, 80),
+                         (IP_TYPE, 0x0a000001, 0x0a000002, IP_PROTO_TCP, 1234, 80))
+
+    def test_highest_priority_wins(self):
+        low = rule(src=(0x0a000000, 24), priority=10)
+        high = rule(src=(0x0a000001, 32), proto=IP_PROTO_TCP, priority=20, action=ACTION_ALLOW)
+        classifier = Classifier([low, high])
+        self.assertIs(classifier.lookup(*packet_tuple('10.0.0.1', '10.0.0.9', 'tcp', 1, 80)), high)
+        self.assertIs(classifier.lookup(*packet_tuple('10.0.0.1', '10.0.0.9', 'udp', 1, 80)), low)
+        self.assertIsNone(classifier.lookup(*packet_tuple('10.0.1.1', '10.0.0.9', 'udp', 1, 80)))
+
+    def test_early_exit_uses_rule_priority(self):
+        # la forma /32 tiene una regla de prioridad 300 que no matchea y otra de
+        # 10 que sí: no se puede cortar la búsqueda por la prioridad máxima de la
+        # forma, hay que seguir hasta la regla de 50 de la forma /24. La forma
+        # de solo protocolo (máxima 55) todavía se consulta, pero su regla de
+        # prioridad 5 no reemplaza a la de 50
+        rules = [rule(src=(0x0a000009, 32), priority=300),
+                 rule(src=(0x0a000001, 32), priority=10),
+                 rule(src=(0x0a000900, 24), priority=60),
+                 rule(src=(0x0a000000, 24), priority=50, action=ACTION_ALLOW),
+                 rule(proto=IP_PROTO_TCP, priority=55),
+                 rule(proto=IP_PROTO_ICMP, priority=5)]
+        classifier = Classifier(rules)
+        self.assertEqual(classifier.shapes, 3)
+        self.assertIs(classifier.lookup(*packet_tuple('10.0.0.1', '10.0.0.2', 'icmp')), rules[3])
+
+    def test_early_exit_on_equal_priority(self):
+        # con una regla de prioridad igual a la máxima de las formas restantes
+        # la búsqueda corta: el resultado tiene esa prioridad y matchea
+        first = rule(src=(0x0a000001, 32), priority=100)
+        second = rule(dst=(0x0a000002, 32), priority=100, action=ACTION_ALLOW)
+        packet = packet_tuple('10.0.0.1', '10.0.0.2', 'icmp')
+        for rules in ([first, second], [second, first]):
+            found = Classifier(rules).lookup(*packet)
+            self.assertEqual(found.priority, 100)
+            self.assertTrue(found.matches(*packet))
+            self.assertEqual(found.priority, linear_lookup(rules, *packet).priority)
+
+    def test_same_match_keeps_highest_priority(self):
+        low = rule(dport=80, proto=IP_PROTO_TCP, priority=10)
+        high = rule(dport=80, proto=IP_PROTO_TCP, priority=20, action=ACTION_ALLOW)
+        for rules in ([low, high], [high, low]):
+            classifier = Classifier(rules)
+            self.assertEqual(len(classifier), 2)
+            self.assertEqual(classifier.shapes, 1)
+            packet = packet_tuple('1.1.1.1', '2.2.2.2', 'tcp', 5, 80)
+            self.assertIs(classifier.lookup(*packet), high)
+
+    def test_non_ip_packet(self):
+        ip_rule = rule(src=(0x0a000000, 24))
+        arp_rule = rule(dl_type=ARP_TYPE, priority=5)
+        classifier = Classifier([ip_rule, arp_rule])
+        self.assertIs(classifier.lookup(ARP_TYPE, None, None, None), arp_rule)
+
+    def random_rules(self, rng):
+        rules = []
+        for _ in range(rng.randint(1, 25)):
+            src = prefix(rng.choice(SOURCES), rng.choice([8, 24, 25, 32])) \
+                if rng.random() < 0.6 else None
+            dst = prefix(rng.choice(DESTINATIONS), rng.choice([16, 24, 32])) \
+                if rng.random() < 0.4 else None
+            proto = rng.choice([IP_PROTO_TCP, IP_PROTO_UDP, IP_PROTO_ICMP]) \
+                if rng.random() < 0.6 else None
+            sport = dport = None
+            if proto in (IP_PROTO_TCP, IP_PROTO_UDP):
+                if rng.random() < 0.3:
+                    sport = rng.choice([1234, 53])
+                if rng.random() < 0.5:
+                    dport = rng.choice([80, 443, 53])
+            dl_type = ARP_TYPE if rng.random() < 0.05 and src is dst is proto is None else IP_TYPE
+            rules.append(rule(src, dst, proto, sport, dport, rng.choice([0, 10, 100, 100, 32768]),
+                              rng.choice([ACTION_ALLOW, ACTION_DROP]), dl_type))
+        return rules
+
+    def packets(self):
+        for src in SOURCES:
+            for dst in DESTINATIONS:
+                yield (IP_TYPE, src, dst, IP_PROTO_ICMP, None, None)
+                for proto in (IP_PROTO_TCP, IP_PROTO_UDP):
+                    for sport in (1234, 53, None):
+                        for dport in (80, 443, 53, None):
+                            yield (IP_TYPE, src, dst, proto, sport, dport)
+        yield (ARP_TYPE, None, None, None, None, None)
+
+    def test_matches_linear_lookup(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            rules = self.random_rules(rng)
+            classifier = Classifier(rules)
+            for packet in self.packets():
+                found = classifier.lookup(*packet)
+                expected = linear_lookup(rules, *packet)
+                if expected is None:
+                    self.assertIsNone(found, packet)
+                    continue
+                self.assertIsNotNone(found, packet)
+                self.assertEqual(found.priority, expected.priority, packet)
+                self.assertTrue(found.matches(*packet), packet)
+                if sum(1 for r in rules if r.priority == expected.priority and
+                       r.matches(*packet)) == 1:
+                    self.assertIs(found, expected, packet)
+
+    def test_depends_on_ports(self):
+        classifier = Classifier([rule(src=(0x0a000000, 24), proto=IP_PROTO_TCP, priority=10),
+                                 rule(dst=(0x0a000002, 32), proto=IP_PROTO_TCP, dport=80,
+                                      priority=20, action=ACTION_ALLOW)])
+        src, dst = 0x0a000001, 0x0a000002
+        self.assertTrue(classifier.depends_on_ports(IP_TYPE, src, dst, IP_PROTO_TCP, 10))
+        # la regla con puertos no tiene mayor prioridad
+        self.assertFalse(classifier.depends_on_ports(IP_TYPE, src, dst, IP_PROTO_TCP, 20))
+        # otro destino u otro protocolo: la regla con puertos no puede aplicar
+        self.assertFalse(classifier.depends_on_ports(IP_TYPE, src, 0x0a000003, IP_PROTO_TCP, 10))
+        self.assertFalse(classifier.depends_on_ports(IP_TYPE, src, dst, IP_PROTO_UDP, 10))
+
+    def test_depends_on_ports_matches_brute_force(self):
+        rng = random.Random(13)
+        for _ in range(200):
+            rules = self.random_rules(rng)
+            classifier = Classifier(rules)
+            for src in SOURCES:
+                for dst in DESTINATIONS:
+                    for proto in (IP_PROTO_TCP, IP_PROTO_UDP):
+                        for priority in (0, 10, 100):
+                            expected = any(
+                                r.priority > priority and
+                                (r.src_port is not None or r.dst_port is not None) and
+                                r.matches(IP_TYPE, src, dst, proto, r.src_port, r.dst_port)
+                                for r in rules)
+                            self.assertEqual(
+                                classifier.depends_on_ports(IP_TYPE, src, dst, proto, priority),
+                                expected, (src, dst, proto, priority))
+
+
+if __name__ == '__main__':
+    unittest.main()
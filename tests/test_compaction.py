@@ -0,0 +1,151 @@
+"""
+Tests de la compactación de reglas (controller/utils.py, compact_rules).
+
+Uso:
+    python3 -m unittest discover tests
+"""
+
+import os
+import random
+import socket
+import struct
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'pox'))
+sys.path.insert(0, os.path.join(ROOT, 'controller'))
+
+import utils
+from classifier import linear_lookup, packet_tuple
+from compiled_rules import FirewallRule
+
+SOURCES = ['10.0.0.0', '10.0.0.1', '10.0.0.128', '10.0.0.255', '10.0.1.0', '11.0.0.0']
+DESTINATIONS = ['10.0.0.2', '10.0.0.3', '10.0.1.2']
+
+
+def build(*dicts):
+    """FirewallRule a partir de reglas en el formato de firewall_rules.json."""
+    rules = []
+    for rule in dicts:
+        rule = dict(rule, switch=rule.get('switch', 1))
+        assert utils.check_rule(rule) is None, rule
+        rules.append(FirewallRule.from_dict(rule, utils.parse_ip_prefix))
+    return rules
+
+
+def prefix(address, length):
+    """Prefijo de largo length que contiene a address ("10.0.0.1", 24 -> "10.0.0.0/24")."""
+    network = struct.unpack('!I', socket.inet_aton(address))[0] & utils._prefix_mask(length)
+    return utils.format_ip_prefix(network, length)
+
+
+def compact(*dicts):
+    return utils.compact_rules(build(*dicts))
+
+
+class CompactionTest(unittest.TestCase):
+
+    def test_duplicates_merged(self):
+        rules = compact({'protocol': 'TCP', 'dst_port': 80, 'description': 'a'},
+                        {'protocol': 'TCP', 'dst_port': 80, 'description': 'b'})
+        self.assertEqual(len(rules), 1)
+        self.assertEqual(rules[0].description, 'a | b')
+
+    def test_same_match_other_switch_kept(self):
+        rules = compact({'protocol': 'TCP', 'dst_port': 80},
+                        {'protocol': 'TCP', 'dst_port': 80, 'switch': 2})
+        self.assertEqual(sorted(rule.switch for rule in rules), [1, 2])
+
+    def test_sibling_prefixes_merged(self):
+        rules = compact({'src_ip': '10.0.0.0/25', 'protocol': 'UDP'},
+                        {'src_ip': '10.0.0.128/25', 'protocol': 'UDP'})
+        self.assertEqual(len(rules), 1)
+        self.assertEqual(rules[0].src_ip, '10.0.0.0/24')
+
+    def test_sibling_merge_repeats(self):
+        # cuatro /26 se unen en dos /25 y luego en un /24
+        rules = compact(*[{'dst_ip': '10.0.0.%d/26' % start} for start in (0, 64, 128, 192)])
+        self.assertEqual([rule.dst_ip for rule in rules], ['10.0.0.0/24'])
+
+    def test_siblings_with_different_priority_not_merged(self):
+        rules = compact({'src_ip': '10.0.0.0/25', 'priority': 10},
+                        {'src_ip': '10.0.0.128/25', 'priority': 20})
+        self.assertEqual(len(rules), 2)
+
+    def test_non_sibling_prefixes_not_merged(self):
+        rules = compact({'src_ip': '10.0.0.128/25'}, {'src_ip': '10.0.1.0/25'})
+        self.assertEqual(len(rules), 2)
+
+    def test_shadowed_by_higher_priority(self):
+        rules = compact({'src_ip': '10.0.0.1', 'protocol': 'TCP', 'priority': 10},
+                        {'src_ip': '10.0.0.0/24', 'priority': 20})
+        self.assertEqual([rule.src_ip for rule in rules], ['10.0.0.0/24'])
+
+    def test_covered_with_same_priority_and_action(self):
+        rules = compact({'src_ip': '10.0.0.1', 'protocol': 'TCP', 'dst_port': 80},
+                        {'protocol': 'TCP', 'dst_port': 80})
+        self.assertEqual(len(rules), 1)
+        self.assertIsNone(rules[0].src_ip)
+
+    def test_cover_with_lower_priority_keeps_rule(self):
+        rules = compact({'src_ip': '10.0.0.1', 'protocol': 'TCP', 'priority': 20},
+                        {'src_ip': '10.0.0.0/24', 'priority': 10})
+        self.assertEqual(len(rules), 2)
+
+    def test_cover_with_other_action_keeps_rule(self):
+        rules = compact({'src_ip': '10.0.0.1', 'protocol': 'TCP', 'action': 'allow'},
+                        {'src_ip': '10.0.0.0/24'})
+        self.assertEqual(len(rules), 2)
+
+    def test_cover_on_other_switch_keeps_rule(self):
+        rules = compact({'src_ip': '10.0.0.1', 'priority': 10},
+                        {'src_ip': '10.0.0.0/24', 'priority': 20, 'switch': 2})
+        self.assertEqual(len(rules), 2)
+
+    def test_matches_linear_lookup(self):
+        """La política compactada decide lo mismo que la original en paquetes de muestra."""
+        rng = random.Random(7)
+
+        def random_rule():
+            rule = {}
+            if rng.random() < 0.7:
+                length = rng.choice([8, 24, 25, 31, 32])
+                rule['src_ip'] = prefix(rng.choice(SOURCES), length)
+            if rng.random() < 0.5:
+                length = rng.choice([16, 24, 32])
+                rule['dst_ip'] = prefix(rng.choice(DESTINATIONS), length)
+            if rng.random() < 0.6 or not rule:
+                rule['protocol'] = rng.choice(['TCP', 'UDP', 'ICMP'])
+                if rule['protocol'] != 'ICMP' and rng.random() < 0.6:
+                    rule['dst_port'] = rng.choice([80, 443, 8000])
+            if rng.random() < 0.5:
+                rule['priority'] = rng.choice([10, 100, 32768])
+            if rng.random() < 0.3:
+                rule['action'] = 'allow'
+            return rule
+
+        packets = [packet_tuple(src, dst, proto, 1234 if proto != 'icmp' else None,
+                                port if proto != 'icmp' else None)
+                   for src in SOURCES for dst in DESTINATIONS
+                   for proto in ('tcp', 'udp', 'icmp') for port in (80, 443, 22)]
+
+        for _ in range(200):
+            rules = build(*[random_rule() for _ in range(rng.randint(2, 12))])
+            compacted = utils.compact_rules(list(rules))
+            self.assertLessEqual(len(compacted), len(rules))
+            for packet in packets:
+                matching = [rule for rule in rules if rule.matches(*packet)]
+                if matching:
+                    top = max(rule.priority for rule in matching)
+                    if len({rule.action for rule in matching if rule.priority == top}) > 1:
+                        # conflicto: OpenFlow no define cuál se aplica
+                        continue
+                before = linear_lookup(rules, *packet)
+                after = linear_lookup(compacted, *packet)
+                self.assertEqual(before is None or before.allows,
+                                 after is None or after.allows, packet)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Tests del formato compilado de reglas (controller/compiled_rules.py).
+
+Uso:
+    python3 -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'pox'))
+sys.path.insert(0, os.path.join(ROOT, 'controller'))
+
+import utils
+from compiled_rules import (CompiledRuleSet, RECORD_SIZE, _HEADER, _INDEX_ENTRY,
+                            write_compiled_rules)
+
+RULES = [
+    {'switch': 1, 'src_ip': '10.0.0.1', 'dst_ip': '10.0.0.2',
+     'protocol': 'TCP', 'dst_port': 80, 'action': 'DROP', 'priority': 300},
+    {'switch': 1, 'dst_ip': '10.0.0.0/24', 'protocol': 'UDP',
+     'dst_port': '5000-5001', 'action': 'ALLOW', 'priority': 200},
+    {'switch': 2, 'protocol': 'ICMP', 'action': 'DROP', 'priority': 100},
+]
+
+
+class CompiledRulesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.json_path = os.path.join(self.tmp, 'rules.json')
+        self.bin_path = os.path.join(self.tmp, 'rules.bin')
+        with open(self.json_path, 'w') as f:
+            json.dump({'rules': RULES}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def compile(self):
+        rules = utils.load_firewall_rules(raise_errors=True, path=self.json_path)
+        write_compiled_rules(rules, self.bin_path)
+        return rules
+
+    def write_bytes(self, data):
+        with open(self.bin_path, 'wb') as f:
+            f.write(data)
+
+    def test_round_trip(self):
+        rules = self.compile()
+        rule_set = CompiledRuleSet(self.bin_path)
+        try:
+            self.assertEqual(len(rule_set), len(rules))
+            self.assertEqual(rule_set.switch_counts(), {1: 3, 2: 1})
+            self.assertEqual({rule.key() for rule in rule_set},
+                             {rule.key() for rule in rules})
+        finally:
+            rule_set.close()
+
+    def test_cli(self):
+        # el compilador corre fuera de pox.py, sin el core de POX inicializado
+        result = subprocess.run(
+            [sys.executable, os.path.join(ROOT, 'controller', 'compiled_rules.py'),
+             self.json_path, self.bin_path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("4 regla(s) compiladas", result.stdout)
+
+        rule_set = utils.load_rule_set(raise_errors=True, path=self.bin_path)
+        try:
+            self.assertEqual(len(rule_set), 4)
+        finally:
+            rule_set.close()
+
+    def test_empty_file(self):
+        self.write_bytes(b'')
+        with self.assertRaises(ValueError):
+            CompiledRuleSet(self.bin_path)
+
+    def test_truncated_file(self):
+        self.compile()
+        with open(self.bin_path, 'rb') as f:
+            data = f.read()
+        for size in (_HEADER.size - 1, _HEADER.size, len(data) - 1):
+            self.write_bytes(data[:size])
+            with self.assertRaises(ValueError):
+                CompiledRuleSet(self.bin_path)
+        # load_rule_set lo reporta y devuelve un conjunto vacío
+        self.assertEqual(len(utils.load_rule_set(path=self.bin_path)), 0)
+
+    def test_trailing_bytes(self):
+        self.compile()
+        with open(self.bin_path, 'ab') as f:
+            f.write(b'\0' * RECORD_SIZE)
+        with self.assertRaises(ValueError):
+            CompiledRuleSet(self.bin_path)
+
+    def test_index_out_of_range(self):
+        self.compile()
+        with open(self.bin_path, 'rb') as f:
+            data = bytearray(f.read())
+        # el segundo switch (dpid 2) pasa a declarar una regla de más
+        offset = _HEADER.size + _INDEX_ENTRY.size
+        switch_id, first, count = _INDEX_ENTRY.unpack_from(data, offset)
+        _INDEX_ENTRY.pack_into(data, offset, switch_id, first, count + 1)
+        self.write_bytes(bytes(data))
+        with self.assertRaises(ValueError):
+            CompiledRuleSet(self.bin_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+"""
+Tests del parser DNS corregido (dns.py de la raíz del repositorio).
+
+dns.py se carga como pox.lib.packet.dns (ver benchmarks/dns_messages.py),
+así que necesita POX en ./pox (ver install_pox.sh); sin POX los tests se
+saltean.
+
+Uso:
+    python3 -m unittest discover tests
+"""
+
+import logging
+import os
+import struct
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import dns_messages
+from dns_messages import encode_name
+
+try:
+    dns_module = dns_messages.load_dns_module()
+except ImportError as e:
+    dns_module = None
+    SKIP_REASON = "POX no está instalado (%s)" % e
+
+TYPE_A = 1
+TYPE_AAAA = 28
+CLASS_IN = 1
+
+
+def build_message():
+    """Respuesta con un registro de cada tipo con RDATA estructurado."""
+    from pox.lib.addresses import IPAddr6
+
+    dns = dns_module.dns
+    msg = dns()
+    msg.id = 7
+    msg.qr = True
+    msg.questions.append(dns.question('example.com', dns_messages.TYPE_SOA, CLASS_IN))
+    msg.answers.append(dns.rr('example.com', dns_messages.TYPE_SOA, CLASS_IN, 300, 0,
+                              dns.soa('ns1.example.com', 'admin.example.com',
+                                      2024, 3600, 600, 86400, 60)))
+    msg.answers.append(dns.rr('example.com', dns_messages.TYPE_MX, CLASS_IN, 300, 0,
+                              dns.mx(10, 'mail.example.com')))
+    msg.answers.append(dns.rr('example.com', dns_messages.TYPE_TXT, CLASS_IN, 300, 0,
+                              dns.txt([b'v=spf1 -all', 'hello'])))
+    msg.answers.append(dns.rr('_sip._tcp.example.com', dns_messages.TYPE_SRV, CLASS_IN, 300, 0,
+                              dns.srv(1, 5, 5060, 'sip.example.com')))
+    msg.answers.append(dns.rr('example.com', TYPE_AAAA, CLASS_IN, 300, 0,
+                              IPAddr6('2001:db8::1')))
+    msg.additional.append(dns.rr('', dns_messages.TYPE_OPT, 0, 0, 0,
+                                 dns.opt(1232, dnssec_ok=True, options=[(10, b'12345678')])))
+    return msg
+
+
+def message_with_answer(rtype, rdata, name=None):
+    """Respuesta sin preguntas con un registro de RDATA arbitrario."""
+    msg = struct.pack('!HBBHHHH', 1, 0x81, 0x80, 0, 1, 0, 0)
+    return msg + (name or encode_name('example.com')) + \
+        struct.pack('!HHIH', rtype, CLASS_IN, 300, len(rdata)) + rdata
+
+
+def summary(msg):
+    """Todo lo que se ve de un mensaje parseado, para comparar entre modos."""
+    out = [msg.parsed, msg.id, msg.qr, msg.opcode, msg.rd, msg.rcode]
+    try:
+        out.append(str(msg))
+        for section in (msg.questions, msg.answers, msg.authorities, msg.additional):
+            out.append([str(record) for record in section])
+    except Exception as e:
+        out.append(type(e).__name__)
+    return out
+
+
+@unittest.skipIf(dns_module is None, globals().get('SKIP_REASON'))
+class DnsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # los mensajes malformados se loguean; no interesan acá
+        logging.disable(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_round_trip(self):
+        msg = build_message()
+        raw = msg.pack()
+        for lazy in (False, True):
+            parsed = dns_module.dns(raw=raw, lazy=lazy)
+            self.assertTrue(parsed.parsed)
+            self.assertEqual(parsed.id, 7)
+            self.assertEqual(parsed.questions[0].name, b'example.com')
+            for sent, received in zip(msg.answers + msg.additional,
+                                      parsed.answers + parsed.additional):
+                self.assertEqual(received.qtype, sent.qtype)
+                self.assertEqual(received.rddata, sent.rddata)
+            self.assertEqual(parsed.pack(), raw)
+
+    def test_round_trip_fields(self):
+        parsed = dns_module.dns(raw=build_message().pack())
+        soa, mx, txt, srv, aaaa = [record.rddata for record in parsed.answers]
+        self.assertEqual((soa.mname, soa.rname, soa.serial, soa.minimum),
+                         (b'ns1.example.com', b'admin.example.com', 2024, 60))
+        self.assertEqual((mx.preference, mx.exchange), (10, b'mail.example.com'))
+        self.assertEqual(txt.strings, [b'v=spf1 -all', b'hello'])
+        self.assertEqual((srv.priority, srv.weight, srv.port, srv.target),
+                         (1, 5, 5060, b'sip.example.com'))
+        self.assertEqual(str(aaaa), '2001:db8::1')
+        opt = parsed.additional[0].rddata
+        self.assertEqual((opt.udp_size, opt.dnssec_ok, opt.options),
+                         (1232, True, [(10, b'12345678')]))
+
+    def test_srv_target_not_compressed(self):
+        self.assertIn(encode_name('sip.example.com'), build_message().pack())
+
+    def test_handcrafted_records(self):
+        parsed = dns_module.dns(raw=dns_messages.build_records())
+        self.assertEqual([record.qtype for record in parsed.answers + parsed.additional],
+                         [dns_messages.TYPE_SOA, dns_messages.TYPE_MX, dns_messages.TYPE_TXT,
+                          dns_messages.TYPE_SRV, dns_messages.TYPE_OPT])
+        self.assertEqual(parsed.answers[1].rddata.exchange, b'mail.example.com')
+
+    def test_pointer_loop_rejected(self):
+        raw = dns_messages.build_pointer_loop()
+        with self.assertRaises(dns_module.DNSNameError):
+            dns_module.dns.read_dns_name_from_index(raw, 12)
+        question = dns_module.dns(raw=raw).questions[0]
+        with self.assertRaises(dns_module.DNSNameError):
+            question.name
+
+    def test_forward_pointer_rejected(self):
+        # la pregunta apunta al nombre que viene después de ella
+        raw = struct.pack('!HBBHHHH', 1, 0x01, 0x00, 1, 0, 0, 0) + b'\xc0\x12' + \
+            struct.pack('!HH', TYPE_A, CLASS_IN) + encode_name('example.com')
+        with self.assertRaises(dns_module.DNSNameError):
+            dns_module.dns.read_dns_name_from_index(raw, 12)
+
+    def test_pointer_chain_limit(self):
+        raw = dns_messages.build_pointer_chain(200)
+        with self.assertRaises(dns_module.DNSNameError):
+            dns_module.dns(raw=raw).answers[-1].name
+        self.assertEqual(dns_module.dns(raw=raw).answers[100].name, b'www.example.com')
+
+    def test_name_length_limit(self):
+        # 255 bytes en formato de cable: 3 etiquetas de 63 y una de 61
+        longest = encode_name('.'.join(['a' * 63] * 3 + ['b' * 61]))
+        self.assertEqual(len(longest), 255)
+        end, name = dns_module.dns.read_dns_name_from_index(longest, 0)
+        self.assertEqual(end, 255)
+        self.assertEqual(len(name), 253)
+
+        too_long = encode_name('.'.join(['a' * 63] * 3 + ['b' * 62]))
+        with self.assertRaises(dns_module.DNSNameError):
+            dns_module.dns.read_dns_name_from_index(too_long, 0)
+
+    def test_name_length_limit_through_pointer(self):
+        # el límite vale para el nombre completo, aunque parte venga de un puntero
+        suffix = encode_name('.'.join(['a' * 63] * 3))
+        raw = suffix + b'\x3f' + b'b' * 63 + b'\xc0\x00'
+        with self.assertRaises(dns_module.DNSNameError):
+            dns_module.dns.read_dns_name_from_index(raw, len(suffix))
+
+    def test_parse_batch_lazy_and_eager(self):
+        seeds = [dns_messages.build_records(), dns_messages.build_response(3, 5),
+                 dns_messages.build_query(), dns_messages.build_pointer_loop(),
+                 build_message().pack()]
+        # además de los mensajes completos, cada uno truncado en varios puntos
+        payloads = list(seeds)
+        for seed in seeds:
+            payloads += [seed[:size] for size in range(0, len(seed), 7)]
+
+        results = {}
+        for lazy in (False, True):
+            batch = list(dns_module.dns.parse_batch(payloads, lazy=lazy))
+            results[lazy] = [summary(msg) for msg in batch]
+            self.assertEqual(results[lazy],
+                             [summary(dns_module.dns(raw=raw, lazy=lazy)) for raw in payloads],
+                             lazy)
+        # los mensajes bien formados se ven igual en los dos modos; los
+        # truncados solo difieren en parsed (el modo lazy no llega a decodificarlos)
+        self.assertEqual(results[True][:len(seeds)], results[False][:len(seeds)])
+        self.assertEqual([r[1:] for r in results[True]], [r[1:] for r in results[False]])
+
+    def test_malformed_rdata_str(self):
+        # MX cuyo nombre es un puntero hacia adelante y TXT con un largo que
+        # se pasa del RDATA: el mensaje se parsea y str() los muestra como
+        # malformados en lugar de fallar
+        for rtype, rdata in ((dns_messages.TYPE_MX, b'\x00\x0a\xc0\x3f'),
+                             (dns_messages.TYPE_TXT, b'\x05ab')):
+            for lazy in (False, True):
+                msg = dns_module.dns(raw=message_with_answer(rtype, rdata), lazy=lazy)
+                self.assertTrue(msg.parsed)
+                text = str(msg.answers[0])
+                self.assertIn('<malformed: ', text)
+                self.assertIn('<malformed: ', str(msg))
+
+        # tras el error, los campos que se llegaron a decodificar siguen disponibles
+        mx = dns_module.dns(raw=message_with_answer(dns_messages.TYPE_MX,
+                                                    b'\x00\x0a\xc0\x3f')).answers[0].rddata
+        with self.assertRaises(dns_module.DNSNameError):
+            mx.exchange
+        self.assertEqual(mx.preference, 10)
+        with self.assertRaises(dns_module.DNSNameError):
+            mx.exchange
+
+    def test_malformed_name_str(self):
+        msg = dns_module.dns(raw=dns_messages.build_pointer_loop())
+        self.assertIn('<malformed: ', str(msg.questions[0]))
+        self.assertIn('<malformed: ', str(msg))
+
+
+if __name__ == '__main__':
+    unittest.main()
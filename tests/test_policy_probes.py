@@ -0,0 +1,145 @@
+"""
+Tests de las sondas del test policy (policy_probes.py), sin Mininet.
+
+La red es un doble con la forma que usa policy_probes: la cadena de
+topology.py con dos switches (h1, h2 -- s1 -- s2 -- h3, h4).
+
+Uso:
+    python3 -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import policy_probes
+
+RULES = [
+    {'description': 'web', 'protocol': 'TCP', 'dst_port': 80, 'switch': 1},
+    {'description': 'h1 udp 5001', 'src_ip': '10.0.0.1', 'protocol': 'UDP',
+     'dst_port': 5001, 'switch': 1},
+    {'description': 'h2 a h3', 'src_ip': '10.0.0.2', 'dst_ip': '10.0.0.3', 'switch': 2},
+]
+
+
+class Node(object):
+
+    def __init__(self, name, ip=None, dpid=None):
+        self.name, self.ip, self.dpid = name, ip, dpid
+
+    def IP(self):
+        return self.ip
+
+
+class Intf(object):
+
+    def __init__(self, node):
+        self.node = node
+
+
+class Link(object):
+
+    def __init__(self, a, b):
+        self.intf1, self.intf2 = Intf(a), Intf(b)
+
+
+class Net(object):
+
+    def __init__(self):
+        self.hosts = [Node('h%d' % i, '10.0.0.%d' % i) for i in range(1, 5)]
+        h1, h2, h3, h4 = self.hosts
+        s1, s2 = self.switches = [Node('s1', dpid='%016x' % 1), Node('s2', dpid='%016x' % 2)]
+        self.links = [Link(h1, s1), Link(h2, s1), Link(s1, s2), Link(h3, s2), Link(h4, s2)]
+
+    def host(self, name):
+        return next(host for host in self.hosts if host.name == name)
+
+
+class PolicyProbesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'rules.json')
+        with open(self.path, 'w') as f:
+            json.dump({'rules': RULES}, f)
+        self.net = Net()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def probes(self, batch_size=4):
+        rule_set = policy_probes.load_policy(self.path)
+        return policy_probes.generate_probes(self.net, rule_set, batch_size)
+
+    def expected(self, probes):
+        """(src, dst, proto, sport, dport) -> descripción de la regla que la bloquea."""
+        return {(p.src.name, p.dst.name, p.proto, p.sport, p.dport):
+                p.expected_rule.description if p.expected_rule else None
+                for p in probes}
+
+    def test_load_policy(self):
+        self.assertEqual(len(policy_probes.load_policy(self.path)), 3)
+
+    def test_load_policy_broken_file(self):
+        with open(self.path, 'w') as f:
+            f.write('{"rules": [')
+        with self.assertRaises(ValueError):
+            policy_probes.load_policy(self.path)
+
+    def test_switch_paths(self):
+        paths = policy_probes.switch_paths(self.net)
+        host = self.net.host
+        self.assertEqual(paths[(host('h1'), host('h3'))], [1, 2])
+        self.assertEqual(paths[(host('h3'), host('h1'))], [2, 1])
+        self.assertEqual(paths[(host('h1'), host('h2'))], [1])
+        self.assertEqual(paths[(host('h3'), host('h4'))], [2])
+        self.assertEqual(len(paths), 12)
+
+    def test_expected_results(self):
+        probes = self.probes()
+        expected = self.expected(probes)
+        default = policy_probes.DEFAULT_PROBE_PORT
+
+        def outcome(src, dst, proto, dport, sport=None):
+            # sin sport se busca la sonda con puerto origen generado (o ICMP)
+            matches = [rule for (s, d, p, sp, dp), rule in expected.items()
+                       if (s, d, p, dp) == (src, dst, proto, dport) and
+                       (sp == sport if sport is not None else
+                        sp is None or sp >= policy_probes.PROBE_SRC_PORT)]
+            self.assertEqual(len(matches), 1, (src, dst, proto, sport, dport))
+            return matches[0]
+
+        self.assertEqual(outcome('h1', 'h3', 'tcp', 80), 'web')
+        self.assertIsNone(outcome('h1', 'h3', 'tcp', default))
+        self.assertEqual(outcome('h1', 'h2', 'udp', 5001), 'h1 udp 5001')
+        self.assertEqual(outcome('h2', 'h3', 'icmp', None), 'h2 a h3')
+        # en sentido inverso lo que se descarta es el echo reply
+        self.assertEqual(outcome('h3', 'h2', 'icmp', None), 'h2 a h3')
+        self.assertIsNone(outcome('h3', 'h1', 'icmp', None))
+        # la regla web bloquea la respuesta del servidor en el puerto origen 80
+        self.assertEqual(outcome('h3', 'h1', 'tcp', default, sport=80), 'web')
+        # s2 no tiene reglas con puertos: solo las sondas por defecto
+        self.assertEqual(sorted(p.proto for p in probes if
+                                (p.src.name, p.dst.name) == ('h3', 'h4')),
+                         ['icmp', 'tcp', 'udp'])
+
+    def test_source_ports(self):
+        batch_size = 4
+        probes = self.probes(batch_size)
+        rule_ports = {80, 5001}
+        for i in range(0, len(probes), batch_size):
+            chunk = [p for p in probes[i:i + batch_size] if p.proto != 'icmp']
+            generated = [p.sport for p in chunk if p.sport not in rule_ports]
+            self.assertEqual(len(generated), len(set(generated)))
+            for port in generated:
+                self.assertGreaterEqual(port, policy_probes.PROBE_SRC_PORT)
+
+
+if __name__ == '__main__':
+    unittest.main()
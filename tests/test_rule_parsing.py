@@ -0,0 +1,133 @@
+"""
+Tests del parseo de reglas (controller/utils.py): rangos de puertos,
+expansión a flows y prefijos IP.
+
+Uso:
+    python3 -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'pox'))
+sys.path.insert(0, os.path.join(ROOT, 'controller'))
+
+import utils
+
+
+class PortRangeTest(unittest.TestCase):
+
+    def test_single_port(self):
+        self.assertEqual(utils.parse_port_range(80), (80, 80))
+        self.assertEqual(utils.parse_port_range("80"), (80, 80))
+
+    def test_string_range(self):
+        self.assertEqual(utils.parse_port_range("1024-65535"), (1024, 65535))
+
+    def test_list_range(self):
+        self.assertEqual(utils.parse_port_range([1024, 65535]), (1024, 65535))
+        self.assertEqual(utils.parse_port_range((5000, 5001)), (5000, 5001))
+
+    def test_invalid_format(self):
+        for value in ("http", "80-", [1, 2, 3], [80], None):
+            with self.assertRaises((ValueError, TypeError), msg=value):
+                utils.parse_port_range(value)
+
+    def check(self, **ports):
+        return utils.check_rule(dict({'protocol': 'TCP'}, **ports))
+
+    def test_reversed_range_rejected(self):
+        self.assertEqual(self.check(dst_port="90-80")[0], "Puerto fuera de rango")
+        self.assertEqual(self.check(src_port=[90, 80])[0], "Puerto fuera de rango")
+
+    def test_out_of_range_bounds_rejected(self):
+        for value in (0, 65536, "0-80", "80-65536", [0, 65535]):
+            self.assertEqual(self.check(dst_port=value)[0], "Puerto fuera de rango", value)
+
+    def test_valid_ranges_accepted(self):
+        for value in (1, 65535, "1-65535", [1024, 65535], "5000-5001"):
+            self.assertIsNone(self.check(dst_port=value), value)
+
+
+class ExpandRuleTest(unittest.TestCase):
+
+    def expand(self, **ports):
+        rule = dict({'protocol': 'UDP', 'switch': 1}, **ports)
+        self.assertIsNone(utils.check_rule(rule))
+        return list(utils.expand_rule(rule))
+
+    def test_single_port(self):
+        self.assertEqual(self.expand(dst_port="80"),
+                         [{'protocol': 'UDP', 'switch': 1, 'dst_port': 80}])
+
+    def test_range(self):
+        rules = self.expand(dst_port="5000-5002")
+        self.assertEqual([rule['dst_port'] for rule in rules], [5000, 5001, 5002])
+
+    def test_product_of_ranges(self):
+        rules = self.expand(src_port=[10, 11], dst_port="20-22")
+        self.assertEqual(len(rules), 6)
+        self.assertEqual({(rule['src_port'], rule['dst_port']) for rule in rules},
+                         {(s, d) for s in (10, 11) for d in (20, 21, 22)})
+
+    def test_full_range_is_wildcard(self):
+        for value in ("1-65535", [1, 65535]):
+            rules = self.expand(dst_port=value)
+            self.assertEqual(rules, [{'protocol': 'UDP', 'switch': 1}], value)
+
+    def test_full_range_with_other_range(self):
+        rules = self.expand(src_port="1-65535", dst_port=[80, 81])
+        self.assertEqual([rule.get('src_port') for rule in rules], [None, None])
+        self.assertEqual([rule['dst_port'] for rule in rules], [80, 81])
+
+    def test_expansion_limit(self):
+        # un solo rango grande entra: 65534 flows
+        self.assertIsNone(utils.check_rule({'protocol': 'TCP', 'dst_port': "2-65535"}))
+        # el producto de dos rangos no
+        error = utils.check_rule({'protocol': 'TCP', 'src_port': "1-1000", 'dst_port': "1-1000"})
+        self.assertEqual(error[0], "Expansión de puertos excesiva")
+        error = utils.check_rule({'protocol': 'TCP', 'src_port': "2-65535", 'dst_port': "2-65535"})
+        self.assertEqual(error[0], "Expansión de puertos excesiva")
+        # un rango completo no suma flows
+        self.assertIsNone(utils.check_rule({'protocol': 'TCP', 'src_port': "1-65535",
+                                            'dst_port': "2-65535"}))
+
+    def test_expansion_is_lazy(self):
+        rules = utils.expand_rule({'protocol': 'TCP', 'dst_port': "2-65535"})
+        self.assertEqual(next(rules)['dst_port'], 2)
+        self.assertEqual(next(rules)['dst_port'], 3)
+
+
+class IpPrefixTest(unittest.TestCase):
+
+    def test_host(self):
+        self.assertEqual(utils._parse_ip_prefix("10.0.0.1"), (0x0a000001, 32))
+
+    def test_prefix(self):
+        self.assertEqual(utils._parse_ip_prefix("10.0.0.0/24"), (0x0a000000, 24))
+        self.assertEqual(utils._parse_ip_prefix("0.0.0.0/0"), (0, 0))
+
+    def test_non_aligned_prefix_rejected(self):
+        for value in ("10.0.0.1/24", "10.0.0.128/24", "10.0.0.1/31"):
+            self.assertIsNone(utils._parse_ip_prefix(value), value)
+            with self.assertRaises(ValueError):
+                utils.parse_ip_prefix(value)
+        error = utils.check_rule({'src_ip': "10.0.0.1/24"})
+        self.assertEqual(error[0], "IP inválida")
+
+    def test_invalid(self):
+        for value in ("10.0.0.256", "10.0.0", "10.0.0.0/33", "10.0.0.0/", "a.b.c.d",
+                      167772161, None):
+            self.assertIsNone(utils._parse_ip_prefix(value), value)
+
+    def test_check_rule_fills_prefixes(self):
+        prefixes = {}
+        rule = {'src_ip': "10.0.0.0/8", 'dst_ip': "10.0.0.2"}
+        self.assertIsNone(utils.check_rule(rule, prefixes))
+        self.assertEqual(prefixes, {'src_ip': (0x0a000000, 8), 'dst_ip': (0x0a000002, 32)})
+
+
+if __name__ == '__main__':
+    unittest.main()
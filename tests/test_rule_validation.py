@@ -0,0 +1,46 @@
+"""
+Tests de la validación de reglas (controller/utils.py).
+
+utils usa el logger de POX si está instalado en ./pox (ver install_pox.sh)
+y el logging estándar si no, así que los tests no necesitan POX.
+
+Uso:
+    python3 -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'pox'))
+sys.path.insert(0, os.path.join(ROOT, 'controller'))
+
+import utils
+
+
+class PriorityValidationTest(unittest.TestCase):
+
+    def check(self, priority):
+        return utils.check_rule({'protocol': 'TCP', 'dst_port': 80, 'priority': priority})
+
+    def test_valid_priorities(self):
+        for priority in (utils.MIN_PRIORITY, 1, 40000, utils.MAX_PRIORITY):
+            self.assertIsNone(self.check(priority), priority)
+
+    def test_out_of_range(self):
+        for priority in (utils.MIN_PRIORITY - 1, utils.MAX_PRIORITY + 1):
+            self.assertEqual(self.check(priority)[0], "Prioridad inválida")
+
+    def test_not_an_integer(self):
+        for priority in ("100", 1.5, None):
+            self.assertEqual(self.check(priority)[0], "Prioridad inválida")
+
+    def test_boolean(self):
+        # en JSON "priority": true llega como True, que es un int en Python
+        for priority in (True, False):
+            self.assertEqual(self.check(priority)[0], "Prioridad inválida")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,10 +8,46 @@ donde los hosts se conectan únicamente a los switches de los extremos.
 Topología:
     N >= 2: h1, h2 -- S1 -- S2 -- ... -- SN -- h3, h4
     N = 1:  h1, h2, h3, h4 -- S1
+
+Además define topologías para pruebas de carga del controlador (fat-tree,
+leaf-spine, anillo y grafo aleatorio) con una cantidad configurable de
+hosts por switch. Se construyen sin imprimir cada elemento, los switches
+se llaman s1..sN y los hosts h1..hM, con IPs consecutivas dentro de
+ip_base (por defecto 10.0.0.0/8: h1 = 10.0.0.1, h256 = 10.0.1.0, ...).
 """
 
+import random
+
 from mininet.topo import Topo
 
+# Red de la que se toman las IPs de los hosts en las topologías escalables
+IP_BASE = '10.0.0.0/8'
+
+
+def host_address(index, ip_base=IP_BASE):
+    """
+    IP del host número index (desde 1) dentro de ip_base.
+
+    Args:
+        index (int): Número de host
+        ip_base (str): Red en notación CIDR
+
+    Returns:
+        str: IP con el largo de prefijo de la red (ej: '10.0.1.4/8')
+
+    Raises:
+        ValueError: Si la red no tiene lugar para index hosts
+    """
+    network, prefix_len = ip_base.split('/')
+    prefix_len = int(prefix_len)
+    a, b, c, d = (int(octet) for octet in network.split('.'))
+    base = (a << 24) | (b << 16) | (c << 8) | d
+    # sin la dirección de red ni la de broadcast
+    if not 0 < index < (1 << (32 - prefix_len)) - 1:
+        raise ValueError(f"La red {ip_base} no tiene lugar para el host {index}")
+    ip = base + index
+    return f"{ip >> 24}.{(ip >> 16) & 0xff}.{(ip >> 8) & 0xff}.{ip & 0xff}/{prefix_len}"
+
 
 class ChainTopology(Topo):
     """
@@ -138,8 +174,183 @@ class ChainTopology(Topo):
         print(f"{'='*60}\n")
 
 
+class ScalableTopology(Topo):
+    """
+    Base de las topologías para pruebas de carga.
+
+    Las subclases implementan build() usando add_switches(), add_link() y
+    add_hosts(). No imprime nada por elemento: con cientos de switches y
+    miles de hosts la construcción solo arma el grafo.
+
+    Atributos:
+        switch_list: Switches creados, en orden (s1..sN)
+        host_list: Hosts creados, en orden (h1..hM)
+        ip_base: Red de la que se asignan las IPs de los hosts
+    """
+
+    def reset(self, ip_base):
+        """Inicializa las listas; lo llama build() antes de crear elementos."""
+        self.switch_list = []
+        self.host_list = []
+        self.ip_base = ip_base
+
+    def add_switches(self, count):
+        """
+        Crea count switches con los nombres siguientes.
+
+        Returns:
+            list: Nombres de los switches creados
+        """
+        first = len(self.switch_list) + 1
+        names = [f's{i}' for i in range(first, first + count)]
+        for name in names:
+            self.addSwitch(name)
+        self.switch_list.extend(names)
+        return names
+
+    def add_link(self, node1, node2):
+        self.addLink(node1, node2)
+
+    def add_hosts(self, switch, count):
+        """Crea count hosts conectados a switch, con IPs consecutivas."""
+        for _ in range(count):
+            index = len(self.host_list) + 1
+            name = f'h{index}'
+            self.addHost(name, ip=host_address(index, self.ip_base))
+            self.addLink(name, switch)
+            self.host_list.append(name)
+
+
+class FatTreeTopology(ScalableTopology):
+    """
+    Fat-tree de k pods (k par): (k/2)^2 switches core y, en cada pod,
+    k/2 switches de agregación y k/2 de acceso (edge). Los hosts se
+    conectan a los switches de acceso.
+
+    Con k=4 son 20 switches y 16 hosts; con k=16, 320 switches y 1024 hosts.
+
+    Args:
+        k (int): Cantidad de pods (par, mínimo 2). Default: 4
+        hosts_per_switch (int): Hosts por switch de acceso. Default: k/2
+        ip_base (str): Red de los hosts. Default: 10.0.0.0/8
+    """
+
+    def build(self, k=4, hosts_per_switch=None, ip_base=IP_BASE):
+        if k < 2 or k % 2:
+            raise ValueError("k debe ser par y al menos 2")
+        half = k // 2
+        if hosts_per_switch is None:
+            hosts_per_switch = half
+        self.reset(ip_base)
+
+        core = self.add_switches(half * half)
+        for _ in range(k):
+            aggregation = self.add_switches(half)
+            edge = self.add_switches(half)
+            for i, agg in enumerate(aggregation):
+                # cada switch de agregación sube a un grupo de k/2 cores
+                for switch in core[i * half:(i + 1) * half]:
+                    self.add_link(agg, switch)
+                for switch in edge:
+                    self.add_link(agg, switch)
+            for switch in edge:
+                self.add_hosts(switch, hosts_per_switch)
+
+
+class LeafSpineTopology(ScalableTopology):
+    """
+    Leaf-spine: cada leaf conectado a todos los spines y los hosts
+    conectados a los leaves. Los spines son s1..s{spines} y los leaves
+    los siguientes.
+
+    Args:
+        leaves (int): Cantidad de switches leaf. Default: 4
+        spines (int): Cantidad de switches spine. Default: 2
+        hosts_per_switch (int): Hosts por leaf. Default: 2
+        ip_base (str): Red de los hosts. Default: 10.0.0.0/8
+    """
+
+    def build(self, leaves=4, spines=2, hosts_per_switch=2, ip_base=IP_BASE):
+        if leaves < 1 or spines < 1:
+            raise ValueError("leaves y spines deben ser al menos 1")
+        self.reset(ip_base)
+
+        spine_list = self.add_switches(spines)
+        for leaf in self.add_switches(leaves):
+            for spine in spine_list:
+                self.add_link(leaf, spine)
+            self.add_hosts(leaf, hosts_per_switch)
+
+
+class RingTopology(ScalableTopology):
+    """
+    Anillo de N switches (S1 -- S2 -- ... -- SN -- S1) con hosts en cada
+    switch.
+
+    Args:
+        N (int): Cantidad de switches (mínimo 1). Default: 4
+        hosts_per_switch (int): Hosts por switch. Default: 1
+        ip_base (str): Red de los hosts. Default: 10.0.0.0/8
+    """
+
+    def build(self, N=4, hosts_per_switch=1, ip_base=IP_BASE):
+        if N < 1:
+            raise ValueError("N debe ser al menos 1")
+        self.reset(ip_base)
+
+        switches = self.add_switches(N)
+        for i in range(N - 1):
+            self.add_link(switches[i], switches[i + 1])
+        if N > 2:
+            self.add_link(switches[-1], switches[0])
+        for switch in switches:
+            self.add_hosts(switch, hosts_per_switch)
+
+
+class RandomTopology(ScalableTopology):
+    """
+    Grafo aleatorio conexo de N switches: un árbol al azar (cada switch
+    se conecta a uno anterior) más extra_links enlaces entre pares al
+    azar. Con la misma seed se obtiene la misma topología.
+
+    Args:
+        N (int): Cantidad de switches (mínimo 1). Default: 10
+        extra_links (int): Enlaces además del árbol. Default: N/2
+        hosts_per_switch (int): Hosts por switch. Default: 1
+        seed (int): Semilla del generador. Default: 0
+        ip_base (str): Red de los hosts. Default: 10.0.0.0/8
+    """
+
+    def build(self, N=10, extra_links=None, hosts_per_switch=1, seed=0, ip_base=IP_BASE):
+        if N < 1:
+            raise ValueError("N debe ser al menos 1")
+        if extra_links is None:
+            extra_links = N // 2
+        # no hay más pares posibles que los del grafo completo
+        extra_links = min(extra_links, N * (N - 1) // 2 - (N - 1))
+        self.reset(ip_base)
+        rng = random.Random(seed)
+
+        switches = self.add_switches(N)
+        links = set()
+        for i in range(1, N):
+            links.add((rng.randrange(i), i))
+        target = len(links) + extra_links
+        while len(links) < target:
+            a, b = sorted(rng.sample(range(N), 2))
+            links.add((a, b))
+        for a, b in sorted(links):
+            self.add_link(switches[a], switches[b])
+        for switch in switches:
+            self.add_hosts(switch, hosts_per_switch)
+
+
 topos = {
-    'chain': ChainTopology
+    'chain': ChainTopology,
+    'fattree': FatTreeTopology,
+    'leafspine': LeafSpineTopology,
+    'ring': RingTopology,
+    'random': RandomTopology,
 }
 
 